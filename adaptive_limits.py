@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from config import PERFORMANCE_CONFIG, ADAPTIVE_CONCURRENCY_CONFIG
+
+RATE_LIMIT_MARKERS = ('429', 'rate limit', 'rate_limit', 'quota', 'resource_exhausted', 'resourceexhausted', 'too many requests')
+TIMEOUT_MARKERS = ('timeout', 'timed out', 'deadline')
+
+def is_rate_limit_error(error):
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+def is_overload_error(error):
+    # Rate limits and timeouts mean the other side is saturated; any other error
+    # says nothing about how much load it can take.
+    text = f"{type(error).__name__} {error}".lower()
+    return is_rate_limit_error(error) or any(marker in text for marker in TIMEOUT_MARKERS)
+
+def initial_limit(resource):
+    limits = PERFORMANCE_CONFIG['provider_concurrency']
+    return limits.get(resource, limits['default'])
+
+def max_limit(resource):
+    limits = ADAPTIVE_CONCURRENCY_CONFIG['max_limit']
+    return limits.get(resource, limits['default'])
+
+# Additive-increase/multiplicative-decrease concurrency limit shared by the
+# threads and event loops calling one provider key (or Serper). Thread callers
+# wait on a condition; coroutine callers park a future on their own loop, which
+# a release from any thread wakes through call_soon_threadsafe.
+class AdaptiveLimiter:
+    def __init__(self, name, initial, min_limit, max_limit, settings=None):
+        self.name = name
+        self.settings = settings or ADAPTIVE_CONCURRENCY_CONFIG
+        self.min_limit = min_limit
+        self.max_limit = max_limit if self.settings['enabled'] else initial
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.inflight = 0
+        self.stats = {'calls': 0, 'errors': 0, 'overloads': 0, 'increases': 0, 'decreases': 0,
+                      'retries': 0, 'waits': 0, 'peak_inflight': 0, 'peak_limit': int(self.limit), 'low_limit': int(self.limit)}
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters = []
+    
+    def acquire(self):
+        with self._cond:
+            if not self._has_room():
+                self.stats['waits'] += 1
+                while not self._has_room():
+                    self._cond.wait()
+            self._enter()
+    
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        waited = False
+        while True:
+            with self._lock:
+                if self._has_room():
+                    self._enter()
+                    return
+                if not waited:
+                    self.stats['waits'] += 1
+                    waited = True
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
+    
+    def release(self, outcome='success'):
+        with self._cond:
+            self.inflight -= 1
+            if outcome == 'success':
+                self._increase()
+            elif outcome == 'overload':
+                self.stats['overloads'] += 1
+                self._decrease()
+            else:
+                self.stats['errors'] += 1
+            waiters, self._waiters = self._waiters, []
+            self._cond.notify_all()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass
+    
+    def backoff(self):
+        # For callers that see an overload without an exception, like a 429 the
+        # search client retries.
+        with self._lock:
+            self.stats['overloads'] += 1
+            self._decrease()
+    
+    def record_retry(self, count=1):
+        with self._lock:
+            self.stats['retries'] += count
+    
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        outcome = 'success'
+        try:
+            yield self
+        except Exception as e:
+            outcome = 'overload' if is_overload_error(e) else 'error'
+            raise
+        finally:
+            self.release(outcome)
+    
+    @asynccontextmanager
+    async def aslot(self):
+        await self.aacquire()
+        outcome = 'success'
+        try:
+            yield self
+        except Exception as e:
+            outcome = 'overload' if is_overload_error(e) else 'error'
+            raise
+        finally:
+            self.release(outcome)
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                'limit': int(self.limit),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'inflight': self.inflight,
+                **self.stats
+            }
+    
+    def _has_room(self):
+        return self.inflight < int(self.limit)
+    
+    def _enter(self):
+        self.inflight += 1
+        self.stats['calls'] += 1
+        self.stats['peak_inflight'] = max(self.stats['peak_inflight'], self.inflight)
+    
+    def _increase(self):
+        if not self.settings['enabled'] or self.limit >= self.max_limit:
+            return
+        before = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if int(self.limit) > before:
+            self.stats['increases'] += 1
+            self.stats['peak_limit'] = max(self.stats['peak_limit'], int(self.limit))
+    
+    def _decrease(self):
+        now = time.monotonic()
+        if not self.settings['enabled'] or now - self._last_decrease < self.settings['decrease_interval']:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.settings['backoff'])
+        self.stats['decreases'] += 1
+        self.stats['low_limit'] = min(self.stats['low_limit'], int(self.limit))
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(resource, name=None):
+    # One limiter per name (a provider key, or 'serper'); its bounds come from
+    # the resource it calls.
+    name = name or resource
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(name, initial_limit(resource), ADAPTIVE_CONCURRENCY_CONFIG['min_limit'], max_limit(resource))
+        return _limiters[name]
+
+def limiter_stats():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.snapshot() for name, limiter in sorted(limiters.items())}
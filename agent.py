@@ -1,69 +1,200 @@
 from llm_factory import LLMFactory
-from tools import search_web, extract_claims, batch_validate_claims
+from llm_cache import CachedLLM, invalidate_reply
+from tools import search_web, extract_claims, asearch_web, aextract_claims, budget_claims
 from credibility import CredibilityAnalyzer
-from system_prompts import RECONCILIATION_PROMPT, REPORT_GENERATION_PROMPT, UPDATE_ANALYSIS_PROMPT
-from config import CREDIBILITY_PARAMS, PERFORMANCE_CONFIG
+from documents import iter_document_text, iter_chunks, extract_claims_stream, aextract_claims_stream
+from claim_index import ClaimIndex
+from reconciliation import ReconciliationEngine
+from research_store import ResearchStore, STATUS_SCORED, STATUS_COMPLETE
+from reports import ReportBuilder
+from pipeline import ClaimPipeline, AsyncClaimPipeline
+from instrumentation import call_site, timed, record_fallback, get_metrics_registry, ContextThreadPoolExecutor
+from adaptive_limits import limiter_stats
+from budget import ResearchBudget, budget_allows, budget_scope, within_budget
+from system_prompts import REPORT_GENERATION_PROMPT, UPDATE_ANALYSIS_PROMPT
+from config import CREDIBILITY_PARAMS, PERFORMANCE_CONFIG, RESEARCH_STORE_CONFIG, BULK_CONFIG
+import asyncio
+import copy
+import hashlib
 import json
+import os
+import threading
 import time
 from cachetools import TTLCache
-from concurrent.futures import ThreadPoolExecutor
 
 class ResearchAgent:
     def __init__(self, llm_provider, llm_model=None):
         self.llm = LLMFactory.create_llm(llm_provider, llm_model)
+        self.llm_concurrency = LLMFactory.max_concurrency(llm_provider)
         self.credibility = CredibilityAnalyzer(self.llm)
+        self.reconciler = ReconciliationEngine(self.llm)
+        self.reports = ReportBuilder(self.llm)
         self.cache = TTLCache(maxsize=100, ttl=PERFORMANCE_CONFIG['cache_ttl'])
-        self.metrics = {}
+        self.store = ResearchStore(RESEARCH_STORE_CONFIG['path'])
+        self.claim_indexes = {}
+        # Counters across every research and update; per-call metrics are in
+        # each result's 'metrics'.
+        self.metrics = {'shared_extractions': 0}
+        # Extracted claims per source, shared by every topic that finds the same
+        # page; in-flight async extractions are shared too.
+        self.extractions = TTLCache(maxsize=BULK_CONFIG['extraction_memo_size'], ttl=PERFORMANCE_CONFIG['cache_ttl'])
+        self._extractions_lock = threading.Lock()
+        self._extracting = {}
     
-    def research(self, topic):
+    def research(self, topic, budget=None, refresh=False):
+        for event in self.research_stream(topic, budget, refresh):
+            if event['type'] == 'result':
+                return event['result']
+    
+    def research_stream(self, topic, budget=None, refresh=False):
+        # Yields progress events and report tokens as they become available, ending
+        # with a 'result' event that carries the same dict research() returns.
+        # Every LLM call of the research is charged to the budget (BUDGET_CONFIG
+        # limits unless one is given). refresh=True researches the topic again
+        # even if a stored result is still fresh.
+        budget = budget or ResearchBudget.from_config()
+        yield from within_budget(budget, self._research_events(topic, budget, refresh))
+    
+    def _research_events(self, topic, budget, refresh):
         start = time.time()
-        if topic in self.cache:
-            return self.cache[topic]
-        
-        print("🔎 Searching...")
-        sources = search_web(topic, num_results=10)
-        
-        print("📝 Extracting claims...")
-        all_claims = []
-        with ThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
-            results = executor.map(lambda src: extract_claims(src['content'], src['url'], self.llm), sources[:8])
-            for claims in results:
-                all_claims.extend(claims)
+        metrics = {}
+        stored = self._fresh_result(topic, refresh)
+        if stored:
+            yield {'type': 'result', 'result': stored}
+            return
         
-        print(f"✅ Found {len(all_claims)} claims")
-        print("🎯 Scoring credibility...")
+        sources, scored = self._checkpoint(topic, refresh)
+        if sources is None:
+            print("🔎 Searching...")
+            with timed('search'):
+                sources = search_web(topic, num_results=10)
+            self.store.save_sources(topic, sources)
+        yield {'type': 'sources', 'count': len(sources), 'urls': [s['url'] for s in sources]}
         
-        scored = []
-        low_medium = [c for c in all_claims if self.credibility.score_claim(c['text'], c['source_type'], c.get('source_context', ''))['score'] < CREDIBILITY_PARAMS['validation_required']]
+        if scored is None:
+            print("📝 Extracting and scoring claims...")
+            pipeline = ClaimPipeline(self)
+            scored = yield from pipeline.run(sources[:8])
+            metrics.update(self._scoring_metrics(scored), pipeline=pipeline.stats)
+            print(f"✅ Scored {len(scored)} claims")
+            self.store.save_claims(topic, scored)
+        yield {
+            'type': 'claims_scored',
+            'count': len(scored),
+            'included': sum(1 for c in scored if c.get('action') == 'INCLUDE'),
+            'warned': sum(1 for c in scored if c.get('action') == 'WARN'),
+            'excluded': sum(1 for c in scored if c.get('action') == 'EXCLUDE')
+        }
         
-        if PERFORMANCE_CONFIG['parallel_validation'] and low_medium:
-            print("⚡ Batch validating...")
-            evidences = batch_validate_claims([c['text'] for c in low_medium], os.getenv('SERPER_API_KEY'))
+        report, sections = yield from self._stream_report(topic, scored, sources, metrics)
+        yield {'type': 'result', 'result': self._research_result(topic, scored, sources, report, sections, start, budget, metrics)}
+    
+    async def aresearch(self, topic, budget=None, refresh=False):
+        budget = budget or ResearchBudget.from_config()
+        with budget_scope(budget):
+            return await self._aresearch(topic, budget, refresh)
+    
+    async def _aresearch(self, topic, budget, refresh):
+        start = time.time()
+        metrics = {}
+        stored = self._fresh_result(topic, refresh)
+        if stored:
+            return stored
         
-        for i, claim in enumerate(all_claims):
-            score_data = self.credibility.score_claim(claim['text'], claim['source_type'], claim.get('source_context', ''))
-            claim['credibility_score'] = score_data['score']
-            claim['score_reasoning'] = score_data['reasoning']
-            
-            if claim['credibility_score'] < CREDIBILITY_PARAMS['validation_required']:
-                evidence = evidences[low_medium.index(claim)] if claim in low_medium else "No evidence"
-                validation = self.credibility.validate_claim(claim['text'], claim['credibility_score'], evidence)
-                claim['credibility_score'] = validation['validated_score']
-                claim['validation'] = validation['verdict']
-                claim['validation_reasoning'] = validation['explanation']
-            
-            action = self.credibility.get_final_action(
-                claim['text'], claim['credibility_score'], claim['source_type'], claim.get('validation', 'none')
-            )
-            claim['action'] = action['action']
-            claim['action_reasoning'] = action['reasoning']
-            scored.append(claim)
+        sources, scored = self._checkpoint(topic, refresh)
+        if sources is None:
+            print("🔎 Searching...")
+            with timed('search'):
+                sources = await asearch_web(topic, num_results=10)
+            self.store.save_sources(topic, sources)
         
-        self.cache[topic] = {'claims': scored, 'sources': sources}
-        report = self._generate_report(topic, scored, sources)
+        if scored is None:
+            print("📝 Extracting and scoring claims...")
+            pipeline = AsyncClaimPipeline(self)
+            scored = await pipeline.run(sources[:8])
+            metrics.update(self._scoring_metrics(scored), pipeline=pipeline.stats)
+            print(f"✅ Scored {len(scored)} claims")
+            self.store.save_claims(topic, scored)
         
+        report, sections = await self._agenerate_report(topic, scored, sources, metrics)
+        return self._research_result(topic, scored, sources, report, sections, start, budget, metrics)
+    
+    def _extract_source(self, src):
+        key = self._extraction_key(src)
+        with self._extractions_lock:
+            cached = self.extractions.get(key)
+        if cached is not None:
+            self._count_shared_extraction()
+            return copy.deepcopy(cached)
+        if not budget_allows('extraction'):
+            return budget_claims(src['content'], src['url'])
+        claims = extract_claims(src['content'], src['url'], self.llm)
+        with self._extractions_lock:
+            self.extractions[key] = copy.deepcopy(claims)
+        return claims
+    
+    async def _aextract_source(self, src):
+        key = self._extraction_key(src)
+        with self._extractions_lock:
+            cached = self.extractions.get(key)
+        if cached is None and key not in self._extracting and not budget_allows('extraction'):
+            return budget_claims(src['content'], src['url'])
+        if cached is None and key not in self._extracting:
+            task = asyncio.ensure_future(aextract_claims(src['content'], src['url'], self.llm))
+            self._extracting[key] = task
+            try:
+                cached = await task
+            finally:
+                self._extracting.pop(key, None)
+            with self._extractions_lock:
+                self.extractions[key] = cached
+        elif cached is None:
+            self._count_shared_extraction()
+            cached = await self._extracting[key]
+        else:
+            self._count_shared_extraction()
+        return copy.deepcopy(cached)
+    
+    def _extraction_key(self, src):
+        return f"{src['url']}:{hashlib.sha1(src['content'].encode('utf-8')).hexdigest()}"
+    
+    def _count_shared_extraction(self):
+        with self._extractions_lock:
+            self.metrics['shared_extractions'] += 1
+    
+    def _stored_result(self, topic):
+        if topic in self.cache:
+            return self.cache[topic]
+        result = self.store.load_result(topic)
+        if result:
+            self.cache[topic] = result
+        return result
+    
+    def _fresh_result(self, topic, refresh):
+        # A stored result is served until it is result_ttl old.
+        if refresh:
+            return None
+        result = self._stored_result(topic)
+        ttl = RESEARCH_STORE_CONFIG['result_ttl']
+        if result and ttl and time.time() - result.get('researched_at', 0) > ttl:
+            print(f"⌛ Stored research for '{topic}' is out of date - researching again")
+            return None
+        return result
+    
+    def _checkpoint(self, topic, refresh):
+        # Only an interrupted research resumes; a complete one being refreshed
+        # starts again from the search.
+        status = self.store.status(topic)
+        if refresh or status in (None, STATUS_COMPLETE):
+            return None, None
+        print(f"♻️ Resuming '{topic}' from the '{status}' checkpoint")
+        sources = self.store.load_sources(topic)
+        scored = self.store.load_claims(topic) if status == STATUS_SCORED else None
+        return sources, scored
+    
+    def _research_result(self, topic, scored, sources, report, sections, start, budget, metrics):
         elapsed = time.time() - start
-        self.metrics['research_time'] = elapsed
+        metrics['research_time'] = elapsed
         
         result = {
             'report': report,
@@ -72,109 +203,388 @@ class ResearchAgent:
             'sources_count': len(sources),
             'time_seconds': elapsed,
             'sources_analyzed': self._format_sources_analyzed(sources, scored),
-            'summary': self._generate_summary(scored, sources)
+            'summary': self._generate_summary(scored, sources),
+            'report_sections': sections,
+            'budget': budget.snapshot(),
+            'metrics': metrics,
+            'researched_at': time.time()
         }
         self.cache[topic] = result
+        self.store.save_result(topic, result)
+        self.claim_indexes.pop(topic, None)
         return result
     
-    def update_research(self, filepath):
+    def _scoring_metrics(self, claims):
+        fast = [c for c in claims if c.get('scoring_path') == 'fast']
+        saved = sum(1 + (c['credibility_score'] < CREDIBILITY_PARAMS['validation_required']) for c in fast)
+        if not PERFORMANCE_CONFIG['batch_final_action']:
+            saved += len(fast)
+        return {'fast_path_claims': len(fast), 'slow_path_claims': len(claims) - len(fast), 'llm_calls_saved': saved}
+    
+    def _apply_final_actions(self, claims):
+        # CredibilityAnalyzer asks the budget before each final-action request.
+        pending = [c for c in claims if 'action' not in c]
+        if PERFORMANCE_CONFIG['batch_final_action']:
+            actions = self.credibility.get_final_actions(self._final_action_items(pending))
+        else:
+            with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+                actions = list(executor.map(lambda c: self.credibility.get_final_action(
+                    c['text'], c['credibility_score'], c['source_type'], c.get('validation', 'none')
+                ), pending))
+        self._set_actions(pending, actions)
+    
+    async def _aapply_final_actions(self, claims):
+        pending = [c for c in claims if 'action' not in c]
+        if PERFORMANCE_CONFIG['batch_final_action']:
+            actions = await self.credibility.aget_final_actions(self._final_action_items(pending))
+        else:
+            actions = await asyncio.gather(*[self.credibility.aget_final_action(
+                c['text'], c['credibility_score'], c['source_type'], c.get('validation', 'none')
+            ) for c in pending])
+        self._set_actions(pending, actions)
+    
+    def _final_action_items(self, claims):
+        return [{
+            'claim': c['text'],
+            'score': c['credibility_score'],
+            'source_type': c['source_type'],
+            'validation_status': c.get('validation', 'none')
+        } for c in claims]
+    
+    def _set_actions(self, claims, actions):
+        for claim, action in zip(claims, actions):
+            claim['action'] = action['action']
+            claim['action_reasoning'] = action['reasoning']
+    
+    def _safe_score(self, claim):
+        try:
+            return self.credibility.score_claim(claim['text'], claim['source_type'], claim.get('source_context', ''))
+        except Exception as e:
+            print(f"⚠️ Scoring failed for claim: {e}")
+            return None
+    
+    async def _asafe_score(self, claim):
+        try:
+            return await self.credibility.ascore_claim(claim['text'], claim['source_type'], claim.get('source_context', ''))
+        except Exception as e:
+            print(f"⚠️ Scoring failed for claim: {e}")
+            return None
+    
+    def _apply_score(self, claim, score_data):
+        if score_data is None:
+            raise ValueError("no score available")
+        claim['credibility_score'] = score_data['score']
+        claim['score_reasoning'] = score_data['reasoning']
+        claim['scoring_path'] = score_data['path']
+        if claim['scoring_path'] in ('fast', 'budget'):
+            self._settle_locally(claim)
+            return False
+        return claim['credibility_score'] < CREDIBILITY_PARAMS['validation_required']
+    
+    def _apply_validation(self, claim, validation):
+        claim['credibility_score'] = validation['validated_score']
+        claim['validation'] = validation['verdict']
+        claim['validation_reasoning'] = validation['explanation']
+    
+    def _skip_validation(self, claim):
+        claim['validation'] = 'skipped'
+        claim['validation_reasoning'] = 'Validation skipped to stay within the research budget'
+    
+    def _mark_failed(self, claim, error):
+        print(f"⚠️ Claim processing failed: {error}")
+        score = claim.get('credibility_score', 0)
+        claim['credibility_score'] = score
+        claim.setdefault('score_reasoning', [f"Scoring failed: {error}"])
+        claim['action'] = self.credibility._fallback_action(score)
+        claim['action_reasoning'] = 'Fallback due to processing error'
+    
+    def _settle_locally(self, claim):
+        claim['action'] = self.credibility._fallback_action(claim['credibility_score'])
+        if claim['scoring_path'] == 'budget':
+            claim['action_reasoning'] = 'Fallback decision: research budget exhausted'
+        else:
+            claim['action_reasoning'] = f"Heuristic score {claim['credibility_score']:.1f} is decisive; settled without LLM review"
+    
+    def update_research(self, topic, filepath, budget=None):
+        # Updates get a budget of their own, like research().
+        self._require_research(topic)
+        budget = budget or ResearchBudget.from_config()
+        with budget_scope(budget):
+            return self._update_research(topic, filepath, budget)
+    
+    def _update_research(self, topic, filepath, budget):
         start = time.time()
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        metrics = {}
         
         print("📝 Extracting new claims...")
-        new_claims = extract_claims(content, filepath, self.llm)
+        new_claims = []
+        scoring = []
+        chunks = iter_chunks(iter_document_text(filepath))
+        with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+            for claim in extract_claims_stream(chunks, filepath, self.llm):
+                new_claims.append(claim)
+                scoring.append(executor.submit(self._safe_score, claim))
+        for claim, future in zip(new_claims, scoring):
+            self._apply_update_score(claim, future.result())
+        self._apply_final_actions(new_claims)
+        metrics.update(self._scoring_metrics(new_claims))
         
-        for claim in new_claims:
-            score_data = self.credibility.score_claim(claim['text'], claim['source_type'], claim.get('source_context', ''))
-            claim['credibility_score'] = score_data['score']
-            claim['score_reasoning'] = score_data['reasoning']
-            action = self.credibility.get_final_action(claim['text'], claim['credibility_score'], claim['source_type'], 'none')
-            claim['action'] = action['action']
-            claim['action_reasoning'] = action['reasoning']
-        
-        topic = list(self.cache.keys())[0] if self.cache else 'unknown'
-        existing = self.cache.get(topic, {'claims': []})['claims']
+        existing = self._topic_claims(topic)
+        index = self._claim_index(topic, existing)
+        pairing = self.reconciler.pair(new_claims, index)
         
         print("🔄 LLM analyzing update strategy...")
-        strategy = self._llm_update_strategy(existing, new_claims, filepath)
+        strategy = self._llm_update_strategy(existing, new_claims, pairing)
         
         print(f"    📊 Strategy: {strategy['approach']}")
         print(f"    💡 Reason: {strategy['reasoning']}")
         
-        merged = self._smart_merge(existing, new_claims, strategy['approach'])
-        self.cache[topic]['claims'] = merged
-        report = self._generate_report(topic, merged, self.cache[topic].get('sources', []))
+        merged = self.reconciler.reconcile(existing, pairing, index, strategy['approach'])
+        self.claim_indexes[topic] = (merged, index)
+        metrics['store_delta'] = self.store.sync_claims(topic, merged)
+        claims = self._claims_view(merged)
+        sources = self.store.load_sources(topic)
+        report, sections = self._generate_report(topic, claims, sources, metrics, self._reusable_sections(topic, strategy), update=True)
+        return self._update_result(topic, claims, len(merged), sources, strategy, report, sections, start, budget, metrics)
+    
+    async def aupdate_research(self, topic, filepath, budget=None):
+        self._require_research(topic)
+        budget = budget or ResearchBudget.from_config()
+        with budget_scope(budget):
+            return await self._aupdate_research(topic, filepath, budget)
+    
+    async def _aupdate_research(self, topic, filepath, budget):
+        start = time.time()
+        metrics = {}
+        
+        print("📝 Extracting new claims...")
+        new_claims = []
+        scoring = []
+        chunks = iter_chunks(iter_document_text(filepath))
+        async for claim in aextract_claims_stream(chunks, filepath, self.llm):
+            new_claims.append(claim)
+            scoring.append(asyncio.ensure_future(self._asafe_score(claim)))
+        for claim, score_data in zip(new_claims, await asyncio.gather(*scoring)):
+            self._apply_update_score(claim, score_data)
+        await self._aapply_final_actions(new_claims)
+        metrics.update(self._scoring_metrics(new_claims))
+        
+        existing = self._topic_claims(topic)
+        index = self._claim_index(topic, existing)
+        pairing = self.reconciler.pair(new_claims, index)
+        
+        print("🔄 LLM analyzing update strategy...")
+        strategy = await self._allm_update_strategy(existing, new_claims, pairing)
+        
+        print(f"    📊 Strategy: {strategy['approach']}")
+        print(f"    💡 Reason: {strategy['reasoning']}")
         
+        merged = await self.reconciler.areconcile(existing, pairing, index, strategy['approach'])
+        self.claim_indexes[topic] = (merged, index)
+        metrics['store_delta'] = self.store.sync_claims(topic, merged)
+        claims = self._claims_view(merged)
+        sources = self.store.load_sources(topic)
+        report, sections = await self._agenerate_report(topic, claims, sources, metrics, self._reusable_sections(topic, strategy), update=True)
+        return self._update_result(topic, claims, len(merged), sources, strategy, report, sections, start, budget, metrics)
+    
+    def _require_research(self, topic):
+        # An update merges into stored research; without it the document's claims
+        # alone would be saved and later served as the topic's research.
+        if self._stored_result(topic) is None:
+            raise ValueError(f"No research stored for topic: {topic}")
+    
+    def _apply_update_score(self, claim, score_data):
+        try:
+            self._apply_score(claim, score_data)
+        except Exception as e:
+            self._mark_failed(claim, e)
+    
+    def _update_result(self, topic, claims, total, sources, strategy, report, sections, start, budget, metrics):
         elapsed = time.time() - start
-        overhead = elapsed / self.metrics.get('research_time', 1)
+        previous = self._stored_result(topic) or {}
+        research_time = previous.get('time_seconds') or 1
+        metrics['update_time'] = elapsed
         
         result = {
+            **previous,
             'report': report,
-            'claims': merged,
-            'overall_credibility': self._calc_avg(merged),
+            'claims': claims,
+            'claims_total': total,
+            'claims_truncated': total - len(claims),
+            'overall_credibility': self._calc_avg(claims),
+            'sources_count': len(sources),
+            'time_seconds': previous.get('time_seconds', elapsed),
             'update_time': elapsed,
-            'overhead_ratio': overhead,
+            'overhead_ratio': elapsed / research_time,
             'update_strategy': strategy,
-            'sources_analyzed': self._format_sources_analyzed(self.cache[topic].get('sources', []), merged),
-            'summary': self._generate_summary(merged, self.cache[topic].get('sources', []))
+            'sources_analyzed': self._format_sources_analyzed(sources, claims),
+            'summary': self._generate_summary(claims, sources),
+            'report_sections': sections,
+            'budget': budget.snapshot(),
+            'metrics': metrics
         }
         self.cache[topic] = result
+        self.store.save_result(topic, result)
         return result
     
-    def _llm_update_strategy(self, existing, new, source):
-        try:
-            conflicts = sum(1 for n in new for e in existing if self._similar(n['text'], e['text']))
-            prompt = UPDATE_ANALYSIS_PROMPT.format(
-                original_quality=self._calc_avg(existing),
-                new_source_type=new[0]['source_type'] if new else 'document',
-                new_claims_count=len(new),
-                conflicts_count=conflicts,
-                reinforcements_count=len(new) - conflicts,
-                new_info_count=len(new)
-            )
-            result = self.llm.invoke(prompt)
-            return json.loads(result.content)
-        except:
-            return {'approach': 'incremental', 'reasoning': 'Fallback due to error', 'estimated_quality_impact': 'medium'}
+    def _llm_update_strategy(self, existing, new, pairing):
+        if not budget_allows('update_strategy'):
+            return self._budget_strategy()
+        prompt = self._update_strategy_prompt(existing, new, pairing)
+        content = None
+        with timed('update_strategy'), call_site('update_strategy'):
+            try:
+                content = self.llm.invoke(prompt).content
+                return json.loads(content)
+            except Exception:
+                record_fallback('update_strategy', content)
+                invalidate_reply(self.llm, prompt)
+                return self._fallback_strategy()
     
-    def _smart_merge(self, existing, new, approach):
-        try:
-            prompt = RECONCILIATION_PROMPT.format(
-                existing_claims=json.dumps([c['text'] for c in existing[:20]]),
-                new_claims=json.dumps([c['text'] for c in new])
-            )
-            result = self.llm.invoke(prompt)
-            reconciliation = json.loads(result.content)
-            
-            all_claims = existing + new
-            if approach == 'regenerate':
-                all_claims.sort(key=lambda x: x['credibility_score'], reverse=True)
-            
-            seen = set()
-            unique = []
-            for claim in all_claims:
-                key = claim['text'][:100].lower()
-                if key not in seen:
-                    seen.add(key)
-                    unique.append(claim)
-            
-            return unique[:CREDIBILITY_PARAMS['max_claims_per_source'] * 2]
-        except:
-            return existing + new
+    async def _allm_update_strategy(self, existing, new, pairing):
+        if not budget_allows('update_strategy'):
+            return self._budget_strategy()
+        prompt = self._update_strategy_prompt(existing, new, pairing)
+        content = None
+        with timed('update_strategy'), call_site('update_strategy'):
+            try:
+                content = (await self.llm.ainvoke(prompt)).content
+                return json.loads(content)
+            except Exception:
+                record_fallback('update_strategy', content)
+                invalidate_reply(self.llm, prompt)
+                return self._fallback_strategy()
+    
+    def _update_strategy_prompt(self, existing, new, pairing):
+        return UPDATE_ANALYSIS_PROMPT.format(
+            original_quality=self._calc_avg(existing),
+            new_source_type=new[0]['source_type'] if new else 'document',
+            new_claims_count=len(new),
+            conflicts_count=len(pairing['conflicts']),
+            reinforcements_count=len(pairing['reinforcements']),
+            new_info_count=len(pairing['new_information'])
+        )
+    
+    def _topic_claims(self, topic):
+        # Every claim of the topic, not the truncated view an update result shows.
+        if topic in self.claim_indexes:
+            return self.claim_indexes[topic][0]
+        if topic in self.cache and not self.cache[topic].get('claims_truncated'):
+            return self.cache[topic]['claims']
+        return self.store.load_claims(topic)
+    
+    def _claims_view(self, claims):
+        # The store keeps the whole merged set; results and reports show the
+        # first max_claims_per_source * 2 claims.
+        limit = CREDIBILITY_PARAMS['max_claims_per_source'] * 2
+        if len(claims) > limit:
+            print(f"    ✂️ Showing {limit} of {len(claims)} claims; all are kept in the research store")
+        return claims[:limit]
+    
+    def _claim_index(self, topic, claims):
+        # The index holds the very claim objects it was built from, so it is only
+        # reused for the same claim list that the last merge produced.
+        entry = self.claim_indexes.get(topic)
+        if entry is None or entry[0] is not claims:
+            entry = self.claim_indexes[topic] = (claims, ClaimIndex.from_claims(claims))
+        return entry[1]
+    
+    def _fallback_strategy(self):
+        return {'approach': 'incremental', 'reasoning': 'Fallback due to error', 'estimated_quality_impact': 'medium'}
+    
+    def _budget_strategy(self):
+        return {'approach': 'incremental', 'reasoning': 'Fallback: research budget exhausted', 'estimated_quality_impact': 'medium'}
     
-    def _similar(self, text1, text2):
-        return text1[:50].lower() == text2[:50].lower()
+    def get_metrics(self):
+        metrics = {**self.metrics, **get_metrics_registry().snapshot()}
+        metrics['score_cache'] = self.credibility.get_cache_stats()
+        metrics['reconciliation'] = dict(self.reconciler.stats)
+        if isinstance(self.llm, CachedLLM):
+            metrics['llm_cache'] = self.llm.stats()
+        if hasattr(self.llm, 'pool_stats'):
+            metrics['llm_pool'] = self.llm.pool_stats()
+        if hasattr(self.llm, 'hedge_stats'):
+            metrics['hedging'] = self.llm.hedge_stats()
+        metrics['concurrency'] = limiter_stats()
+        return metrics
+    
+    def metrics_text(self):
+        return get_metrics_registry().to_openmetrics()
     
     def _calc_avg(self, claims):
         valid = [c for c in claims if c['action'] != 'EXCLUDE']
         return sum(c['credibility_score'] for c in valid) / len(valid) if valid else 0
     
-    def _generate_report(self, topic, claims, sources):
+    def _generate_report(self, topic, claims, sources, metrics, previous_sections=None, update=False):
+        with timed('report'), call_site('report'):
+            if self._sectioned_report(update):
+                report, sections, metrics['report_sections'] = self.reports.build(topic, claims, sources, previous_sections)
+                return report, sections
+            result = self.llm.invoke(self._report_prompt(topic, claims))
+            return result.content, {}
+    
+    async def _agenerate_report(self, topic, claims, sources, metrics, previous_sections=None, update=False):
+        with timed('report'), call_site('report'):
+            if self._sectioned_report(update):
+                report, sections, metrics['report_sections'] = await self.reports.abuild(topic, claims, sources, previous_sections)
+                return report, sections
+            if not self._presectioned_report(update):
+                result = await self.llm.ainvoke(self._report_prompt(topic, claims))
+                return result.content, {}
+            result, (_, sections, metrics['report_sections']) = await asyncio.gather(
+                self.llm.ainvoke(self._report_prompt(topic, claims)),
+                self.reports.abuild(topic, claims, sources)
+            )
+            return result.content, sections
+    
+    def _stream_report(self, topic, claims, sources, metrics):
+        with timed('report'), call_site('report'):
+            if self._sectioned_report(False):
+                builder = self.reports.stream_build(topic, claims, sources)
+                try:
+                    while True:
+                        yield {'type': 'report_token', 'text': next(builder)}
+                except StopIteration as done:
+                    report, sections, metrics['report_sections'] = done.value
+                    return report, sections
+            
+            if not self._presectioned_report(False):
+                tokens = []
+                for chunk in self.llm.stream(self._report_prompt(topic, claims)):
+                    tokens.append(chunk.content)
+                    yield {'type': 'report_token', 'text': chunk.content}
+                return "".join(tokens), {}
+            
+            tokens = []
+            with ContextThreadPoolExecutor(max_workers=1) as executor:
+                sectioning = executor.submit(self.reports.build, topic, claims, sources)
+                for chunk in self.llm.stream(self._report_prompt(topic, claims)):
+                    tokens.append(chunk.content)
+                    yield {'type': 'report_token', 'text': chunk.content}
+                _, sections, metrics['report_sections'] = sectioning.result()
+            return "".join(tokens), sections
+    
+    def _sectioned_report(self, update):
+        # A new research gets one synthesized report; updates rebuild it from
+        # per-source sections so unchanged sources are not rewritten. Without
+        # budget for the LLM report, local per-source sections stand in.
+        return (update and PERFORMANCE_CONFIG['incremental_report']) or not budget_allows('report')
+    
+    def _presectioned_report(self, update):
+        # Alongside its synthesized report, a new research writes and stores the
+        # per-source sections, so the first update already reuses unchanged ones.
+        return PERFORMANCE_CONFIG['incremental_report'] and not update
+    
+    def _reusable_sections(self, topic, strategy):
+        if strategy.get('approach') == 'regenerate':
+            return None
+        return (self._stored_result(topic) or {}).get('report_sections')
+    
+    def _report_prompt(self, topic, claims):
         high = [c for c in claims if c['credibility_score'] >= CREDIBILITY_PARAMS['thresholds']['high']]
         medium = [c for c in claims if CREDIBILITY_PARAMS['thresholds']['medium'] <= c['credibility_score'] < CREDIBILITY_PARAMS['thresholds']['high']]
         
-        prompt = REPORT_GENERATION_PROMPT.format(
+        return REPORT_GENERATION_PROMPT.format(
             topic=topic,
             high_credibility_claims="\n".join([
                 f"- {c['text']} (Score: {c['credibility_score']:.1f}, Source: {c['source_type']}, Source URL: {c['source']}, Reason: {'; '.join(c['score_reasoning'])}, Decision: {c['action']} because {c['action_reasoning']})"
@@ -185,9 +595,6 @@ class ResearchAgent:
                 for c in medium[:15]
             ])
         )
-        
-        result = self.llm.invoke(prompt)
-        return result.content
     
     def _format_sources_analyzed(self, sources, claims):
         source_summary = []
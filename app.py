@@ -22,6 +22,8 @@ def main():
         st.session_state.research_result = None
     if 'update_result' not in st.session_state:
         st.session_state.update_result = None
+    if 'research_topic' not in st.session_state:
+        st.session_state.research_topic = None
 
     st.header("🤖 Select Your LLM")
     models, model_options = display_llm_menu(st.session_state.config)
@@ -40,12 +42,34 @@ def main():
         topic = st.text_input("Enter research topic:", key="topic_input", placeholder="e.g., What is the meaning of life")
         
         if st.button("🔍 Start Research") and topic:
-            with st.spinner("🔎 Researching..."):
-                try:
-                    st.session_state.research_result = st.session_state.agent.research(topic)
-                    st.success(f"✅ Research complete for: {topic}")
-                except Exception as e:
-                    st.error(f"❌ Research failed: {str(e)}")
+            progress = st.status("🔎 Researching...", expanded=True)
+            live_report = st.empty()
+            report_text = ""
+            scored_count = 0
+            try:
+                for event in st.session_state.agent.research_stream(topic):
+                    if event['type'] == 'sources':
+                        progress.write(f"📚 Found {event['count']} sources")
+                    elif event['type'] == 'claims_extracted':
+                        progress.write(f"📝 {event['count']} claims from {event['source']} ({event['total']} total)")
+                    elif event['type'] == 'claim_scored':
+                        scored_count += 1
+                        progress.update(label=f"🎯 Scored {scored_count} claims...")
+                    elif event['type'] == 'claims_scored':
+                        progress.write(f"🎯 Scored {event['count']} claims: {event['included']} included, {event['warned']} to verify, {event['excluded']} excluded")
+                        progress.update(label="✍️ Writing report...")
+                    elif event['type'] == 'report_token':
+                        report_text += event['text']
+                        live_report.markdown(report_text + "▌")
+                    elif event['type'] == 'result':
+                        st.session_state.research_result = event['result']
+                st.session_state.research_topic = topic
+                progress.update(label=f"✅ Research complete for: {topic}", state="complete", expanded=False)
+            except Exception as e:
+                progress.update(label="❌ Research failed", state="error")
+                st.error(f"❌ Research failed: {str(e)}")
+            finally:
+                live_report.empty()
 
         if st.session_state.research_result:
             st.header("📊 Research Report")
@@ -55,6 +79,10 @@ def main():
             st.write(f"📚 **Sources Analyzed**: {st.session_state.research_result['sources_count']}")
             st.markdown(f"**Source Details**:\n{st.session_state.research_result['sources_analyzed']}")
             st.write(f"⏱️ **Processing Time**: {st.session_state.research_result['time_seconds']:.1f}s")
+            budget = st.session_state.research_result.get('budget')
+            if budget:
+                st.write(f"💸 **LLM Usage**: {budget['total_tokens']:,} tokens in {budget['calls']} calls"
+                         + (f" (budget: skipped {', '.join(s.replace('_', ' ') for s in budget['degraded'])})" if budget['degraded'] else ""))
             st.write("---")
 
             if st.button("💾 Download Report"):
@@ -70,15 +98,18 @@ def main():
                     )
 
         st.header("📂 Update Research")
+        stored_topics = st.session_state.agent.store.topics()
+        default_index = stored_topics.index(st.session_state.research_topic) if st.session_state.research_topic in stored_topics else 0
+        update_topic = st.selectbox("Topic to update:", stored_topics, index=default_index)
         uploaded_file = st.file_uploader("Upload a file to update research:", type=["txt", "pdf", "docx"])
-        if uploaded_file and st.button("🔄 Process Update"):
+        if uploaded_file and update_topic and st.button("🔄 Process Update"):
             with st.spinner("🔄 Processing update..."):
                 try:
                     file_extension = uploaded_file.name.split('.')[-1]
                     temp_path = f"temp_update.{file_extension}"
                     with open(temp_path, "wb") as f:
                         f.write(uploaded_file.read())
-                    st.session_state.update_result = st.session_state.agent.update_research(temp_path)
+                    st.session_state.update_result = st.session_state.agent.update_research(update_topic, temp_path)
                     st.success("✅ Update complete!")
                 except Exception as e:
                     st.error(f"❌ Update failed: {str(e)}")
@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from instrumentation import get_metrics_registry
+from adaptive_limits import limiter_stats
+from config import (
+    BUDGET_CONFIG, DOCUMENT_CONFIG, FETCH_CONFIG, HEDGING_CONFIG, LLM_CONFIGS, PERFORMANCE_CONFIG, RESEARCH_STORE_CONFIG, SEARCH_CONFIG
+)
+
+SOURCE_DOMAINS = (
+    'www.nature.com', 'arxiv.org', 'www.cdc.gov', 'www.reuters.com',
+    'www.bbc.com', 'example.medium.com', 'www.acme-analytics.com', 'blog.vendor.io'
+)
+SUBJECTS = (
+    'Battery storage', 'Remote work', 'Urban cycling', 'Gene therapy', 'Solar adoption', 'Crop yields',
+    'Data centre demand', 'Telehealth use', 'Microplastic levels', 'Rail freight', 'Coral cover', 'Vaccine uptake'
+)
+VERBS = ('increased', 'decreased', 'doubled', 'stabilised', 'fell', 'rose')
+SETTINGS = (
+    'across European cities', 'in rural hospitals', 'among small firms', 'in coastal regions',
+    'for low-income households', 'in national surveys', 'across university campuses', 'in pilot programmes'
+)
+BACKERS = (
+    'a peer-reviewed study', 'government statistics', 'an industry white paper', 'a longitudinal survey',
+    'independent auditors', 'a company press release', 'a meta-analysis', 'field measurements'
+)
+METRICS = ('operation', 'runs', 'throughput_per_s', 'p50_s', 'p99_s', 'llm_calls_per_topic', 'tokens_per_topic', 'peak_memory_mb')
+
+def claim_sentence(rng, topic_id, n):
+    return (
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} by {rng.randint(2, 95)}% {rng.choice(SETTINGS)} "
+        f"between {2000 + n % 20} and {2021 + topic_id % 4} according to {rng.choice(BACKERS)} (ref {topic_id}-{n})."
+    )
+
+def generate_corpus(topics=5, sources_per_topic=8, claims_per_source=6, update_claims=24,
+                    reinforce_ratio=0.3, conflict_ratio=0.2, seed=0):
+    # Every topic gets search results whose snippets are built from claim
+    # sentences, plus an update document that repeats some of those claims,
+    # contradicts others by changing their figures, and adds new ones.
+    rng = random.Random(seed)
+    corpus = []
+    for t in range(topics):
+        counter = iter(range(10 ** 9))
+        sources = []
+        for s in range(sources_per_topic):
+            sentences = [claim_sentence(rng, t, next(counter)) for _ in range(claims_per_source)]
+            domain = SOURCE_DOMAINS[(t + s) % len(SOURCE_DOMAINS)]
+            sources.append({
+                'title': f"Benchmark topic {t} source {s}",
+                'link': f"https://{domain}/topic-{t}/source-{s}",
+                'snippet': " ".join(sentences),
+                'sentences': sentences
+            })
+        
+        existing = [sentence for source in sources for sentence in source['sentences']]
+        reinforced = rng.sample(existing, min(len(existing), int(update_claims * reinforce_ratio)))
+        conflicted = rng.sample(existing, min(len(existing), int(update_claims * conflict_ratio)))
+        update = reinforced + [_contradict(rng, sentence) for sentence in conflicted]
+        update += [claim_sentence(rng, t, next(counter)) for _ in range(max(0, update_claims - len(update)))]
+        rng.shuffle(update)
+        corpus.append({'topic': f"Benchmark topic {t}: measured trends", 'sources': sources, 'update': " ".join(update)})
+    return corpus
+
+def _contradict(rng, sentence):
+    head, tail = sentence.split('% ', 1)
+    figure = int(head.rsplit(' ', 1)[1])
+    return f"{head.rsplit(' ', 1)[0]} {(figure + rng.randint(5, 40)) % 100 or 1}% {tail}"
+
+# Local Serper stand-in: answers search POSTs with generated organic results,
+# optionally failing the first requests with a given status.
+class StubSerperServer:
+    def __init__(self, results_per_query=5, fail_first=0, fail_status=429, latency=0.0):
+        self.results_per_query = results_per_query
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def organic_results(self, query, num):
+        return [{
+            'title': f"Result {i} for {query}",
+            'link': f"https://example{i}.com/{i}",
+            'snippet': f"Snippet {i} about {query}."
+        } for i in range(min(num, self.results_per_query))]
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.requests <= stub.fail_first
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failing:
+                    self.send_response(stub.fail_status)
+                    self.end_headers()
+                    return
+                payload = json.dumps({'organic': stub.organic_results(body.get('q', ''), body.get('num', 10))}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+# Serves the corpus: topic queries get that topic's sources, evidence queries
+# (a claim's first 100 characters) get the other sources of the claim's topic.
+class CorpusSerperServer(StubSerperServer):
+    def __init__(self, corpus, **kwargs):
+        super().__init__(**kwargs)
+        self.by_topic = {}
+        self.by_claim = {}
+        for entry in corpus:
+            results = [{'title': s['title'], 'link': s['link'], 'snippet': s['snippet']} for s in entry['sources']]
+            self.by_topic[entry['topic']] = results
+            for source in entry['sources']:
+                for sentence in source['sentences']:
+                    self.by_claim[sentence.rstrip('.')[:100]] = results
+    
+    def organic_results(self, query, num):
+        results = self.by_topic.get(query) or self.by_claim.get(query)
+        if results is None:
+            return super().organic_results(query, num)
+        return results[:num]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+def configure(args, workdir, server):
+    # Everything that would make runs depend on earlier runs or on the network is
+    # pointed at the scratch directory and the local Serper server.
+    os.environ['SERPER_API_KEY'] = 'benchmark'
+    SEARCH_CONFIG['base_url'] = server.url
+    SEARCH_CONFIG['cache']['enabled'] = False
+    SEARCH_CONFIG['rate_limit_per_second'] = args.search_rate
+    SEARCH_CONFIG['burst'] = args.search_rate
+    # Corpus results link to real domains; the snippets are the page text.
+    FETCH_CONFIG['enabled'] = False
+    PERFORMANCE_CONFIG['llm_cache']['enabled'] = False
+    PERFORMANCE_CONFIG['batch_final_action'] = not args.per_claim_final_action
+    HEDGING_CONFIG['enabled'] = args.hedging
+    BUDGET_CONFIG.update(max_tokens=args.max_tokens, max_calls=args.max_calls, max_seconds=args.max_seconds)
+    RESEARCH_STORE_CONFIG['path'] = os.path.join(workdir, 'research.sqlite3')
+    DOCUMENT_CONFIG['text_cache_dir'] = os.path.join(workdir, 'documents')
+    LLM_CONFIGS['fake'].update(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+
+def measure(operation, calls, args):
+    registry = get_metrics_registry()
+    registry.reset()
+    tracemalloc.reset_peak()
+    latencies = []
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    
+    start = time.perf_counter()
+    with output:
+        if args.mode == 'async':
+            async def run_all():
+                for call in calls:
+                    began = time.perf_counter()
+                    await call()
+                    latencies.append(time.perf_counter() - began)
+            asyncio.run(run_all())
+        else:
+            for call in calls:
+                began = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - began)
+    wall = time.perf_counter() - start
+    
+    snapshot = registry.snapshot()
+    sites = snapshot['llm_calls']
+    return {
+        'operation': operation,
+        'runs': len(latencies),
+        'wall_seconds': wall,
+        'throughput_per_s': len(latencies) / wall if wall else 0,
+        'p50_s': percentile(latencies, 50),
+        'p99_s': percentile(latencies, 99),
+        'mean_s': sum(latencies) / len(latencies) if latencies else 0,
+        'llm_calls_per_topic': sum(e['count'] for e in sites.values()) / max(1, len(latencies)),
+        'tokens_per_topic': sum(e['prompt_tokens'] + e['completion_tokens'] for e in sites.values()) / max(1, len(latencies)),
+        'llm_calls_by_site': {site: e['count'] for site, e in sites.items()},
+        'llm_errors': sum(e['errors'] for e in sites.values()),
+        'llm_fallbacks': sum(e['fallbacks'] for e in sites.values()),
+        'stage_seconds': {stage: round(e['total_seconds'], 4) for stage, e in snapshot['stages'].items()},
+        'peak_memory_mb': tracemalloc.get_traced_memory()[1] / 2 ** 20
+    }
+
+def run_benchmark(args):
+    from agent import ResearchAgent
+    
+    corpus = generate_corpus(
+        topics=args.topics,
+        sources_per_topic=args.sources,
+        claims_per_source=args.claims,
+        update_claims=args.update_claims,
+        seed=args.seed
+    )
+    with tempfile.TemporaryDirectory(prefix='research-bench-') as workdir, CorpusSerperServer(corpus) as server:
+        configure(args, workdir, server)
+        update_paths = []
+        for i, entry in enumerate(corpus):
+            path = os.path.join(workdir, f"update_{i}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(entry['update'])
+            update_paths.append(path)
+        
+        tracemalloc.start()
+        try:
+            agent = ResearchAgent('fake')
+            topics = [entry['topic'] for entry in corpus]
+            if args.mode == 'async':
+                research_calls = [lambda topic=topic: agent.aresearch(topic) for topic in topics]
+                update_calls = [lambda topic=topic, path=path: agent.aupdate_research(topic, path) for topic, path in zip(topics, update_paths)]
+            else:
+                research_calls = [lambda topic=topic: agent.research(topic) for topic in topics]
+                update_calls = [lambda topic=topic, path=path: agent.update_research(topic, path) for topic, path in zip(topics, update_paths)]
+            results = [measure('research', research_calls, args), measure('update_research', update_calls, args)]
+            hedging = agent.llm.hedge_stats() if args.hedging else {}
+        finally:
+            tracemalloc.stop()
+    
+    return {
+        'settings': {
+            'mode': args.mode, 'topics': args.topics, 'sources': args.sources, 'claims': args.claims,
+            'update_claims': args.update_claims, 'latency': args.latency, 'jitter': args.jitter,
+            'failure_rate': args.failure_rate, 'malformed_rate': args.malformed_rate, 'seed': args.seed,
+            'batch_final_action': not args.per_claim_final_action, 'hedging': args.hedging,
+            'budget': {'tokens': args.max_tokens, 'calls': args.max_calls, 'seconds': args.max_seconds}
+        },
+        'results': results,
+        'concurrency': limiter_stats(),
+        'hedging': hedging
+    }
+
+def compare(report, baseline, tolerance):
+    # Lower is better for everything but throughput; a metric regresses when it
+    # moves the wrong way by more than the tolerance.
+    regressions = []
+    previous = {r['operation']: r for r in baseline['results']}
+    for result in report['results']:
+        before = previous.get(result['operation'])
+        if not before:
+            continue
+        for metric in ('p50_s', 'p99_s', 'llm_calls_per_topic', 'tokens_per_topic', 'peak_memory_mb'):
+            if before.get(metric) and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{result['operation']} {metric}: {before[metric]:.4f} -> {result[metric]:.4f}")
+        if before['throughput_per_s'] and result['throughput_per_s'] < before['throughput_per_s'] * (1 - tolerance):
+            regressions.append(f"{result['operation']} throughput_per_s: {before['throughput_per_s']:.4f} -> {result['throughput_per_s']:.4f}")
+    return regressions
+
+def print_report(report):
+    print(f"⚙️ Settings: {json.dumps(report['settings'])}")
+    print(" | ".join(f"{m:>20}" for m in METRICS))
+    for result in report['results']:
+        print(" | ".join(f"{result[m]:>20.4f}" if isinstance(result[m], float) else f"{result[m]:>20}" for m in METRICS))
+    for result in report['results']:
+        print(f"🤖 {result['operation']} LLM calls by site: {json.dumps(result['llm_calls_by_site'], sort_keys=True)}")
+    for name, limiter in report.get('concurrency', {}).items():
+        print(f"🚦 {name}: limit {limiter['limit']} (range {limiter['low_limit']}-{limiter['peak_limit']}), "
+              f"{limiter['overloads']} overloads, {limiter['retries']} retries, {limiter['waits']} waits")
+    for site, entry in report.get('hedging', {}).items():
+        if entry['hedged']:
+            print(f"🪁 {site}: {entry['hedged']}/{entry['calls']} calls hedged, {entry['hedge_wins']} hedges won")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for research and update_research using a scripted LLM and a local Serper server.")
+    parser.add_argument('--topics', type=int, default=5)
+    parser.add_argument('--sources', type=int, default=8, help="Search results per topic")
+    parser.add_argument('--claims', type=int, default=6, help="Claims per source")
+    parser.add_argument('--update-claims', type=int, default=24, help="Claims in each update document")
+    parser.add_argument('--latency', type=float, default=0.02, help="Fake LLM latency per call in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Extra latency of up to this many seconds per call")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of LLM calls that raise")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Share of LLM calls that return unparseable text")
+    parser.add_argument('--search-rate', type=float, default=1000.0, help="Serper requests per second allowed by the rate limiter")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--per-claim-final-action', action='store_true', help="Disable batched final actions")
+    parser.add_argument('--hedging', action='store_true', help="Hedge slow per-claim LLM calls")
+    parser.add_argument('--max-tokens', type=int, default=0, help="Per-research token budget (0 = unlimited)")
+    parser.add_argument('--max-calls', type=int, default=0, help="Per-research LLM call budget (0 = unlimited)")
+    parser.add_argument('--max-seconds', type=float, default=0, help="Per-research wall-clock budget (0 = unlimited)")
+    parser.add_argument('--output', help="Write the results as JSON to this path")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression against the baseline")
+    parser.add_argument('--verbose', action='store_true', help="Show the agent's progress output")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Performance regressions:")
+            for regression in regressions:
+                print(f"    {regression}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from config import BUDGET_CONFIG
+
+CHARS_PER_TOKEN = 4
+DEGRADATION_STEPS = (
+    'bias_analysis', 'validation', 'final_action', 'llm_decision',
+    'update_strategy', 'reconciliation', 'extraction', 'report'
+)
+
+# The budget of the research a call belongs to travels with the context, like
+# the call site label; executor threads get a copy of the submitting context.
+_budget = contextvars.ContextVar('research_budget', default=None)
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_tokens(text, field):
+    # Cuts a prompt field to its size in BUDGET_CONFIG['prompt_tokens'].
+    return text[:BUDGET_CONFIG['prompt_tokens'][field] * CHARS_PER_TOKEN]
+
+def usage_tokens(message, prompt_chars, response_chars):
+    # Providers that report usage are taken at their word; otherwise the
+    # character counts are converted.
+    usage = getattr(message, 'usage_metadata', None) or {}
+    prompt_tokens = usage.get('input_tokens') or (prompt_chars // CHARS_PER_TOKEN + 1 if prompt_chars else 0)
+    completion_tokens = usage.get('output_tokens') or (response_chars // CHARS_PER_TOKEN + 1 if response_chars else 0)
+    return prompt_tokens, completion_tokens
+
+# Tokens, LLM calls and wall-clock time one research may spend. As the largest
+# share used crosses each step's degrade_at mark the step is dropped: bias
+# analysis first, then validation, then LLM final actions (the score's fallback
+# action is used instead), then LLM scoring decisions; extraction and the report
+# fall back to their heuristic versions once the budget is spent.
+#
+# A step allowed through counts as a call straight away, so calls already in
+# flight are seen by the next check and concurrent workers cannot all pass it.
+class ResearchBudget:
+    def __init__(self, max_tokens=None, max_calls=None, max_seconds=None, settings=None):
+        self.settings = settings or BUDGET_CONFIG
+        self.max_tokens = max_tokens or None
+        self.max_calls = max_calls or None
+        self.max_seconds = max_seconds or None
+        self.started = time.monotonic()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.admitted = 0
+        self.degraded = []
+        self.skipped = {step: 0 for step in DEGRADATION_STEPS}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, settings=None):
+        settings = settings or BUDGET_CONFIG
+        return cls(settings['max_tokens'], settings['max_calls'], settings['max_seconds'], settings)
+    
+    def charge(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+    
+    def used(self):
+        with self._lock:
+            return self._used()
+    
+    def _used(self):
+        shares = [0.0]
+        if self.max_tokens:
+            shares.append((self.prompt_tokens + self.completion_tokens) / self.max_tokens)
+        if self.max_calls:
+            shares.append(max(self.calls, self.admitted) / self.max_calls)
+        if self.max_seconds:
+            shares.append((time.monotonic() - self.started) / self.max_seconds)
+        return max(shares)
+    
+    def allows(self, step):
+        with self._lock:
+            used = self._used()
+            if used < self.settings['degrade_at'][step]:
+                self.admitted += 1
+                return True
+            self.skipped[step] += 1
+            first = step not in self.degraded
+            if first:
+                self.degraded.append(step)
+        if first:
+            print(f"💸 Research budget {used:.0%} used - skipping {step.replace('_', ' ')}")
+        return False
+    
+    def snapshot(self):
+        used = self.used()
+        with self._lock:
+            return {
+                'limits': {'tokens': self.max_tokens, 'calls': self.max_calls, 'seconds': self.max_seconds},
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': self.prompt_tokens + self.completion_tokens,
+                'calls': self.calls,
+                'seconds': time.monotonic() - self.started,
+                'used': used,
+                'degraded': list(self.degraded),
+                'skipped': dict(self.skipped)
+            }
+
+def current_budget():
+    return _budget.get()
+
+def budget_allows(step):
+    budget = _budget.get()
+    return budget is None or budget.allows(step)
+
+@contextmanager
+def budget_scope(budget):
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+def within_budget(budget, generator):
+    # Drives a generator with the budget set only while it runs, so a caller
+    # consuming the events never has it in its own context.
+    try:
+        while True:
+            token = _budget.set(budget)
+            try:
+                event = next(generator)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                _budget.reset(token)
+            yield event
+    finally:
+        generator.close()
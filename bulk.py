@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from config import BULK_CONFIG
+
+def load_topics(path):
+    # JSONL lines may carry a 'topic' (or, like a request backlog, a 'title') and
+    # an optional id; any other file is read as one topic per line.
+    items = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                record = json.loads(line)
+                topic = record.get('topic') or record.get('title')
+                items.append({'id': str(record.get('id') or record.get('request_id') or topic), 'topic': topic})
+            else:
+                items.append({'id': line, 'topic': line})
+    return items
+
+def completed_ids(output_path):
+    done = set()
+    if output_path and os.path.exists(output_path):
+        with open(output_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('status') == 'complete':
+                    done.add(record['id'])
+    return done
+
+# Runs many topics on one agent: topics share its LLM (and the provider's
+# concurrency limit), the Serper client's rate limiter, the score cache and the
+# per-source extraction memo, so a page found by several topics is extracted
+# once. Each topic still checkpoints in the research store, and finished topics
+# are appended to the output file as soon as they complete.
+class BulkResearchRunner:
+    def __init__(self, agent, max_concurrent_topics=None, include_claims=False):
+        self.agent = agent
+        self.max_concurrent_topics = max_concurrent_topics or BULK_CONFIG['max_concurrent_topics']
+        self.include_claims = include_claims
+        self.stats = {'topics': 0, 'completed': 0, 'failed': 0, 'skipped': 0, 'shared_extractions': 0}
+    
+    def run(self, items, output_path=None, resume=True):
+        return asyncio.run(self.arun(items, output_path, resume))
+    
+    async def arun(self, items, output_path=None, resume=True):
+        start = time.time()
+        done = completed_ids(output_path) if resume else set()
+        pending = [self._item(item) for item in items]
+        self.stats['skipped'] = sum(1 for item in pending if item['id'] in done)
+        pending = [item for item in pending if item['id'] not in done]
+        self.stats['topics'] = len(pending)
+        shared_before = self.agent.metrics.get('shared_extractions', 0)
+        
+        print(f"📦 Researching {len(pending)} topics ({self.stats['skipped']} already done), {self.max_concurrent_topics} at a time")
+        semaphore = asyncio.Semaphore(self.max_concurrent_topics)
+        output = open(output_path, 'a', encoding='utf-8') if output_path else None
+        results = []
+        try:
+            for finished in asyncio.as_completed([self._research(item, semaphore) for item in pending]):
+                record = await finished
+                results.append(record)
+                self.stats['completed' if record['status'] == 'complete' else 'failed'] += 1
+                if output:
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                print(f"    {'✅' if record['status'] == 'complete' else '❌'} [{len(results)}/{len(pending)}] {record['topic']}")
+        finally:
+            if output:
+                output.close()
+        
+        self.stats['shared_extractions'] = self.agent.metrics.get('shared_extractions', 0) - shared_before
+        self.stats['time_seconds'] = time.time() - start
+        self.stats['topics_per_minute'] = 60 * len(results) / self.stats['time_seconds'] if results else 0
+        return results
+    
+    async def _research(self, item, semaphore):
+        async with semaphore:
+            try:
+                result = await self.agent.aresearch(item['topic'])
+            except Exception as e:
+                return {'id': item['id'], 'topic': item['topic'], 'status': 'failed', 'error': str(e)}
+        return self._record(item, result)
+    
+    def _item(self, item):
+        if isinstance(item, str):
+            return {'id': item, 'topic': item}
+        return {'id': str(item.get('id') or item['topic']), 'topic': item['topic']}
+    
+    def _record(self, item, result):
+        record = {
+            'id': item['id'],
+            'topic': item['topic'],
+            'status': 'complete',
+            'overall_credibility': result['overall_credibility'],
+            'sources_count': result['sources_count'],
+            'claims_count': len(result['claims']),
+            'time_seconds': result['time_seconds'],
+            'summary': result['summary'],
+            'report': result['report'],
+            'budget': result.get('budget')
+        }
+        if self.include_claims:
+            record['claims'] = result['claims']
+        return record
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Research many topics in one run and stream the results to JSONL.")
+    parser.add_argument('topics', nargs='*', help="Topics to research")
+    parser.add_argument('--file', help="JSONL file with a 'topic' or 'title' per line, or a text file with one topic per line")
+    parser.add_argument('--output', default='bulk_results.jsonl', help="JSONL file results are appended to")
+    parser.add_argument('--provider', default='gemini', help="LLM provider (gemini, groq or fake)")
+    parser.add_argument('--model', help="Model name for the provider")
+    parser.add_argument('--concurrency', type=int, help="Topics researched at the same time")
+    parser.add_argument('--include-claims', action='store_true', help="Write scored claims with each result")
+    parser.add_argument('--no-resume', action='store_true', help="Re-run topics already completed in the output file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    from agent import ResearchAgent
+    
+    load_dotenv()
+    args = parse_args(argv)
+    items = [{'id': topic, 'topic': topic} for topic in args.topics]
+    if args.file:
+        items += load_topics(args.file)
+    if not items:
+        print("❌ No topics given")
+        return 1
+    
+    runner = BulkResearchRunner(ResearchAgent(args.provider, args.model), args.concurrency, args.include_claims)
+    runner.run(items, args.output, resume=not args.no_resume)
+    stats = runner.stats
+    print(f"📊 {stats['completed']} complete, {stats['failed']} failed, {stats['skipped']} skipped in {stats['time_seconds']:.1f}s "
+          f"({stats['topics_per_minute']:.1f} topics/min, {stats['shared_extractions']} shared source extractions)")
+    print(f"💾 Results in {args.output}")
+    return 1 if stats['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+import time
+import json
+
+class PersistentCache:
+    def __init__(self, path, namespace, ttl, max_entries):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'expirations': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT, key TEXT, value TEXT, created REAL, accessed REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (namespace, accessed)")
+    
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?", (now, self.namespace, key)
+            )
+            self.stats['hits'] += 1
+            return json.loads(row[0])
+    
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now, now)
+            )
+            size = self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+            if size > self.max_entries:
+                overflow = size - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM cache WHERE namespace = ? ORDER BY accessed LIMIT ?)",
+                    (self.namespace, self.namespace, overflow)
+                )
+                self.stats['evictions'] += overflow
+    
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+    
+    def purge_expired(self):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created < ?", (self.namespace, time.time() - self.ttl)
+            )
+            self.stats['expirations'] += cursor.rowcount
+    
+    def size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+    
+    def get_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': self.size(),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0
+        }
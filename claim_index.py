@@ -0,0 +1,133 @@
+import hashlib
+import random
+import re
+from functools import lru_cache
+from heuristics import TOKEN_PATTERN
+from documents import claim_key
+from config import CREDIBILITY_PARAMS
+
+STOP_TERMS = frozenset([
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'by', 'with', 'from', 'and', 'or',
+    'as', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'it', 'its', 'this', 'that', 'these',
+    'those', 'has', 'have', 'had', 'which', 'who', 'than', 'then', 'also', 'into', 'about', 's'
+])
+NEGATION_TERMS = frozenset(['not', 'no', 'never', 'none', 'cannot', 'without', 'neither', 'nor', 't'])
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+def claim_terms(text):
+    return frozenset(t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_TERMS)
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def claims_conflict(text1, text2):
+    # Near-duplicate wording with a flipped negation or different figures reads as a
+    # contradiction ("X reduces costs by 20%" vs "X does not reduce costs" / "by 45%").
+    if bool(claim_terms(text1) & NEGATION_TERMS) != bool(claim_terms(text2) & NEGATION_TERMS):
+        return True
+    numbers1, numbers2 = set(NUMBER_PATTERN.findall(text1)), set(NUMBER_PATTERN.findall(text2))
+    return bool(numbers1 and numbers2 and numbers1 != numbers2)
+
+@lru_cache(maxsize=65536)
+def _term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'big')
+
+# MinHash/LSH index over claim term sets. Candidates come from LSH band buckets and
+# are confirmed with the exact Jaccard similarity, so a lookup only touches claims
+# that share a band instead of the whole corpus.
+class ClaimIndex:
+    def __init__(self, num_perm=None, bands=None, threshold=None):
+        params = CREDIBILITY_PARAMS['claim_index']
+        self.num_perm = num_perm or params['num_perm']
+        self.bands = bands or params['bands']
+        self.rows = self.num_perm // self.bands
+        self.threshold = threshold or params['duplicate_threshold']
+        # XOR with a fixed random mask permutes the 64-bit term hashes far more cheaply
+        # than the usual (a * h + b) % p family.
+        rng = random.Random(self.num_perm)
+        self._masks = [rng.getrandbits(64) for _ in range(self.num_perm)]
+        self.claims = {}
+        self.terms = {}
+        self.band_keys = {}
+        self.buckets = {}
+    
+    @classmethod
+    def from_claims(cls, claims, **kwargs):
+        index = cls(**kwargs)
+        for claim in claims:
+            terms = claim_terms(claim['text'])
+            band_keys = index._band_keys(terms)
+            found = index._matches(terms, band_keys, index.threshold)
+            if not any(not claims_conflict(match['text'], claim['text']) for match, _ in found):
+                index._insert(claim_key(claim), claim, terms, band_keys)
+        return index
+    
+    def __len__(self):
+        return len(self.claims)
+    
+    def __contains__(self, claim):
+        return self.claims.get(claim_key(claim)) is claim
+    
+    def add(self, claim):
+        key = claim_key(claim)
+        if key in self.claims:
+            self.remove(self.claims[key])
+        terms = claim_terms(claim['text'])
+        self._insert(key, claim, terms, self._band_keys(terms))
+        return key
+    
+    def _insert(self, key, claim, terms, band_keys):
+        self.claims[key] = claim
+        self.terms[key] = terms
+        self.band_keys[key] = band_keys
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, set()).add(key)
+    
+    def remove(self, claim):
+        key = claim_key(claim)
+        if self.claims.get(key) is not claim:
+            return
+        del self.claims[key]
+        del self.terms[key]
+        for band_key in self.band_keys.pop(key):
+            bucket = self.buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[band_key]
+    
+    def matches(self, text, threshold=None):
+        terms = claim_terms(text)
+        return self._matches(terms, self._band_keys(terms), self.threshold if threshold is None else threshold)
+    
+    def best_match(self, text, threshold=None):
+        found = self.matches(text, threshold)
+        return found[0][0] if found else None
+    
+    def duplicate_of(self, text):
+        # Close wording that still conflicts is a separate claim, not a duplicate.
+        for match, _ in self.matches(text):
+            if not claims_conflict(match['text'], text):
+                return match
+        return None
+    
+    def _matches(self, terms, band_keys, threshold):
+        candidates = set()
+        for band_key in band_keys:
+            candidates |= self.buckets.get(band_key, set())
+        
+        found = []
+        for key in candidates:
+            similarity = jaccard(terms, self.terms[key])
+            if similarity >= threshold:
+                found.append((self.claims[key], similarity))
+        found.sort(key=lambda item: item[1], reverse=True)
+        return found
+    
+    def _band_keys(self, terms):
+        if not terms:
+            return ()
+        hashes = [_term_hash(t) for t in terms]
+        signature = [min([h ^ mask for h in hashes]) for mask in self._masks]
+        return tuple((band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands))
@@ -4,9 +4,9 @@ from dotenv import load_dotenv
 def setup_environment():
     load_dotenv()
     config = {
-        'gemini_key': os.getenv('GOOGLE_API_KEY'),
+        'gemini_key': (provider_keys('gemini') or [None])[0],
         'serper_key': os.getenv('SERPER_API_KEY'),
-        'groq_key': os.getenv('GROQ_API_KEY'),
+        'groq_key': (provider_keys('groq') or [None])[0],
     }
     available_llms = []
     if config['gemini_key']:
@@ -24,32 +24,211 @@ def setup_environment():
     config['available_llms'] = available_llms
     return config
 
+def provider_keys(provider):
+    # A provider may have several keys: a comma-separated *_API_KEYS list plus the
+    # single *_API_KEY, in that order and without repeats.
+    env = LLM_CONFIGS[provider]['key_env']
+    keys = [k.strip() for k in os.getenv(f"{env}S", '').split(',') if k.strip()]
+    single = os.getenv(env)
+    if single and single not in keys:
+        keys.append(single)
+    return keys
+
 CREDIBILITY_PARAMS = {
     "thresholds": {"high": 7.5, "medium": 4.5, "low": 0.0},
     "validation_required": 4.5,
     "auto_exclude": 3.0,
     "max_claims_per_source": 12,
-    "update_merge_strategy": "highest_credibility"
+    "fast_path": {"enabled": True, "margin": 1.0},
+    "claim_index": {"num_perm": 60, "bands": 20, "duplicate_threshold": 0.6},
+    "update_merge_strategy": "highest_credibility",
+    "reconciliation": {"decisive_margin": 1.5, "batch_size": 8}
 }
 
 PERFORMANCE_CONFIG = {
     "cache_ttl": 7200,
+    "score_cache_size": 1000,
     "batch_size": 10,
     "parallel_validation": True,
     "incremental_update": True,
-    "max_concurrent_requests": 10
+    # Updates rebuild the report from per-source sections, regenerating only the
+    # sections whose claims changed; a new research is synthesized and writes
+    # the sections alongside for the first update to reuse.
+    "incremental_report": True,
+    # Thread-pool width at LLM call sites; the adaptive limiters below decide
+    # how many calls actually run at once.
+    "max_concurrent_requests": 32,
+    # Starting concurrency per provider (per API key) and for Serper.
+    "provider_concurrency": {"gemini": 10, "groq": 5, "serper": 5, "default": 5},
+    "batch_final_action": True,
+    "final_action_batch_size": 20,
+    "llm_cache": {
+        "enabled": os.getenv('LLM_CACHE_ENABLED', '1') == '1',
+        "path": os.getenv('LLM_CACHE_PATH', '.cache/llm_cache.sqlite3'),
+        "ttl": 7 * 24 * 3600,
+        "max_entries": 50000
+    }
+}
+
+ADAPTIVE_CONCURRENCY_CONFIG = {
+    # AIMD: each success adds 1/limit to the limit (about +1 per round of calls),
+    # a rate limit or timeout multiplies it by backoff, at most once per
+    # decrease_interval so one burst of 429s counts as a single signal.
+    "enabled": os.getenv('ADAPTIVE_CONCURRENCY', '1') == '1',
+    "min_limit": 1,
+    "max_limit": {"gemini": 40, "groq": 20, "serper": 20, "default": 20},
+    "backoff": 0.5,
+    "decrease_interval": 1.0
+}
+
+HEDGING_CONFIG = {
+    # A call at one of these sites still running after the site's p95 latency is
+    # re-issued and the first response wins; hedges are capped at
+    # max_hedge_ratio of the site's calls.
+    "enabled": os.getenv('LLM_HEDGING', '0') == '1',
+    "sites": ["llm_decision", "bias_analysis", "validation", "final_action"],
+    "quantile": 0.95,
+    "window": 200,
+    "min_samples": 20,
+    "min_delay": 0.25,
+    "max_hedge_ratio": 0.1
+}
+
+BUDGET_CONFIG = {
+    # Per-research limits; 0 (the default) means unlimited. Usage is always
+    # accounted, the limits only drive degradation.
+    "max_tokens": int(os.getenv('RESEARCH_MAX_TOKENS', '0')),
+    "max_calls": int(os.getenv('RESEARCH_MAX_CALLS', '0')),
+    "max_seconds": float(os.getenv('RESEARCH_MAX_SECONDS', '0')),
+    # Share of the budget used at which each step is dropped, in order. Past 1.0
+    # no LLM call is made: claims are scored and extracted heuristically and the
+    # report is assembled from local sections.
+    "degrade_at": {
+        "bias_analysis": 0.5,
+        "validation": 0.7,
+        "final_action": 0.85,
+        "llm_decision": 0.9,
+        "update_strategy": 0.9,
+        "reconciliation": 0.9,
+        "extraction": 1.0,
+        "report": 1.0
+    },
+    # Claims kept per source when extraction falls back for lack of budget.
+    "degraded_claims_per_source": 4,
+    # Prompt field sizes in tokens.
+    "prompt_tokens": {
+        "claim": 75,
+        "short_claim": 50,
+        "context": 50,
+        "bias_text": 125,
+        "evidence": 375,
+        "source_content": 750
+    }
+}
+
+PIPELINE_CONFIG = {
+    "queue_size": 64,
+    # Stages left at None call the LLM and get one worker per call the agent's
+    # limiters can admit at their ceiling (ADAPTIVE_CONCURRENCY_CONFIG['max_limit']
+    # for each key), so the limiters decide how many calls run, not the pool.
+    "workers": {"extract": 8, "score": None, "validate": None, "final_action": None},
+    "final_action_linger": 0.5
+}
+
+DOCUMENT_CONFIG = {
+    "read_block_size": 65536,
+    "chunk_tokens": 700,
+    "overlap_tokens": 80,
+    "max_concurrent_chunks": 4,
+    "text_cache_dir": os.getenv('DOCUMENT_CACHE_DIR', '.cache/documents')
+}
+
+RESEARCH_STORE_CONFIG = {
+    "path": os.getenv('RESEARCH_STORE_PATH', 'data/research.sqlite3'),
+    # Seconds a stored research result is served before the topic is researched
+    # again; 0 keeps results forever.
+    "result_ttl": float(os.getenv('RESEARCH_RESULT_TTL', str(7 * 24 * 3600)))
+}
+
+BULK_CONFIG = {
+    "max_concurrent_topics": int(os.getenv('BULK_MAX_CONCURRENT_TOPICS', '8')),
+    "extraction_memo_size": 2000
+}
+
+SEARCH_CONFIG = {
+    "base_url": os.getenv('SERPER_BASE_URL', 'https://google.serper.dev'),
+    "timeout": 10,
+    "pool_size": 10,
+    "max_retries": 3,
+    "backoff_factor": 0.5,
+    "rate_limit_per_second": 5,
+    "burst": 10,
+    "cache": {
+        "enabled": os.getenv('SEARCH_CACHE_ENABLED', '1') == '1',
+        "path": os.getenv('SEARCH_CACHE_PATH', '.cache/search_cache.sqlite3'),
+        "ttl": 24 * 3600,
+        "max_entries": 20000
+    }
+}
+
+FETCH_CONFIG = {
+    "enabled": os.getenv('FETCH_PAGES', '1') == '1',
+    "pool_size": 16,
+    "per_host": 2,
+    "max_bytes": 2 * 1024 * 1024,
+    "connect_timeout": 5,
+    "read_timeout": 10,
+    "min_text_chars": 200,
+    "max_text_chars": 20000,
+    "min_block_words": 6,
+    "revalidate_after": 6 * 3600,
+    "user_agent": "Mozilla/5.0 (compatible; CredibilityResearchAgent/1.0)",
+    "cache": {
+        "enabled": os.getenv('PAGE_CACHE_ENABLED', '1') == '1',
+        "path": os.getenv('PAGE_CACHE_PATH', '.cache/page_cache.sqlite3'),
+        "ttl": 30 * 24 * 3600,
+        "max_entries": 20000
+    }
+}
+
+SOURCE_CLASSIFIER_CONFIG = {
+    "domain_list_path": os.getenv('SOURCE_DOMAINS_FILE'),
+    "memo_size": 4096
 }
 
 LLM_CONFIGS = {
     'gemini': {
         'model': 'gemini-2.5-flash',
         'temperature': 0.2,
-        'display_name': 'Gemini 2.5 Flash'
+        'display_name': 'Gemini 2.5 Flash',
+        'key_env': 'GOOGLE_API_KEY'
     },
     'groq': {
         'models': {
             'llama-3.3-70b-versatile': 'llama-3.3-70b-versatile'
         },
-        'temperature': 0.2
+        'temperature': 0.2,
+        'key_env': 'GROQ_API_KEY'
+    },
+    'fake': {
+        'model': 'scripted',
+        'temperature': 0.0,
+        'latency': float(os.getenv('FAKE_LLM_LATENCY', '0.05')),
+        'jitter': float(os.getenv('FAKE_LLM_JITTER', '0.0')),
+        'failure_rate': float(os.getenv('FAKE_LLM_FAILURE_RATE', '0.0')),
+        'malformed_rate': float(os.getenv('FAKE_LLM_MALFORMED_RATE', '0.0')),
+        'seed': int(os.getenv('FAKE_LLM_SEED', '0')),
+        'key_env': 'FAKE_LLM_KEY'
     }
+}
+
+LLM_POOL_CONFIG = {
+    # Providers the 'pool' choice spreads calls over, and each one's share of traffic.
+    "providers": [p.strip() for p in os.getenv('LLM_POOL_PROVIDERS', 'gemini,groq').split(',') if p.strip()],
+    "weights": {"gemini": 1.0, "groq": 1.0, "fake": 1.0},
+    "routing": os.getenv('LLM_POOL_ROUTING', 'least_loaded'),
+    "failure_threshold": 3,
+    "cooldown": 5,
+    "max_cooldown": 300,
+    "latency_smoothing": 0.2
 }
\ No newline at end of file
@@ -3,95 +3,241 @@ from system_prompts import (
     BIAS_DETECTION_PROMPT,
     CLAIM_VALIDATION_PROMPT,
     FINAL_ACTION_PROMPT,
+    BATCH_FINAL_ACTION_PROMPT,
     SYSTEM_CONFIG
 )
-import re
+import asyncio
 import json
+import hashlib
+import threading
 from cachetools import TTLCache
+from heuristics import HeuristicEngine
+from instrumentation import call_site, timed, record_fallback, ContextThreadPoolExecutor
+from budget import truncate_tokens, budget_allows
+from llm_cache import invalidate_reply
+from config import CREDIBILITY_PARAMS, PERFORMANCE_CONFIG
+
+class StatsTTLCache(TTLCache):
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+        self.expirations = 0
+    
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+    
+    def expire(self, *args, **kwargs):
+        expired = super().expire(*args, **kwargs)
+        self.expirations += len(expired or [])
+        return expired
 
 class CredibilityAnalyzer:
     def __init__(self, llm):
         self.llm = llm
         self.weights = SYSTEM_CONFIG['source_weights']
-        self.cache = TTLCache(maxsize=1000, ttl=7200)
+        self.heuristics = HeuristicEngine(self.weights)
+        self.cache = StatsTTLCache(maxsize=PERFORMANCE_CONFIG['score_cache_size'], ttl=PERFORMANCE_CONFIG['cache_ttl'])
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self._cache_lock = threading.Lock()
+    
+    @staticmethod
+    def score_cache_key(claim_text, source_type, context):
+        normalized = "\x1f".join([
+            " ".join(claim_text.lower().split()),
+            source_type,
+            " ".join((context or '').lower().split())
+        ])
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    
+    def get_cache_stats(self):
+        with self._cache_lock:
+            lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+            return {
+                **self.cache_stats,
+                'hit_rate': self.cache_stats['hits'] / lookups if lookups else 0,
+                'evictions': self.cache.evictions,
+                'expirations': self.cache.expirations,
+                'size': len(self.cache),
+                'maxsize': self.cache.maxsize
+            }
     
     def score_claim(self, claim_text, source_type, context):
-        cache_key = f"{claim_text[:50]}_{source_type}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        base_score = self.weights.get(source_type, 0.5) * 10
-        promo = self._detect_promotional(claim_text)
-        absolute = self._detect_absolute(claim_text)
-        self_interest = self._detect_self_interest(claim_text, context)
-        evidence = self._detect_evidence(claim_text)
-        
-        heuristic_score = base_score - promo - absolute - self_interest + evidence
-        heuristic_score = max(0, min(10, heuristic_score))
+        cache_key, cached = self._cached_score(claim_text, source_type, context)
+        if cached is not None:
+            return cached
         
-        decision = self._llm_decide_validation(
-            claim_text, source_type, context, heuristic_score,
-            promo, absolute, self_interest, evidence
-        )
+        with timed('heuristic_scoring'):
+            signals = self.heuristics.score(claim_text, source_type, context or '')
+        path = self._scoring_path(signals['heuristic_score'])
+        decision = bias_result = None
+        if path == 'slow':
+            decision = self._llm_decide_validation(
+                claim_text, source_type, context, signals['heuristic_score'],
+                signals['promo'], signals['absolute'], signals['self_interest'], signals['evidence']
+            )
+            if decision['needs_deep_analysis'] and budget_allows('bias_analysis'):
+                bias_result = self._llm_bias_analysis(claim_text, context)
+        return self._finish_score(cache_key, self._build_score(signals, source_type, path, decision, bias_result))
+    
+    async def ascore_claim(self, claim_text, source_type, context):
+        cache_key, cached = self._cached_score(claim_text, source_type, context)
+        if cached is not None:
+            return cached
         
+        with timed('heuristic_scoring'):
+            signals = self.heuristics.score(claim_text, source_type, context or '')
+        path = self._scoring_path(signals['heuristic_score'])
+        decision = bias_result = None
+        if path == 'slow':
+            decision = await self._allm_decide_validation(
+                claim_text, source_type, context, signals['heuristic_score'],
+                signals['promo'], signals['absolute'], signals['self_interest'], signals['evidence']
+            )
+            if decision['needs_deep_analysis'] and budget_allows('bias_analysis'):
+                bias_result = await self._allm_bias_analysis(claim_text, context)
+        return self._finish_score(cache_key, self._build_score(signals, source_type, path, decision, bias_result))
+    
+    def _cached_score(self, claim_text, source_type, context):
+        cache_key = self.score_cache_key(claim_text, source_type, context)
+        with self._cache_lock:
+            cached = self.cache.get(cache_key)
+            self.cache_stats['hits' if cached is not None else 'misses'] += 1
+        return cache_key, cached
+    
+    def _finish_score(self, cache_key, result):
+        # A score cut short by the research budget is not cached, so a later
+        # research with room to spare gets the full analysis.
+        if result.get('degraded'):
+            return result
+        return self._store_score(cache_key, result)
+    
+    def _store_score(self, cache_key, result):
+        with self._cache_lock:
+            self.cache[cache_key] = result
+        return result
+    
+    def _build_score(self, signals, source_type, path, decision, bias_result):
+        heuristic_score = signals['heuristic_score']
         final_score = heuristic_score
-        reasoning = [f"Base score: {base_score:.1f} due to {source_type} source"]
-        if promo:
-            reasoning.append(f"Promotional penalty: -{promo:.1f} for promotional language")
-        if absolute:
-            reasoning.append(f"Absolute language penalty: -{absolute:.1f} for absolute terms")
-        if self_interest:
-            reasoning.append(f"Self-interest penalty: -{self_interest:.1f} due to self-serving context")
-        if evidence:
-            reasoning.append(f"Evidence bonus: +{evidence:.1f} for research-based evidence")
+        reasoning = [f"Base score: {signals['base_score']:.1f} due to {source_type} source"]
+        if signals['promo']:
+            reasoning.append(f"Promotional penalty: -{signals['promo']:.1f} for promotional language")
+        if signals['absolute']:
+            reasoning.append(f"Absolute language penalty: -{signals['absolute']:.1f} for absolute terms")
+        if signals['self_interest']:
+            reasoning.append(f"Self-interest penalty: -{signals['self_interest']:.1f} due to self-serving context")
+        if signals['evidence']:
+            reasoning.append(f"Evidence bonus: +{signals['evidence']:.1f} for research-based evidence")
         
-        if decision['needs_deep_analysis']:
+        if path == 'fast':
+            reasoning.append(f"Fast path: heuristic score {heuristic_score:.1f} is outside the ambiguous band, LLM review skipped")
+        elif path == 'budget':
+            reasoning.append(f"Heuristic score {heuristic_score:.1f} kept: research budget exhausted before LLM review")
+            return {'score': round(final_score, 1), 'reasoning': reasoning, 'path': path, 'degraded': True}
+        elif decision['needs_deep_analysis'] and bias_result is None:
+            reasoning.append(f"LLM analysis: {decision['reasoning']}")
+            reasoning.append("Bias analysis skipped to stay within the research budget")
+            return {'score': round(final_score, 1), 'reasoning': reasoning, 'path': path, 'degraded': True}
+        elif decision['needs_deep_analysis']:
             reasoning.append(f"LLM analysis: {decision['reasoning']}")
-            bias_result = self._llm_bias_analysis(claim_text, context)
             final_score += bias_result['adjustment']
             final_score = max(0, min(10, final_score))
             reasoning.append(f"Bias adjustment: {bias_result['adjustment']:.1f} due to {', '.join(bias_result['bias_types'])}")
         else:
             reasoning.append(f"LLM decision: {decision['reasoning']}")
         
-        self.cache[cache_key] = {'score': round(final_score, 1), 'reasoning': reasoning}
-        return self.cache[cache_key]
+        return {'score': round(final_score, 1), 'reasoning': reasoning, 'path': path}
+    
+    def _scoring_path(self, heuristic_score):
+        # Ambiguous claims go to the LLM while the research budget lasts; after
+        # that they are settled on the heuristic score like decisive ones.
+        if self.is_decisive(heuristic_score):
+            return 'fast'
+        return 'slow' if budget_allows('llm_decision') else 'budget'
+    
+    def is_decisive(self, score):
+        fast_path = CREDIBILITY_PARAMS['fast_path']
+        if not fast_path['enabled']:
+            return False
+        return (score >= CREDIBILITY_PARAMS['thresholds']['high'] + fast_path['margin']
+                or score <= CREDIBILITY_PARAMS['auto_exclude'] - fast_path['margin'])
+    
+    def _invoke(self, prompt, site):
+        with timed(site), call_site(site):
+            try:
+                return self.llm.invoke(prompt).content
+            except Exception:
+                return None
+    
+    async def _ainvoke(self, prompt, site):
+        with timed(site), call_site(site):
+            try:
+                return (await self.llm.ainvoke(prompt)).content
+            except Exception:
+                return None
     
     def _llm_decide_validation(self, claim, source_type, context, score, promo, absolute, self_interest, evidence):
+        prompt = self._decision_prompt(claim, source_type, context, score, promo, absolute, self_interest, evidence)
+        return self._parse_decision(self._invoke(prompt, 'llm_decision'), score, prompt)
+    
+    async def _allm_decide_validation(self, claim, source_type, context, score, promo, absolute, self_interest, evidence):
+        prompt = self._decision_prompt(claim, source_type, context, score, promo, absolute, self_interest, evidence)
+        return self._parse_decision(await self._ainvoke(prompt, 'llm_decision'), score, prompt)
+    
+    def _decision_prompt(self, claim, source_type, context, score, promo, absolute, self_interest, evidence):
+        return VALIDATION_DECISION_PROMPT.format(
+            claim=truncate_tokens(claim, 'claim'),
+            source_type=source_type,
+            heuristic_score=round(score, 1),
+            context=truncate_tokens(context, 'context'),
+            promo_penalty=promo,
+            absolute_penalty=absolute,
+            self_interest_penalty=self_interest,
+            evidence_bonus=evidence
+        )
+    
+    def _parse_decision(self, content, score, prompt):
         try:
-            prompt = VALIDATION_DECISION_PROMPT.format(
-                claim=claim[:300],
-                source_type=source_type,
-                heuristic_score=round(score, 1),
-                context=context[:200],
-                promo_penalty=promo,
-                absolute_penalty=absolute,
-                self_interest_penalty=self_interest,
-                evidence_bonus=evidence
-            )
-            result = self.llm.invoke(prompt)
-            return json.loads(result.content)
-        except:
+            return json.loads(content)
+        except Exception:
+            record_fallback('llm_decision', content)
+            invalidate_reply(self.llm, prompt)
             return {'needs_deep_analysis': 3.5 <= score <= 7.5, 'reasoning': 'Fallback due to parsing error', 'confidence': 5}
     
     def _llm_bias_analysis(self, text, context):
+        prompt = BIAS_DETECTION_PROMPT.format(text=truncate_tokens(text, 'bias_text'), context=truncate_tokens(context, 'context'))
+        return self._parse_bias(self._invoke(prompt, 'bias_analysis'), prompt)
+    
+    async def _allm_bias_analysis(self, text, context):
+        prompt = BIAS_DETECTION_PROMPT.format(text=truncate_tokens(text, 'bias_text'), context=truncate_tokens(context, 'context'))
+        return self._parse_bias(await self._ainvoke(prompt, 'bias_analysis'), prompt)
+    
+    def _parse_bias(self, content, prompt):
         try:
-            prompt = BIAS_DETECTION_PROMPT.format(text=text[:500], context=context[:200])
-            result = self.llm.invoke(prompt)
-            analysis = json.loads(result.content)
+            analysis = json.loads(content)
             return {
                 'adjustment': analysis.get('adjustment', 0),
                 'bias_types': analysis.get('bias_types', []),
                 'severity': analysis.get('severity', 'medium')
             }
-        except:
+        except Exception:
+            record_fallback('bias_analysis', content)
+            invalidate_reply(self.llm, prompt)
             return {'adjustment': 0, 'bias_types': [], 'severity': 'unknown'}
     
     def validate_claim(self, claim, score, evidence):
+        prompt = CLAIM_VALIDATION_PROMPT.format(claim=claim, score=score, evidence=truncate_tokens(evidence, 'evidence'))
+        return self._parse_validation(self._invoke(prompt, 'validation'), score, prompt)
+    
+    async def avalidate_claim(self, claim, score, evidence):
+        prompt = CLAIM_VALIDATION_PROMPT.format(claim=claim, score=score, evidence=truncate_tokens(evidence, 'evidence'))
+        return self._parse_validation(await self._ainvoke(prompt, 'validation'), score, prompt)
+    
+    def _parse_validation(self, content, score, prompt):
         try:
-            prompt = CLAIM_VALIDATION_PROMPT.format(claim=claim, score=score, evidence=evidence[:1500])
-            result = self.llm.invoke(prompt)
-            validation = json.loads(result.content)
+            validation = json.loads(content)
             new_score = score + validation.get('score_adjustment', 0)
             return {
                 'validated_score': max(0, min(10, new_score)),
@@ -99,24 +245,97 @@ class CredibilityAnalyzer:
                 'confidence': validation.get('confidence', 5),
                 'explanation': validation.get('explanation', 'No explanation provided')
             }
-        except:
+        except Exception:
+            record_fallback('validation', content)
+            invalidate_reply(self.llm, prompt)
             return {'validated_score': score, 'verdict': 'NEUTRAL', 'confidence': 5, 'explanation': 'Fallback validation due to error'}
     
     def get_final_action(self, claim, score, source_type, validation_status):
+        if not budget_allows('final_action'):
+            return self._budget_action(score)
+        prompt = self._final_action_prompt(claim, score, source_type, validation_status)
+        return self._parse_final_action(self._invoke(prompt, 'final_action'), score, prompt)
+    
+    async def aget_final_action(self, claim, score, source_type, validation_status):
+        if not budget_allows('final_action'):
+            return self._budget_action(score)
+        prompt = self._final_action_prompt(claim, score, source_type, validation_status)
+        return self._parse_final_action(await self._ainvoke(prompt, 'final_action'), score, prompt)
+    
+    def _final_action_prompt(self, claim, score, source_type, validation_status):
+        return FINAL_ACTION_PROMPT.format(
+            claim=truncate_tokens(claim, 'short_claim'),
+            score=score,
+            source_type=source_type,
+            validation_status=validation_status
+        )
+    
+    def _budget_action(self, score):
+        return {'action': self._fallback_action(score), 'reasoning': 'Fallback decision: research budget exhausted'}
+    
+    def _parse_final_action(self, content, score, prompt):
         try:
-            prompt = FINAL_ACTION_PROMPT.format(
-                claim=claim[:200],
-                score=score,
-                source_type=source_type,
-                validation_status=validation_status
-            )
-            result = self.llm.invoke(prompt)
-            decision = json.loads(result.content)
+            decision = json.loads(content)
             return {'action': decision.get('action', self._fallback_action(score)),
                     'reasoning': decision.get('reasoning', 'Fallback decision')}
-        except:
+        except Exception:
+            record_fallback('final_action', content)
+            invalidate_reply(self.llm, prompt)
             return {'action': self._fallback_action(score), 'reasoning': 'Fallback due to parsing error'}
     
+    def get_final_actions(self, items):
+        decisions = []
+        with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+            for batch in executor.map(self._batch_final_action, self._final_action_batches(items)):
+                decisions.extend(batch)
+        return decisions
+    
+    async def aget_final_actions(self, items):
+        batches = await asyncio.gather(*[self._abatch_final_action(b) for b in self._final_action_batches(items)])
+        return [decision for batch in batches for decision in batch]
+    
+    def _final_action_batches(self, items):
+        batch_size = PERFORMANCE_CONFIG['final_action_batch_size']
+        return [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    
+    def _batch_final_action(self, items):
+        # Each request is admitted by the research budget on its own.
+        if not budget_allows('final_action'):
+            return [self._budget_action(item['score']) for item in items]
+        prompt = self._batch_final_action_prompt(items)
+        return self._parse_batch_final_action(self._invoke(prompt, 'final_action_batch'), items, prompt)
+    
+    async def _abatch_final_action(self, items):
+        if not budget_allows('final_action'):
+            return [self._budget_action(item['score']) for item in items]
+        prompt = self._batch_final_action_prompt(items)
+        return self._parse_batch_final_action(await self._ainvoke(prompt, 'final_action_batch'), items, prompt)
+    
+    def _batch_final_action_prompt(self, items):
+        return BATCH_FINAL_ACTION_PROMPT.format(claims="\n".join(
+            f"[{i}] Claim: {truncate_tokens(item['claim'], 'short_claim')} | Score: {item['score']}/10 | Source Type: {item['source_type']} | Validation Status: {item['validation_status']}"
+            for i, item in enumerate(items)
+        ))
+    
+    def _parse_batch_final_action(self, content, items, prompt):
+        parsed = {}
+        try:
+            for entry in json.loads(content):
+                if isinstance(entry, dict) and isinstance(entry.get('index'), int):
+                    parsed[entry['index']] = entry
+        except Exception:
+            record_fallback('final_action_batch', content)
+            invalidate_reply(self.llm, prompt)
+        
+        decisions = []
+        for i, item in enumerate(items):
+            entry = parsed.get(i, {})
+            if entry.get('action') in ('INCLUDE', 'WARN', 'EXCLUDE'):
+                decisions.append({'action': entry['action'], 'reasoning': entry.get('reasoning', 'Fallback decision')})
+            else:
+                decisions.append({'action': self._fallback_action(item['score']), 'reasoning': 'Fallback due to missing batch decision'})
+        return decisions
+    
     def _fallback_action(self, score):
         if score >= 7.5:
             return "INCLUDE"
@@ -125,34 +344,13 @@ class CredibilityAnalyzer:
         return "EXCLUDE"
     
     def _detect_promotional(self, text):
-        patterns = [
-            r'\b(best|greatest|amazing|revolutionary|guaranteed|perfect|ultimate)\b',
-            r'\b(world.?class|industry.?leading|award.?winning)\b'
-        ]
-        penalty = sum(len(re.findall(p, text.lower())) * 1.5 for p in patterns)
-        return min(penalty, 4)
+        return self.heuristics.scan(text)['promo']
     
     def _detect_absolute(self, text):
-        words = ['always', 'never', 'every', 'all', 'none', 'impossible', 'guaranteed']
-        return min(sum(0.7 for w in words if w in text.lower()), 3)
+        return self.heuristics.scan(text)['absolute']
     
     def _detect_self_interest(self, text, context):
-        penalty = 0
-        if any(r in context.lower() for r in ['ceo', 'founder', 'executive', 'sponsored']):
-            if any(r in text.lower() for r in ['our', 'we', 'us', 'my', 'i']):
-                penalty += 3.0
-        if 'commercial' in context.lower() or 'advertisement' in context.lower():
-            penalty += 3.5
-        return min(penalty, 5)
+        return self.heuristics.scan(text, context)['self_interest']
     
     def _detect_evidence(self, text):
-        bonus = 0
-        if re.search(r'\b(study|research|peer.?reviewed|published)\b', text.lower()):
-            bonus += 2.0
-        if re.search(r'\d+(\.\d+)?%|\d+\s*(participants|subjects|samples)', text.lower()):
-            bonus += 1.5
-        if re.search(r'(according to|expert|professor|dr\.)', text.lower()):
-            bonus += 1.0
-        if 'independent' in text.lower() or 'unbiased' in text.lower():
-            bonus += 1.5
-        return min(bonus, 4)
\ No newline at end of file
+        return self.heuristics.scan(text)['evidence']
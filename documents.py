@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import os
+import zipfile
+from collections import deque
+from xml.etree import ElementTree
+from tools import extract_claims, aextract_claims
+from instrumentation import ContextThreadPoolExecutor
+from budget import CHARS_PER_TOKEN, estimate_tokens, budget_allows
+from config import DOCUMENT_CONFIG
+
+def iter_file_text(filepath, block_size=None):
+    block_size = block_size or DOCUMENT_CONFIG['read_block_size']
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+def iter_pdf_text(filepath):
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise RuntimeError("PDF support requires the 'pypdf' package") from e
+    reader = PdfReader(filepath)
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        if text:
+            yield text + '\n'
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+def iter_docx_text(filepath):
+    # Stream word/document.xml paragraph by paragraph instead of loading the whole tree.
+    # Every finished element is detached from its parent, so only the open path
+    # from the root stays in memory, not empty shells of every paragraph read.
+    with zipfile.ZipFile(filepath) as archive, archive.open('word/document.xml') as xml:
+        parts = []
+        open_elements = []
+        for event, element in ElementTree.iterparse(xml, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if element.tag == WORD_NAMESPACE + 't' and element.text:
+                parts.append(element.text)
+            elif element.tag == WORD_NAMESPACE + 'tab':
+                parts.append('\t')
+            elif element.tag == WORD_NAMESPACE + 'p':
+                if parts:
+                    yield ''.join(parts) + '\n'
+                parts = []
+            element.clear()
+            if open_elements:
+                open_elements[-1].remove(element)
+
+LOADERS = {
+    '.txt': iter_file_text,
+    '.md': iter_file_text,
+    '.pdf': iter_pdf_text,
+    '.docx': iter_docx_text
+}
+
+def register_loader(extension, loader):
+    LOADERS[extension.lower()] = loader
+
+def file_hash(filepath, block_size=None):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size or DOCUMENT_CONFIG['read_block_size']), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def iter_document_text(filepath):
+    extension = os.path.splitext(filepath)[1].lower()
+    loader = LOADERS.get(extension, iter_file_text)
+    if loader is iter_file_text:
+        yield from iter_file_text(filepath)
+        return
+    
+    cache_dir = DOCUMENT_CONFIG['text_cache_dir']
+    cache_path = os.path.join(cache_dir, f"{file_hash(filepath)}.txt")
+    if os.path.exists(cache_path):
+        yield from iter_file_text(cache_path)
+        return
+    
+    # Text is written to the cache as it is extracted and only published once the
+    # whole document has been read, so an interrupted run never leaves a partial entry.
+    os.makedirs(cache_dir, exist_ok=True)
+    partial_path = f"{cache_path}.{os.getpid()}.partial"
+    try:
+        with open(partial_path, 'w', encoding='utf-8') as cache_file:
+            for text in loader(filepath):
+                cache_file.write(text)
+                yield text
+        os.replace(partial_path, cache_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def iter_chunks(segments, chunk_tokens=None, overlap_tokens=None):
+    max_chars = (chunk_tokens or DOCUMENT_CONFIG['chunk_tokens']) * CHARS_PER_TOKEN
+    overlap_chars = (overlap_tokens or DOCUMENT_CONFIG['overlap_tokens']) * CHARS_PER_TOKEN
+    buffer = ''
+    for segment in segments:
+        buffer += segment
+        while len(buffer) >= max_chars:
+            cut = _split_point(buffer, max_chars)
+            yield buffer[:cut]
+            start = cut
+            if cut > overlap_chars:
+                space = buffer.find(' ', cut - overlap_chars, cut)
+                start = space + 1 if space != -1 else cut - overlap_chars
+            buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer
+
+def _split_point(text, max_chars):
+    # Prefer ending a chunk on a sentence, then on whitespace, so claims are not cut mid-way.
+    window = text[:max_chars]
+    for marker in ('. ', '\n', ' '):
+        index = window.rfind(marker)
+        if index > max_chars // 2:
+            return index + len(marker)
+    return max_chars
+
+def claim_key(claim):
+    return hashlib.sha1(" ".join(claim['text'].lower().split()).encode('utf-8')).hexdigest()
+
+def extract_claims_stream(chunks, source, llm, max_workers=None):
+    max_workers = max_workers or DOCUMENT_CONFIG['max_concurrent_chunks']
+    seen = set()
+    pending = deque()
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in _budgeted(chunks):
+            pending.append(executor.submit(extract_claims, chunk, source, llm))
+            if len(pending) >= max_workers * 2:
+                yield from _unseen(pending.popleft().result(), seen)
+        while pending:
+            yield from _unseen(pending.popleft().result(), seen)
+
+async def aextract_claims_stream(chunks, source, llm, max_workers=None):
+    max_workers = max_workers or DOCUMENT_CONFIG['max_concurrent_chunks']
+    seen = set()
+    pending = deque()
+    # Reading and parsing the document blocks, so each chunk is pulled on a
+    # worker thread; to_thread copies the context, keeping the research budget.
+    budgeted = _budgeted(chunks)
+    while True:
+        chunk = await asyncio.to_thread(next, budgeted, None)
+        if chunk is None:
+            break
+        pending.append(asyncio.ensure_future(aextract_claims(chunk, source, llm)))
+        if len(pending) >= max_workers * 2:
+            for claim in _unseen(await pending.popleft(), seen):
+                yield claim
+    while pending:
+        for claim in _unseen(await pending.popleft(), seen):
+            yield claim
+
+def _budgeted(chunks):
+    # Every chunk costs an extraction call; reading stops once the research
+    # budget has none left.
+    for chunk in chunks:
+        if not budget_allows('extraction'):
+            return
+        yield chunk
+
+def _unseen(claims, seen):
+    for claim in claims:
+        key = claim_key(claim)
+        if key not in seen:
+            seen.add(key)
+            yield claim
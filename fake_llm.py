@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from langchain_core.messages import AIMessage, AIMessageChunk
+from system_prompts import (
+    CLAIM_EXTRACTION_PROMPT, VALIDATION_DECISION_PROMPT, BIAS_DETECTION_PROMPT,
+    CLAIM_VALIDATION_PROMPT, RECONCILIATION_PROMPT, FINAL_ACTION_PROMPT,
+    BATCH_FINAL_ACTION_PROMPT, REPORT_SECTION_PROMPT, REPORT_GENERATION_PROMPT,
+    UPDATE_ANALYSIS_PROMPT, SUMMARY_PROMPT
+)
+
+SCORE_PATTERN = re.compile(r'Score: ([\d.]+)/10')
+
+class FakeLLMError(Exception):
+    pass
+
+def _prompt_kind(template):
+    return template.split('\n', 1)[0]
+
+# Scripted chat model for offline runs. Replies are derived from the prompt
+# alone, so the same prompt always gets the same answer (and the same injected
+# failure) whichever thread or task sends it.
+class FakeChatModel:
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, malformed_rate=0.0, seed=0, chunk_size=16):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.stats = {'calls': 0, 'failures': 0, 'malformed': 0, 'prompt_chars': 0, 'response_chars': 0}
+        self._lock = threading.Lock()
+        self._responders = {
+            _prompt_kind(CLAIM_EXTRACTION_PROMPT): self._extract_claims,
+            _prompt_kind(VALIDATION_DECISION_PROMPT): self._decide_validation,
+            _prompt_kind(BIAS_DETECTION_PROMPT): self._detect_bias,
+            _prompt_kind(CLAIM_VALIDATION_PROMPT): self._validate_claim,
+            _prompt_kind(RECONCILIATION_PROMPT): self._reconcile,
+            _prompt_kind(FINAL_ACTION_PROMPT): self._final_action,
+            _prompt_kind(BATCH_FINAL_ACTION_PROMPT): self._batch_final_action,
+            _prompt_kind(REPORT_SECTION_PROMPT): self._write_report,
+            _prompt_kind(REPORT_GENERATION_PROMPT): self._write_report,
+            _prompt_kind(UPDATE_ANALYSIS_PROMPT): self._analyze_update,
+            _prompt_kind(SUMMARY_PROMPT): self._summarize
+        }
+    
+    def invoke(self, prompt, *args, **kwargs):
+        time.sleep(self._delay(prompt))
+        return AIMessage(content=self._respond(prompt))
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(self._delay(prompt))
+        return AIMessage(content=self._respond(prompt))
+    
+    def stream(self, prompt, *args, **kwargs):
+        time.sleep(self._delay(prompt))
+        content = self._respond(prompt)
+        for start in range(0, len(content), self.chunk_size):
+            yield AIMessageChunk(content=content[start:start + self.chunk_size])
+    
+    def _roll(self, prompt, salt):
+        digest = hashlib.blake2b(f"{self.seed}:{salt}:{prompt}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') / 2 ** 64
+    
+    def _delay(self, prompt):
+        return self.latency + self.jitter * self._roll(prompt, 'latency')
+    
+    def _respond(self, prompt):
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['prompt_chars'] += len(text)
+        if self._roll(text, 'failure') < self.failure_rate:
+            with self._lock:
+                self.stats['failures'] += 1
+            raise FakeLLMError("Injected LLM failure")
+        if self._roll(text, 'malformed') < self.malformed_rate:
+            with self._lock:
+                self.stats['malformed'] += 1
+            return "I'm sorry, I can't produce JSON for that."
+        
+        responder = self._responders.get(text.split('\n', 1)[0], self._write_report)
+        content = responder(text)
+        with self._lock:
+            self.stats['response_chars'] += len(content)
+        return content
+    
+    def _extract_claims(self, prompt):
+        body = prompt.split('Text: ', 1)[-1].split('\n\nRULES:', 1)[0]
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', body) if len(s.strip()) > 30]
+        return json.dumps([{
+            'text': sentence.rstrip('.'),
+            'context': 'Stated in the source text',
+            'potential_bias': 'neutral' if self._roll(sentence, 'bias') > 0.2 else 'commercial',
+            'verifiable': True,
+            'importance': 'high' if self._roll(sentence, 'importance') > 0.5 else 'medium'
+        } for sentence in sentences[:12]])
+    
+    def _decide_validation(self, prompt):
+        return json.dumps({
+            'needs_deep_analysis': self._roll(prompt, 'decision') < 0.5,
+            'reasoning': 'Scripted decision',
+            'confidence': 7
+        })
+    
+    def _detect_bias(self, prompt):
+        adjustment = round(-3.0 * self._roll(prompt, 'adjustment') + 1.0, 1)
+        return json.dumps({
+            'bias_score': round(10 * self._roll(prompt, 'bias'), 1),
+            'bias_types': ['commercial'] if adjustment < 0 else [],
+            'severity': 'medium' if adjustment < -1 else 'low',
+            'adjustment': adjustment
+        })
+    
+    def _validate_claim(self, prompt):
+        roll = self._roll(prompt, 'verdict')
+        verdict, adjustment = ('SUPPORTS', 1.0) if roll < 0.5 else ('NEUTRAL', 0.0) if roll < 0.8 else ('CONTRADICTS', -2.0)
+        return json.dumps({
+            'verdict': verdict,
+            'confidence': 6,
+            'score_adjustment': adjustment,
+            'explanation': 'Scripted validation'
+        })
+    
+    def _reconcile(self, prompt):
+        count = prompt.count('] EXISTING: ')
+        return json.dumps([{
+            'index': i,
+            'resolution': ('keep_existing', 'replace_with_new', 'merge_both')[int(3 * self._roll(prompt, i))],
+            'reason': 'Scripted resolution'
+        } for i in range(count)])
+    
+    def _final_action(self, prompt):
+        match = SCORE_PATTERN.search(prompt)
+        return json.dumps({
+            'action': self._action(float(match.group(1)) if match else 5.0),
+            'reasoning': 'Scripted decision',
+            'confidence': 7
+        })
+    
+    def _batch_final_action(self, prompt):
+        scores = [float(s) for s in SCORE_PATTERN.findall(prompt.split('\n\nDECIDE ACTION:', 1)[0])]
+        return json.dumps([{
+            'index': i,
+            'action': self._action(score),
+            'reasoning': 'Scripted decision'
+        } for i, score in enumerate(scores)])
+    
+    def _action(self, score):
+        if score >= 7.5:
+            return 'INCLUDE'
+        return 'WARN' if score >= 4.5 else 'EXCLUDE'
+    
+    def _analyze_update(self, prompt):
+        regenerate = self._roll(prompt, 'approach') < 0.3
+        return json.dumps({
+            'approach': 'regenerate' if regenerate else 'incremental',
+            'reasoning': 'Scripted update analysis',
+            'estimated_quality_impact': 'medium',
+            'recommended_action': 'Apply the update'
+        })
+    
+    def _write_report(self, prompt):
+        claims = [line[2:].split(' (Score:', 1)[0] for line in prompt.split('\n') if line.startswith('- ') and '(Score:' in line]
+        paragraphs = [f"{claim}." for claim in claims] or ["No claims to report."]
+        return "\n\n".join(paragraphs)
+    
+    def _summarize(self, prompt):
+        return " ".join(self._write_report(prompt).split("\n\n")[:5])
@@ -0,0 +1,69 @@
+import re
+from system_prompts import SYSTEM_CONFIG
+
+PROMOTIONAL_TERMS = frozenset(['best', 'greatest', 'amazing', 'revolutionary', 'guaranteed', 'perfect', 'ultimate'])
+ABSOLUTE_TERMS = frozenset(['always', 'never', 'every', 'all', 'none', 'impossible', 'guaranteed'])
+EVIDENCE_TERMS = frozenset(['study', 'research', 'published'])
+SELF_REFERENCE_TERMS = frozenset(['our', 'we', 'us', 'my', 'i'])
+WORD_TERMS = PROMOTIONAL_TERMS | ABSOLUTE_TERMS | EVIDENCE_TERMS | SELF_REFERENCE_TERMS
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+# Multi-word and stem patterns are rare, so each one is guarded by a plain
+# substring check before its compiled regex runs.
+COMPOUND_PROMOTIONAL_PATTERN = re.compile(r'\b(?:world.?class|industry.?leading|award.?winning)\b')
+COMPOUND_PROMOTIONAL_HINTS = ('class', 'leading', 'winning')
+PEER_REVIEWED_PATTERN = re.compile(r'\bpeer.?reviewed\b')
+STATISTIC_PATTERN = re.compile(r'\d+(?:(?:\.\d+)?%|\s*(?:participants|subjects|samples))')
+AUTHORITY_PATTERN = re.compile(r'according to|\bexpert|\bprofessor|\bdr\.')
+AUTHORITY_HINTS = ('according to', 'expert', 'professor', 'dr.')
+INDEPENDENCE_PATTERN = re.compile(r'\b(?:independent|unbiased)')
+ROLE_PATTERN = re.compile(r'\b(?:ceo|founder|executive|sponsored)')
+COMMERCIAL_PATTERN = re.compile(r'\b(?:commercial|advertisement)')
+
+class HeuristicEngine:
+    def __init__(self, weights=None):
+        self.weights = weights or SYSTEM_CONFIG['source_weights']
+    
+    def scan(self, text, context=''):
+        lowered = text.lower()
+        tokens = TOKEN_PATTERN.findall(lowered)
+        matched = WORD_TERMS.intersection(tokens)
+        
+        promo_hits = sum(tokens.count(t) for t in matched & PROMOTIONAL_TERMS)
+        if any(hint in lowered for hint in COMPOUND_PROMOTIONAL_HINTS):
+            promo_hits += len(COMPOUND_PROMOTIONAL_PATTERN.findall(lowered))
+        
+        evidence = 0
+        if matched & EVIDENCE_TERMS or ('peer' in lowered and PEER_REVIEWED_PATTERN.search(lowered)):
+            evidence += 2.0
+        if STATISTIC_PATTERN.search(lowered):
+            evidence += 1.5
+        if any(hint in lowered for hint in AUTHORITY_HINTS) and AUTHORITY_PATTERN.search(lowered):
+            evidence += 1.0
+        if ('independent' in lowered or 'unbiased' in lowered) and INDEPENDENCE_PATTERN.search(lowered):
+            evidence += 1.5
+        
+        self_interest = 0
+        if context:
+            context = context.lower()
+            if matched & SELF_REFERENCE_TERMS and ROLE_PATTERN.search(context):
+                self_interest += 3.0
+            if COMMERCIAL_PATTERN.search(context):
+                self_interest += 3.5
+        
+        return {
+            'promo': min(promo_hits * 1.5, 4),
+            'absolute': min(len(matched & ABSOLUTE_TERMS) * 0.7, 3),
+            'self_interest': min(self_interest, 5),
+            'evidence': min(evidence, 4)
+        }
+    
+    def score(self, text, source_type, context=''):
+        signals = self.scan(text, context)
+        base_score = self.weights.get(source_type, 0.5) * 10
+        heuristic_score = base_score - signals['promo'] - signals['absolute'] - signals['self_interest'] + signals['evidence']
+        return {
+            **signals,
+            'base_score': base_score,
+            'heuristic_score': max(0, min(10, heuristic_score))
+        }
@@ -0,0 +1,208 @@
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from budget import current_budget, usage_tokens
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+# LLM wrappers sit below every call site, so the site a call belongs to travels
+# with the context instead of through each function signature. Tasks copy the
+# context when they are created; executor threads set their own label.
+_call_site = contextvars.ContextVar('llm_call_site', default='unlabelled')
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.llm_calls = {}
+    
+    def observe_stage(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['total_seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+    
+    def observe_llm_call(self, site, seconds, prompt_chars, response_chars, error=False, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            entry = self._llm_entry(site)
+            entry['count'] += 1
+            entry['errors'] += error
+            entry['latency_sum'] += seconds
+            entry['prompt_chars'] += prompt_chars
+            entry['response_chars'] += response_chars
+            entry['prompt_tokens'] += prompt_tokens
+            entry['completion_tokens'] += completion_tokens
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry['latency_buckets'][i] += 1
+                    break
+    
+    def record_fallback(self, site, response=None):
+        # A fallback with a response in hand means the reply could not be parsed;
+        # without one the call itself failed.
+        with self._lock:
+            entry = self._llm_entry(site)
+            entry['fallbacks'] += 1
+            entry['parse_errors'] += response is not None
+    
+    def snapshot(self):
+        with self._lock:
+            llm_calls = {}
+            for site, entry in self.llm_calls.items():
+                count = entry['count']
+                llm_calls[site] = {
+                    **{k: v for k, v in entry.items() if k != 'latency_buckets'},
+                    'latency_histogram': dict(zip([str(b) for b in LATENCY_BUCKETS], entry['latency_buckets'])),
+                    'avg_latency': entry['latency_sum'] / count if count else 0,
+                    'fallback_rate': entry['fallbacks'] / count if count else 0,
+                    'parse_error_rate': entry['parse_errors'] / count if count else 0
+                }
+            stages = {
+                stage: {**entry, 'avg_seconds': entry['total_seconds'] / entry['count']}
+                for stage, entry in self.stages.items()
+            }
+        return {'stages': stages, 'llm_calls': llm_calls}
+    
+    def to_openmetrics(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# TYPE research_stage_seconds summary",
+            "# HELP research_stage_seconds Wall time spent per pipeline stage."
+        ]
+        for stage, entry in sorted(snapshot['stages'].items()):
+            lines.append(f'research_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+            lines.append(f'research_stage_seconds_sum{{stage="{stage}"}} {entry["total_seconds"]:.6f}')
+        
+        lines += [
+            "# TYPE llm_call_latency_seconds histogram",
+            "# HELP llm_call_latency_seconds LLM call latency per call site."
+        ]
+        for site, entry in sorted(snapshot['llm_calls'].items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry['latency_histogram'].values()):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'llm_call_latency_seconds_bucket{{site="{site}",le="{le}"}} {cumulative}')
+            lines.append(f'llm_call_latency_seconds_count{{site="{site}"}} {entry["count"]}')
+            lines.append(f'llm_call_latency_seconds_sum{{site="{site}"}} {entry["latency_sum"]:.6f}')
+        
+        for name, field, help_text in (
+            ('llm_calls', 'count', 'LLM calls per call site.'),
+            ('llm_call_errors', 'errors', 'LLM calls that raised.'),
+            ('llm_fallbacks', 'fallbacks', 'Fallback results used instead of an LLM answer.'),
+            ('llm_parse_errors', 'parse_errors', 'LLM replies that could not be parsed.'),
+            ('llm_prompt_chars', 'prompt_chars', 'Prompt characters sent.'),
+            ('llm_response_chars', 'response_chars', 'Response characters received.'),
+            ('llm_prompt_tokens', 'prompt_tokens', 'Prompt tokens sent.'),
+            ('llm_completion_tokens', 'completion_tokens', 'Completion tokens received.')
+        ):
+            lines += [f"# TYPE {name} counter", f"# HELP {name} {help_text}"]
+            for site, entry in sorted(snapshot['llm_calls'].items()):
+                lines.append(f'{name}_total{{site="{site}"}} {entry[field]}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+    
+    def _llm_entry(self, site):
+        if site not in self.llm_calls:
+            self.llm_calls[site] = {
+                'count': 0, 'errors': 0, 'fallbacks': 0, 'parse_errors': 0, 'latency_sum': 0.0,
+                'prompt_chars': 0, 'response_chars': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'latency_buckets': [0] * len(LATENCY_BUCKETS)
+            }
+        return self.llm_calls[site]
+
+_registry = MetricsRegistry()
+
+def get_metrics_registry():
+    return _registry
+
+def current_call_site():
+    return _call_site.get()
+
+@contextmanager
+def call_site(name):
+    token = _call_site.set(name)
+    try:
+        yield
+    finally:
+        _call_site.reset(token)
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe_stage(stage, time.perf_counter() - start)
+
+def record_fallback(site, response=None):
+    _registry.record_fallback(site, response)
+
+def _prompt_chars(prompt):
+    return len(prompt) if isinstance(prompt, str) else len(json.dumps(prompt, default=str))
+
+# Carries the submitting thread's context (call site label, research budget)
+# into the worker running each task.
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+class InstrumentedLLM:
+    def __init__(self, llm):
+        self.llm = llm
+    
+    def invoke(self, prompt, *args, **kwargs):
+        site, budget = current_call_site(), current_budget()
+        start = time.perf_counter()
+        try:
+            result = self.llm.invoke(prompt, *args, **kwargs)
+        except Exception:
+            self._observe(site, budget, start, prompt, None, 0, error=True)
+            raise
+        self._observe(site, budget, start, prompt, result, len(result.content))
+        return result
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        site, budget = current_call_site(), current_budget()
+        start = time.perf_counter()
+        try:
+            result = await self.llm.ainvoke(prompt, *args, **kwargs)
+        except Exception:
+            self._observe(site, budget, start, prompt, None, 0, error=True)
+            raise
+        self._observe(site, budget, start, prompt, result, len(result.content))
+        return result
+    
+    def stream(self, prompt, *args, **kwargs):
+        site, budget = current_call_site(), current_budget()
+        start = time.perf_counter()
+        response_chars = 0
+        usage = None
+        try:
+            for chunk in self.llm.stream(prompt, *args, **kwargs):
+                response_chars += len(chunk.content)
+                usage = chunk if getattr(chunk, 'usage_metadata', None) else usage
+                yield chunk
+        except Exception:
+            self._observe(site, budget, start, prompt, usage, response_chars, error=True)
+            raise
+        self._observe(site, budget, start, prompt, usage, response_chars)
+    
+    def _observe(self, site, budget, start, prompt, message, response_chars, error=False):
+        # Failed calls count their prompt: the provider may have billed it, and
+        # a budget should not treat retries as free.
+        prompt_chars = _prompt_chars(prompt)
+        prompt_tokens, completion_tokens = usage_tokens(message, prompt_chars, response_chars)
+        _registry.observe_llm_call(site, time.perf_counter() - start, prompt_chars, response_chars, error, prompt_tokens, completion_tokens)
+        if budget is not None:
+            budget.charge(prompt_tokens, completion_tokens)
+    
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
@@ -0,0 +1,71 @@
+import hashlib
+import json
+from langchain_core.messages import AIMessage, AIMessageChunk
+from cache_store import PersistentCache
+from config import PERFORMANCE_CONFIG
+
+_stores = {}
+
+def get_llm_cache_store():
+    settings = PERFORMANCE_CONFIG['llm_cache']
+    if settings['path'] not in _stores:
+        _stores[settings['path']] = PersistentCache(settings['path'], 'llm', settings['ttl'], settings['max_entries'])
+    return _stores[settings['path']]
+
+def invalidate_reply(llm, prompt):
+    # A reply that failed to parse is dropped, so the next call asks the model
+    # again instead of replaying the same broken reply from the cache.
+    if isinstance(llm, CachedLLM):
+        llm.invalidate(prompt)
+
+class CachedLLM:
+    def __init__(self, llm, provider, model, temperature, store=None):
+        self.llm = llm
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+        self.store = store or get_llm_cache_store()
+    
+    def cache_key(self, prompt):
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str, sort_keys=True)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"{self.provider}:{self.model}:{self.temperature}:{digest}"
+    
+    def invoke(self, prompt, *args, **kwargs):
+        key = self.cache_key(prompt)
+        cached = self.store.get(key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        result = self.llm.invoke(prompt, *args, **kwargs)
+        self.store.set(key, result.content)
+        return result
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        key = self.cache_key(prompt)
+        cached = self.store.get(key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        result = await self.llm.ainvoke(prompt, *args, **kwargs)
+        self.store.set(key, result.content)
+        return result
+    
+    def stream(self, prompt, *args, **kwargs):
+        key = self.cache_key(prompt)
+        cached = self.store.get(key)
+        if cached is not None:
+            yield AIMessageChunk(content=cached)
+            return
+        parts = []
+        for chunk in self.llm.stream(prompt, *args, **kwargs):
+            parts.append(chunk.content)
+            yield chunk
+        self.store.set(key, "".join(parts))
+    
+    def invalidate(self, prompt):
+        self.store.delete(self.cache_key(prompt))
+    
+    def stats(self):
+        return self.store.get_stats()
+    
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
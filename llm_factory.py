@@ -1,29 +1,100 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
-from config import LLM_CONFIGS
-import os
+from config import LLM_CONFIGS, LLM_POOL_CONFIG, PERFORMANCE_CONFIG, HEDGING_CONFIG, provider_keys
+from llm_cache import CachedLLM
+from llm_limits import ConcurrencyLimitedLLM, HedgedLLM
+from llm_pool import LLMPool, Endpoint
+from adaptive_limits import max_limit
+from instrumentation import InstrumentedLLM
+from fake_llm import FakeChatModel
 
 class LLMFactory:
     @staticmethod
     def create_llm(provider, model_name=None):
+        # 'pool' spreads calls over every key of every provider in
+        # LLM_POOL_CONFIG; a single provider with several keys is pooled over
+        # those keys; otherwise the provider's client is returned as before.
+        if provider == 'pool':
+            endpoints = [e for p in LLMFactory.pool_providers() for e in LLMFactory.create_endpoints(p)]
+            llm = LLMPool(endpoints)
+            model_name = "+".join(sorted({e.model for e in endpoints}))
+            temperature = max(LLM_CONFIGS[e.provider]['temperature'] for e in endpoints)
+        else:
+            model_name, temperature = LLMFactory.model_settings(provider, model_name)
+            endpoints = LLMFactory.create_endpoints(provider, model_name)
+            llm = LLMPool(endpoints) if len(endpoints) > 1 else endpoints[0].llm
+        
+        if HEDGING_CONFIG['enabled']:
+            llm = HedgedLLM(llm, max_concurrency=LLMFactory.max_concurrency(provider))
+        if PERFORMANCE_CONFIG['llm_cache']['enabled']:
+            return CachedLLM(llm, provider, model_name, temperature)
+        return llm
+    
+    @staticmethod
+    def pool_providers():
+        return [p for p in LLM_POOL_CONFIG['providers'] if provider_keys(p) or p == 'fake']
+    
+    @staticmethod
+    def max_concurrency(provider):
+        # Calls the endpoints of create_llm(provider) can run at once when every
+        # key's limiter is at its ceiling.
+        providers = LLMFactory.pool_providers() if provider == 'pool' else [provider]
+        return sum(max_limit(p) * max(1, len(provider_keys(p))) for p in providers)
+    
+    @staticmethod
+    def create_endpoints(provider, model_name=None):
+        model_name, _ = LLMFactory.model_settings(provider, model_name)
+        keys = provider_keys(provider) or ([None] if provider == 'fake' else [])
+        if not keys:
+            raise ValueError(f"No API key configured for provider: {provider}")
+        endpoints = []
+        for i, key in enumerate(keys):
+            name = f"{provider}:{i}"
+            client = LLMFactory.create_client(provider, model_name, key)
+            endpoints.append(Endpoint(
+                name, provider, model_name,
+                ConcurrencyLimitedLLM(InstrumentedLLM(client), provider, name),
+                LLM_POOL_CONFIG['weights'].get(provider, 1.0)
+            ))
+        return endpoints
+    
+    @staticmethod
+    def model_settings(provider, model_name=None):
+        if provider == 'gemini':
+            return LLM_CONFIGS['gemini']['model'], LLM_CONFIGS['gemini']['temperature']
+        if provider == 'groq':
+            return model_name or 'llama-3.3-70b-versatile', LLM_CONFIGS['groq']['temperature']
+        if provider == 'fake':
+            return LLM_CONFIGS['fake']['model'], LLM_CONFIGS['fake']['temperature']
+        raise ValueError(f"Unknown provider: {provider}")
+    
+    @staticmethod
+    def create_client(provider, model_name, api_key):
         if provider == 'gemini':
             return ChatGoogleGenerativeAI(
-                model=LLM_CONFIGS['gemini']['model'],
+                model=model_name,
                 temperature=LLM_CONFIGS['gemini']['temperature'],
-                google_api_key=os.getenv('GOOGLE_API_KEY'),
+                google_api_key=api_key,
                 max_output_tokens=4096
             )
-        elif provider == 'groq':
-            if not model_name:
-                model_name = 'llama-3.3-70b-versatile'
+        if provider == 'groq':
             return ChatGroq(
                 model=model_name,
                 temperature=LLM_CONFIGS['groq']['temperature'],
-                groq_api_key=os.getenv('GROQ_API_KEY'),
+                groq_api_key=api_key,
                 max_tokens=4096
             )
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
+        if provider == 'fake':
+            # Offline scripted model for benchmarks; needs no API key.
+            settings = LLM_CONFIGS['fake']
+            return FakeChatModel(
+                latency=settings['latency'],
+                jitter=settings['jitter'],
+                failure_rate=settings['failure_rate'],
+                malformed_rate=settings['malformed_rate'],
+                seed=settings['seed']
+            )
+        raise ValueError(f"Unknown provider: {provider}")
     
     @staticmethod
     def get_available_models(config):
@@ -41,4 +112,11 @@ class LLMFactory:
                     'model': model_id,
                     'display': f'Groq - {display_name}'
                 })
-        return models
\ No newline at end of file
+        pooled = [p for p in LLM_POOL_CONFIG['providers'] if p in config['available_llms']]
+        if len(pooled) > 1:
+            models.append({
+                'provider': 'pool',
+                'model': None,
+                'display': f"Pool - {' + '.join(LLM_CONFIGS[p].get('display_name', p.title()) for p in pooled)} (load-balanced, failover)"
+            })
+        return models
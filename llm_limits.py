@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from adaptive_limits import get_limiter, max_limit
+from instrumentation import current_call_site
+from config import HEDGING_CONFIG
+
+# Limits are per provider, but each API key of a provider (pool endpoint) gets
+# its own limiter since quota is granted per key.
+class ConcurrencyLimitedLLM:
+    def __init__(self, llm, provider, name=None):
+        self.llm = llm
+        self.provider = provider
+        self.name = name
+        self.limiter = get_limiter(provider, name)
+    
+    def invoke(self, prompt, *args, **kwargs):
+        with self.limiter.slot():
+            return self.llm.invoke(prompt, *args, **kwargs)
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        async with self.limiter.aslot():
+            return await self.llm.ainvoke(prompt, *args, **kwargs)
+    
+    def stream(self, prompt, *args, **kwargs):
+        with self.limiter.slot():
+            yield from self.llm.stream(prompt, *args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+_hedge_executor = None
+_hedge_executor_workers = 0
+_hedge_executor_lock = threading.Lock()
+
+def _get_hedge_executor(workers):
+    # One pool for every hedged client, as wide as the widest one needs: a queued
+    # call would count its wait as latency and back the limiters off for
+    # nothing. A pool that is outgrown finishes its calls and is replaced.
+    global _hedge_executor, _hedge_executor_workers
+    with _hedge_executor_lock:
+        if _hedge_executor is None or _hedge_executor_workers < workers:
+            if _hedge_executor is not None:
+                _hedge_executor.shutdown(wait=False)
+            _hedge_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-hedge')
+            _hedge_executor_workers = workers
+        return _hedge_executor
+
+def quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+# Cuts tail latency on the per-claim calls: once a site has enough latency
+# samples, a call still running after the site's p95 is issued a second time and
+# whichever copy answers first is used. Sitting above the pool, the copy lands
+# on the least loaded key. Async losers are cancelled; a sync loser finishes in
+# the background and its answer is dropped. Streams are never hedged.
+# max_concurrency is the limiters' ceiling for the wrapped client; sync calls run
+# on a pool with room for that many primaries and a hedge for each.
+class HedgedLLM:
+    def __init__(self, llm, settings=None, max_concurrency=None):
+        self.llm = llm
+        self.settings = settings or HEDGING_CONFIG
+        self.workers = 2 * (max_concurrency or max_limit('default'))
+        self.sites = {}
+        self._lock = threading.Lock()
+    
+    def invoke(self, prompt, *args, **kwargs):
+        site = current_call_site()
+        delay = self._hedge_delay(site)
+        if delay is None:
+            return self._timed(site, self.llm.invoke, prompt, *args, **kwargs)
+        
+        executor = _get_hedge_executor(self.workers)
+        primary = executor.submit(contextvars.copy_context().run, self._timed, site, self.llm.invoke, prompt, *args, **kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        if not self._take_hedge(site):
+            return primary.result()
+        hedge = executor.submit(contextvars.copy_context().run, self._timed, site, self.llm.invoke, prompt, *args, **kwargs)
+        
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._count_winner(site, future is hedge)
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        site = current_call_site()
+        delay = self._hedge_delay(site)
+        if delay is None:
+            return await self._atimed(site, self.llm.ainvoke, prompt, *args, **kwargs)
+        
+        primary = asyncio.ensure_future(self._atimed(site, self.llm.ainvoke, prompt, *args, **kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._take_hedge(site):
+                return await primary
+            hedge = asyncio.ensure_future(self._atimed(site, self.llm.ainvoke, prompt, *args, **kwargs))
+            tasks.append(hedge)
+            
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._count_winner(site, task is hedge)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def stream(self, prompt, *args, **kwargs):
+        return self.llm.stream(prompt, *args, **kwargs)
+    
+    def hedge_stats(self):
+        with self._lock:
+            return {
+                site: {
+                    'calls': entry['calls'],
+                    'hedged': entry['hedged'],
+                    'hedge_wins': entry['hedge_wins'],
+                    'hedge_delay': quantile(entry['latencies'], self.settings['quantile']) if entry['latencies'] else None
+                }
+                for site, entry in self.sites.items()
+            }
+    
+    def _entry(self, site):
+        if site not in self.sites:
+            self.sites[site] = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'latencies': deque(maxlen=self.settings['window'])}
+        return self.sites[site]
+    
+    def _hedge_delay(self, site):
+        with self._lock:
+            entry = self._entry(site)
+            entry['calls'] += 1
+            if site not in self.settings['sites'] or len(entry['latencies']) < self.settings['min_samples']:
+                return None
+            return max(self.settings['min_delay'], quantile(entry['latencies'], self.settings['quantile']))
+    
+    def _take_hedge(self, site):
+        with self._lock:
+            entry = self._entry(site)
+            if entry['hedged'] >= self.settings['max_hedge_ratio'] * entry['calls']:
+                return False
+            entry['hedged'] += 1
+            return True
+    
+    def _count_winner(self, site, hedge_won):
+        with self._lock:
+            self._entry(site)['hedge_wins'] += hedge_won
+    
+    def _observe(self, site, seconds):
+        with self._lock:
+            self._entry(site)['latencies'].append(seconds)
+    
+    def _timed(self, site, call, *args, **kwargs):
+        start = time.perf_counter()
+        result = call(*args, **kwargs)
+        self._observe(site, time.perf_counter() - start)
+        return result
+    
+    async def _atimed(self, site, call, *args, **kwargs):
+        start = time.perf_counter()
+        result = await call(*args, **kwargs)
+        self._observe(site, time.perf_counter() - start)
+        return result
+    
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from adaptive_limits import is_rate_limit_error
+from config import LLM_POOL_CONFIG
+
+class PoolExhaustedError(Exception):
+    pass
+
+class Endpoint:
+    def __init__(self, name, provider, model, llm, weight=1.0):
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.llm = llm
+        self.weight = weight
+        self.inflight = 0
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.latency = None
+    
+    def available(self, now):
+        return now >= self.open_until
+    
+    def snapshot(self, now):
+        return {
+            'provider': self.provider,
+            'model': self.model,
+            'weight': self.weight,
+            'healthy': self.available(now),
+            'cooldown_seconds': max(0.0, self.open_until - now),
+            'inflight': self.inflight,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rate_limited': self.rate_limited,
+            'avg_latency': self.latency
+        }
+
+# Spreads calls over several API keys and providers. Each call goes to the best
+# healthy endpoint (least loaded relative to its weight, or weighted-random) and
+# fails over to the next one on error. An endpoint that keeps failing, or
+# reports a rate limit, is taken out of rotation for a cooldown that doubles on
+# every further failure; once the cooldown ends it gets traffic again and a
+# success clears its record. When every endpoint is cooling down the one that
+# recovers first is still tried rather than failing the call outright.
+class LLMPool:
+    def __init__(self, endpoints, routing=None, settings=None, seed=None):
+        if not endpoints:
+            raise ValueError("LLMPool needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.settings = settings or LLM_POOL_CONFIG
+        self.routing = routing or self.settings['routing']
+        self.failovers = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def invoke(self, prompt, *args, **kwargs):
+        error = None
+        for endpoint in self._candidates():
+            start = time.perf_counter()
+            try:
+                result = endpoint.llm.invoke(prompt, *args, **kwargs)
+            except Exception as e:
+                error = self._failed(endpoint, e)
+                continue
+            finally:
+                self._release(endpoint)
+            self._succeeded(endpoint, time.perf_counter() - start)
+            return result
+        raise PoolExhaustedError(f"All {len(self.endpoints)} LLM endpoints failed: {error}") from error
+    
+    async def ainvoke(self, prompt, *args, **kwargs):
+        error = None
+        for endpoint in self._candidates():
+            start = time.perf_counter()
+            try:
+                result = await endpoint.llm.ainvoke(prompt, *args, **kwargs)
+            except Exception as e:
+                error = self._failed(endpoint, e)
+                continue
+            finally:
+                self._release(endpoint)
+            self._succeeded(endpoint, time.perf_counter() - start)
+            return result
+        raise PoolExhaustedError(f"All {len(self.endpoints)} LLM endpoints failed: {error}") from error
+    
+    def stream(self, prompt, *args, **kwargs):
+        # Fails over only until the first chunk; a stream that breaks part-way
+        # cannot be replayed on another endpoint without duplicating output. A
+        # stream the consumer closes early still releases its endpoint.
+        error = None
+        for endpoint in self._candidates():
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in endpoint.llm.stream(prompt, *args, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                error = self._failed(endpoint, e)
+                if started:
+                    raise
+                continue
+            finally:
+                self._release(endpoint)
+            self._succeeded(endpoint, time.perf_counter() - start)
+            return
+        raise PoolExhaustedError(f"All {len(self.endpoints)} LLM endpoints failed: {error}") from error
+    
+    def pool_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'routing': self.routing,
+                'failovers': self.failovers,
+                'endpoints': {e.name: e.snapshot(now) for e in self.endpoints}
+            }
+    
+    def _candidates(self):
+        tried = set()
+        while True:
+            with self._lock:
+                endpoint = self._choose(tried)
+                if endpoint is None:
+                    return
+                if tried:
+                    self.failovers += 1
+                tried.add(endpoint.name)
+                endpoint.inflight += 1
+                endpoint.calls += 1
+            yield endpoint
+    
+    def _choose(self, tried):
+        now = time.monotonic()
+        remaining = [e for e in self.endpoints if e.name not in tried]
+        healthy = [e for e in remaining if e.available(now)]
+        if not healthy:
+            return min(remaining, key=lambda e: e.open_until, default=None)
+        if self.routing == 'weighted':
+            return self._random.choices(healthy, weights=[e.weight for e in healthy])[0]
+        return min(healthy, key=lambda e: (e.inflight / e.weight, e.latency or 0.0))
+    
+    def _release(self, endpoint):
+        # Runs however the call ends, including a cancelled call or a closed stream.
+        with self._lock:
+            endpoint.inflight -= 1
+    
+    def _succeeded(self, endpoint, seconds):
+        with self._lock:
+            endpoint.consecutive_failures = 0
+            endpoint.open_until = 0.0
+            alpha = self.settings['latency_smoothing']
+            endpoint.latency = seconds if endpoint.latency is None else (1 - alpha) * endpoint.latency + alpha * seconds
+    
+    def _failed(self, endpoint, error):
+        rate_limited = is_rate_limit_error(error)
+        with self._lock:
+            endpoint.errors += 1
+            endpoint.consecutive_failures += 1
+            endpoint.rate_limited += rate_limited
+            threshold = self.settings['failure_threshold']
+            if rate_limited or endpoint.consecutive_failures >= threshold:
+                strikes = max(0, endpoint.consecutive_failures - threshold)
+                cooldown = min(self.settings['max_cooldown'], self.settings['cooldown'] * 2 ** strikes)
+                endpoint.open_until = time.monotonic() + cooldown
+        print(f"⚠️ LLM endpoint {endpoint.name} failed{' (rate limited)' if rate_limited else ''}: {str(error)[:120]}")
+        return error
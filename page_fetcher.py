@@ -0,0 +1,338 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from cache_store import PersistentCache
+from config import FETCH_CONFIG
+
+SKIP_TAGS = {'title', 'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'svg', 'iframe', 'button', 'select', 'template'}
+BLOCK_TAGS = {
+    'p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'td', 'th', 'tr', 'dd', 'dt',
+    'div', 'section', 'article', 'main', 'br', 'figcaption', 'table', 'ul', 'ol'
+}
+MAIN_TAGS = {'article', 'main'}
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+CHARSET_PATTERN = re.compile(r'charset=([\w-]+)', re.IGNORECASE)
+
+class MainTextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._buffer = []
+        self._link_chars = 0
+        self._skip = 0
+        self._links = 0
+        self._main = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == 'a':
+            self._links += 1
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in MAIN_TAGS:
+            self._main += 1
+    
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == 'a':
+            self._links = max(0, self._links - 1)
+        if tag in MAIN_TAGS:
+            self._main = max(0, self._main - 1)
+    
+    def handle_data(self, data):
+        if not self._skip:
+            self._buffer.append(data)
+            if self._links:
+                self._link_chars += len(data.strip())
+    
+    def close(self):
+        super().close()
+        self._flush()
+    
+    def _flush(self):
+        text = " ".join("".join(self._buffer).split())
+        if text:
+            self.blocks.append({'text': text, 'link_chars': self._link_chars, 'main': self._main > 0})
+        self._buffer = []
+        self._link_chars = 0
+
+def extract_main_text(html, min_block_words=None):
+    # Keeps prose blocks: enough words to be a sentence and mostly not link text
+    # (menus, tag clouds, related-article lists). When the page marks its main
+    # content with <article>/<main>, blocks outside it are dropped.
+    min_block_words = min_block_words or FETCH_CONFIG['min_block_words']
+    parser = MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    
+    blocks = [b for b in parser.blocks if len(b['text'].split()) >= min_block_words and b['link_chars'] < len(b['text']) / 2]
+    main = [b for b in blocks if b['main']]
+    if sum(len(b['text']) for b in main) >= FETCH_CONFIG['min_text_chars']:
+        blocks = main
+    return "\n".join(b['text'] for b in blocks)
+
+def content_hash(text):
+    return hashlib.sha1(" ".join(text.lower().split()).encode('utf-8')).hexdigest()
+
+_cache_stores = {}
+_cache_stores_lock = threading.Lock()
+
+def get_page_cache_store(settings=None):
+    settings = (settings or FETCH_CONFIG)['cache']
+    with _cache_stores_lock:
+        if settings['path'] not in _cache_stores:
+            _cache_stores[settings['path']] = PersistentCache(settings['path'], 'pages', settings['ttl'], settings['max_entries'])
+        return _cache_stores[settings['path']]
+
+# Cache entries keep the page's validators; after revalidate_after seconds the
+# page is requested again with If-None-Match/If-Modified-Since and a 304 reuses
+# the stored text, as does a revalidation that fails.
+class _PageFetcherBase:
+    def __init__(self, settings=None):
+        self.settings = settings or FETCH_CONFIG
+        self.cache = get_page_cache_store(self.settings) if self.settings['cache']['enabled'] else None
+        self.stats = {
+            'fetched': 0, 'cache_hits': 0, 'not_modified': 0, 'stale_served': 0,
+            'failed': 0, 'skipped': 0, 'truncated': 0, 'duplicates': 0
+        }
+        self._stats_lock = threading.Lock()
+    
+    def merge(self, sources, texts):
+        # Fetched text replaces the snippet when there is enough of it; a page whose
+        # text was already seen under another URL (mirrors, syndication) is dropped.
+        merged = []
+        seen = set()
+        for source, text in zip(sources, texts):
+            if text and len(text) >= self.settings['min_text_chars']:
+                digest = content_hash(text)
+                if digest in seen:
+                    self._count('duplicates')
+                    continue
+                seen.add(digest)
+                source = {**source, 'content': text[:self.settings['max_text_chars']], 'snippet': source.get('content', '')}
+            merged.append(source)
+        return merged
+    
+    def _cached(self, url):
+        if not self.cache:
+            return None, False
+        cached = self.cache.get(url)
+        if cached is None:
+            return None, False
+        return cached, time.time() - cached['checked'] < self.settings['revalidate_after']
+    
+    def _conditional_headers(self, cached):
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+    
+    def _not_modified(self, url, cached):
+        self._count('not_modified')
+        if self.cache:
+            self.cache.set(url, {**cached, 'checked': time.time()})
+        return cached['text']
+    
+    def _failed(self, cached):
+        # A page that cannot be revalidated is served stale from the cache rather
+        # than falling back to the search snippet.
+        if cached:
+            self._count('stale_served')
+            return cached['text']
+        self._count('failed')
+        return None
+    
+    def _store(self, url, headers, body, truncated):
+        self._count('fetched')
+        if truncated:
+            self._count('truncated')
+        content_type = headers.get('Content-Type', '')
+        match = CHARSET_PATTERN.search(content_type)
+        try:
+            html = body.decode(match.group(1) if match else 'utf-8', errors='replace')
+        except LookupError:
+            html = body.decode('utf-8', errors='replace')
+        text = html if content_type.startswith('text/plain') else extract_main_text(html)
+        if self.cache:
+            self.cache.set(url, {
+                'text': text,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'checked': time.time()
+            })
+        return text
+    
+    def _fetchable(self, url):
+        if urlparse(url).scheme in ('http', 'https'):
+            return True
+        self._count('skipped')
+        return False
+    
+    def _is_text(self, status, headers):
+        return status == 200 and headers.get('Content-Type', 'text/html').split(';')[0].strip() in TEXT_CONTENT_TYPES
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def get_stats(self):
+        stats = dict(self.stats)
+        if self.cache:
+            stats['cache'] = self.cache.get_stats()
+        return stats
+
+class PageFetcher(_PageFetcherBase):
+    def __init__(self, settings=None):
+        super().__init__(settings)
+        pool_size = self.settings['pool_size']
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': self.settings['user_agent']})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+    
+    def fetch_sources(self, sources):
+        with ThreadPoolExecutor(max_workers=self.settings['pool_size']) as executor:
+            texts = list(executor.map(lambda source: self.fetch(source['url']), sources))
+        return self.merge(sources, texts)
+    
+    def fetch(self, url):
+        if not self._fetchable(url):
+            return None
+        cached, fresh = self._cached(url)
+        if fresh:
+            self._count('cache_hits')
+            return cached['text']
+        
+        try:
+            with self._host_slot(url):
+                with self.session.get(
+                    url,
+                    headers=self._conditional_headers(cached),
+                    timeout=(self.settings['connect_timeout'], self.settings['read_timeout']),
+                    stream=True
+                ) as response:
+                    if response.status_code == 304 and cached:
+                        return self._not_modified(url, cached)
+                    if not self._is_text(response.status_code, response.headers):
+                        self._count('skipped')
+                        return None
+                    body, truncated = self._read(response)
+        except requests.RequestException:
+            return self._failed(cached)
+        return self._store(url, response.headers, body, truncated)
+    
+    def _read(self, response):
+        limit = self.settings['max_bytes']
+        deadline = time.monotonic() + self.settings['read_timeout']
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(65536):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit or time.monotonic() > deadline:
+                return b"".join(chunks)[:limit], True
+        return b"".join(chunks), False
+    
+    @contextmanager
+    def _host_slot(self, url):
+        host = urlparse(url).hostname or ''
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.settings['per_host'])
+            slot = self._hosts[host]
+        with slot:
+            yield
+
+class AsyncPageFetcher(_PageFetcherBase):
+    def __init__(self, settings=None):
+        super().__init__(settings)
+        pool_size = self.settings['pool_size']
+        self._hosts = {}
+        self.client = httpx.AsyncClient(
+            headers={'User-Agent': self.settings['user_agent']},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(self.settings['read_timeout'], connect=self.settings['connect_timeout']),
+            follow_redirects=True
+        )
+    
+    async def fetch_sources(self, sources):
+        texts = await asyncio.gather(*[self.fetch(source['url']) for source in sources])
+        return self.merge(sources, texts)
+    
+    async def fetch(self, url):
+        if not self._fetchable(url):
+            return None
+        cached, fresh = self._cached(url)
+        if fresh:
+            self._count('cache_hits')
+            return cached['text']
+        
+        host = urlparse(url).hostname or ''
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.settings['per_host'])
+        try:
+            async with self._hosts[host]:
+                async with self.client.stream('GET', url, headers=self._conditional_headers(cached)) as response:
+                    if response.status_code == 304 and cached:
+                        return self._not_modified(url, cached)
+                    if not self._is_text(response.status_code, response.headers):
+                        self._count('skipped')
+                        return None
+                    body, truncated = await asyncio.wait_for(self._read(response), self.settings['read_timeout'])
+        except (httpx.HTTPError, asyncio.TimeoutError):
+            return self._failed(cached)
+        return self._store(url, response.headers, body, truncated)
+    
+    async def _read(self, response):
+        limit = self.settings['max_bytes']
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit:
+                return b"".join(chunks)[:limit], True
+        return b"".join(chunks), False
+    
+    async def aclose(self):
+        await self.client.aclose()
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+_async_fetchers = weakref.WeakKeyDictionary()
+
+def get_page_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = PageFetcher()
+        return _fetcher
+
+def get_async_page_fetcher():
+    # httpx.AsyncClient and the per-host semaphores are bound to the running loop.
+    loop = asyncio.get_running_loop()
+    if loop not in _async_fetchers:
+        _async_fetchers[loop] = AsyncPageFetcher()
+    return _async_fetchers[loop]
@@ -0,0 +1,307 @@
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+import time
+from tools import validate_with_search, avalidate_with_search
+from instrumentation import timed, ContextThreadPoolExecutor
+from budget import budget_allows
+from config import PERFORMANCE_CONFIG, PIPELINE_CONFIG
+
+_DONE = object()
+
+def stage_workers(settings, agent):
+    return {stage: count or agent.llm_concurrency for stage, count in settings['workers'].items()}
+
+# Claims flow source -> extraction -> heuristic score -> validation -> final
+# action through bounded queues, so a claim from the fastest source can be fully
+# scored while slower sources are still being extracted, and a stage that falls
+# behind blocks the ones feeding it instead of letting claims pile up in memory.
+# Items carry a (source index, claim index) key so the result keeps source order.
+class ClaimPipeline:
+    def __init__(self, agent, settings=None):
+        self.agent = agent
+        self.settings = settings or PIPELINE_CONFIG
+        self.stats = {'claims': 0, 'final_action_batches': 0}
+    
+    def run(self, sources):
+        # Generator: yields 'claims_extracted' and 'claim_scored' events while the
+        # stages run and returns the scored claims.
+        size = self.settings['queue_size']
+        source_q, claim_q, validate_q, action_q = (queue.Queue(maxsize=size) for _ in range(4))
+        events = queue.Queue()
+        results = []
+        results_lock = threading.Lock()
+        workers = stage_workers(self.settings, self.agent)
+        
+        threads = [self._thread(self._feed, sources, source_q, workers['extract'])]
+        threads += self._stage(self._extract(events), source_q, claim_q, workers['extract'], workers['score'])
+        threads += self._stage(self._score, claim_q, validate_q, workers['score'], workers['validate'])
+        threads += self._stage(self._validate, validate_q, action_q, workers['validate'], 1)
+        threads.append(self._thread(self._decide, action_q, results, results_lock, events))
+        for thread in threads:
+            thread.start()
+        
+        total = 0
+        while True:
+            event = events.get()
+            if event is _DONE:
+                break
+            if event['type'] == 'claims_extracted':
+                total += event['count']
+                event['total'] = total
+            yield event
+        for thread in threads:
+            thread.join()
+        
+        results.sort(key=lambda item: item[0])
+        claims = [claim for _, claim in results]
+        self.stats['claims'] = len(claims)
+        return claims
+    
+    def _feed(self, sources, outbox, consumers):
+        for item in enumerate(sources):
+            outbox.put(item)
+        for _ in range(consumers):
+            outbox.put(_DONE)
+    
+    def _stage(self, fn, inbox, outbox, count, consumers):
+        # The last worker of a stage to finish tells every downstream worker.
+        remaining = [count]
+        lock = threading.Lock()
+        
+        def work():
+            try:
+                while True:
+                    item = inbox.get()
+                    if item is _DONE:
+                        break
+                    for out in fn(item):
+                        outbox.put(out)
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(consumers):
+                        outbox.put(_DONE)
+        
+        return [self._thread(work) for _ in range(count)]
+    
+    def _thread(self, target, *args):
+        # Each stage thread runs in a copy of the caller's context, so LLM calls
+        # keep the research budget they belong to.
+        return threading.Thread(target=contextvars.copy_context().run, args=(target, *args), daemon=True)
+    
+    def _extract(self, events):
+        def extract(item):
+            index, source = item
+            claims = self.agent._extract_source(source)
+            events.put({'type': 'claims_extracted', 'source': source['url'], 'count': len(claims)})
+            for position, claim in enumerate(claims):
+                yield (index, position), claim
+        return extract
+    
+    def _score(self, item):
+        key, claim = item
+        needs_validation = False
+        try:
+            needs_validation = self.agent._apply_score(claim, self.agent._safe_score(claim))
+        except Exception as e:
+            self.agent._mark_failed(claim, e)
+        yield key, claim, needs_validation
+    
+    def _validate(self, item):
+        key, claim, needs_validation = item
+        if needs_validation and not budget_allows('validation'):
+            self.agent._skip_validation(claim)
+        elif needs_validation:
+            try:
+                evidence = "No evidence"
+                if PERFORMANCE_CONFIG['parallel_validation']:
+                    with timed('evidence_search'):
+                        evidence = validate_with_search(claim['text'], os.getenv('SERPER_API_KEY'))
+                self.agent._apply_validation(claim, self.agent.credibility.validate_claim(claim['text'], claim['credibility_score'], evidence))
+            except Exception as e:
+                self.agent._mark_failed(claim, e)
+        yield key, claim
+    
+    def _decide(self, inbox, results, results_lock, events):
+        # Claims still needing a final action are batched; a partial batch is sent
+        # once its oldest claim has waited final_action_linger seconds.
+        batch_size = PERFORMANCE_CONFIG['final_action_batch_size'] if PERFORMANCE_CONFIG['batch_final_action'] else 1
+        linger = self.settings['final_action_linger']
+        pending = []
+        deadline = None
+        
+        def finish(items):
+            with results_lock:
+                results.extend(items)
+            for _, claim in items:
+                events.put(self._scored_event(claim))
+        
+        def decide(items):
+            try:
+                self.agent._apply_final_actions([claim for _, claim in items])
+            except Exception as e:
+                for _, claim in items:
+                    self.agent._mark_failed(claim, e)
+            finish(items)
+        
+        try:
+            with ContextThreadPoolExecutor(max_workers=stage_workers(self.settings, self.agent)['final_action']) as executor:
+                while True:
+                    try:
+                        item = inbox.get(timeout=max(0, deadline - time.monotonic()) if pending else None)
+                    except queue.Empty:
+                        item = None
+                    if item is _DONE:
+                        break
+                    if item is not None and 'action' in item[1]:
+                        finish([item])
+                        continue
+                    if item is not None:
+                        pending.append(item)
+                        if len(pending) == 1:
+                            deadline = time.monotonic() + linger
+                    if pending and (len(pending) >= batch_size or item is None):
+                        executor.submit(decide, pending)
+                        self.stats['final_action_batches'] += 1
+                        pending = []
+                if pending:
+                    executor.submit(decide, pending)
+                    self.stats['final_action_batches'] += 1
+        finally:
+            events.put(_DONE)
+    
+    def _scored_event(self, claim):
+        return {
+            'type': 'claim_scored',
+            'source': claim.get('source'),
+            'credibility_score': claim.get('credibility_score', 0),
+            'action': claim.get('action')
+        }
+
+class AsyncClaimPipeline:
+    def __init__(self, agent, settings=None):
+        self.agent = agent
+        self.settings = settings or PIPELINE_CONFIG
+        self.stats = {'claims': 0, 'final_action_batches': 0}
+    
+    async def run(self, sources):
+        size = self.settings['queue_size']
+        source_q, claim_q, validate_q, action_q = (asyncio.Queue(maxsize=size) for _ in range(4))
+        results = []
+        workers = stage_workers(self.settings, self.agent)
+        
+        tasks = [asyncio.ensure_future(self._feed(sources, source_q, workers['extract']))]
+        tasks += self._stage(self._extract, source_q, claim_q, workers['extract'], workers['score'])
+        tasks += self._stage(self._score, claim_q, validate_q, workers['score'], workers['validate'])
+        tasks += self._stage(self._validate, validate_q, action_q, workers['validate'], 1)
+        tasks.append(asyncio.ensure_future(self._decide(action_q, results)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        results.sort(key=lambda item: item[0])
+        claims = [claim for _, claim in results]
+        self.stats['claims'] = len(claims)
+        return claims
+    
+    async def _feed(self, sources, outbox, consumers):
+        for item in enumerate(sources):
+            await outbox.put(item)
+        for _ in range(consumers):
+            await outbox.put(_DONE)
+    
+    def _stage(self, fn, inbox, outbox, count, consumers):
+        remaining = [count]
+        
+        async def work():
+            try:
+                while True:
+                    item = await inbox.get()
+                    if item is _DONE:
+                        break
+                    for out in await fn(item):
+                        await outbox.put(out)
+            finally:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    for _ in range(consumers):
+                        await outbox.put(_DONE)
+        
+        return [asyncio.ensure_future(work()) for _ in range(count)]
+    
+    async def _extract(self, item):
+        index, source = item
+        claims = await self.agent._aextract_source(source)
+        return [((index, position), claim) for position, claim in enumerate(claims)]
+    
+    async def _score(self, item):
+        key, claim = item
+        needs_validation = False
+        try:
+            needs_validation = self.agent._apply_score(claim, await self.agent._asafe_score(claim))
+        except Exception as e:
+            self.agent._mark_failed(claim, e)
+        return [(key, claim, needs_validation)]
+    
+    async def _validate(self, item):
+        key, claim, needs_validation = item
+        if needs_validation and not budget_allows('validation'):
+            self.agent._skip_validation(claim)
+        elif needs_validation:
+            try:
+                evidence = "No evidence"
+                if PERFORMANCE_CONFIG['parallel_validation']:
+                    with timed('evidence_search'):
+                        evidence = await avalidate_with_search(claim['text'], os.getenv('SERPER_API_KEY'))
+                self.agent._apply_validation(claim, await self.agent.credibility.avalidate_claim(claim['text'], claim['credibility_score'], evidence))
+            except Exception as e:
+                self.agent._mark_failed(claim, e)
+        return [(key, claim)]
+    
+    async def _decide(self, inbox, results):
+        batch_size = PERFORMANCE_CONFIG['final_action_batch_size'] if PERFORMANCE_CONFIG['batch_final_action'] else 1
+        linger = self.settings['final_action_linger']
+        pending = []
+        deadline = None
+        decisions = []
+        
+        async def decide(items):
+            try:
+                await self.agent._aapply_final_actions([claim for _, claim in items])
+            except Exception as e:
+                for _, claim in items:
+                    self.agent._mark_failed(claim, e)
+            results.extend(items)
+        
+        while True:
+            try:
+                if pending:
+                    item = await asyncio.wait_for(inbox.get(), max(0, deadline - time.monotonic()))
+                else:
+                    item = await inbox.get()
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                break
+            if item is not None and 'action' in item[1]:
+                results.append(item)
+                continue
+            if item is not None:
+                pending.append(item)
+                if len(pending) == 1:
+                    deadline = time.monotonic() + linger
+            if pending and (len(pending) >= batch_size or item is None):
+                decisions.append(asyncio.ensure_future(decide(pending)))
+                self.stats['final_action_batches'] += 1
+                pending = []
+        if pending:
+            decisions.append(asyncio.ensure_future(decide(pending)))
+            self.stats['final_action_batches'] += 1
+        await asyncio.gather(*decisions)
@@ -0,0 +1,169 @@
+from system_prompts import RECONCILIATION_PROMPT
+import asyncio
+import json
+from claim_index import claims_conflict
+from instrumentation import call_site, timed, record_fallback, ContextThreadPoolExecutor
+from budget import truncate_tokens, budget_allows
+from llm_cache import invalidate_reply
+from config import CREDIBILITY_PARAMS, PERFORMANCE_CONFIG
+
+RESOLUTIONS = ('keep_existing', 'replace_with_new', 'merge_both')
+
+class ReconciliationEngine:
+    def __init__(self, llm):
+        self.llm = llm
+        self.params = CREDIBILITY_PARAMS['reconciliation']
+        self.stats = {'local_resolutions': 0, 'llm_resolutions': 0, 'llm_batches': 0}
+    
+    def pair(self, new, index):
+        pairing = {'conflicts': [], 'reinforcements': [], 'new_information': []}
+        for claim in new:
+            match = index.best_match(claim['text'])
+            if match is None:
+                pairing['new_information'].append(claim)
+            elif claims_conflict(match['text'], claim['text']):
+                pairing['conflicts'].append((match, claim))
+            else:
+                pairing['reinforcements'].append((match, claim))
+        return pairing
+    
+    def reconcile(self, existing, pairing, index, approach):
+        batches = self._batches(pairing['conflicts'])
+        with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+            results = list(executor.map(self._resolve_batch, batches))
+        return self._apply(existing, pairing, index, approach, self._collect(batches, results))
+    
+    async def areconcile(self, existing, pairing, index, approach):
+        batches = self._batches(pairing['conflicts'])
+        results = await asyncio.gather(*[self._aresolve_batch(b) for b in batches])
+        return self._apply(existing, pairing, index, approach, self._collect(batches, results))
+    
+    def _batches(self, conflicts):
+        # Conflicts with a clear credibility gap follow the configured merge strategy
+        # locally; only close calls are worth an LLM judgement.
+        ambiguous = [(i, old, new) for i, (old, new) in enumerate(conflicts)
+                     if abs(old['credibility_score'] - new['credibility_score']) < self.params['decisive_margin']]
+        batch_size = self.params['batch_size']
+        return [ambiguous[start:start + batch_size] for start in range(0, len(ambiguous), batch_size)]
+    
+    def _collect(self, batches, results):
+        self.stats['llm_batches'] += len(batches)
+        resolved = {}
+        for batch, resolutions in zip(batches, results):
+            for (i, _, _), resolution in zip(batch, resolutions):
+                if resolution:
+                    resolved[i] = resolution
+        self.stats['llm_resolutions'] += len(resolved)
+        return resolved
+    
+    def _apply(self, existing, pairing, index, approach, resolved):
+        # The index is only for matching: it holds one claim per wording, while
+        # the merge keeps every existing claim, same-text claims from other
+        # sources included.
+        merged = list(existing)
+        positions = {id(c): i for i, c in enumerate(merged)}
+        
+        def append(claim):
+            positions[id(claim)] = len(merged)
+            merged.append(claim)
+            index.add(claim)
+        
+        def replace(old, claim):
+            position = positions.pop(id(old))
+            positions[id(claim)] = position
+            merged[position] = claim
+            index.remove(old)
+            index.add(claim)
+        
+        for i, (old, new) in enumerate(pairing['conflicts']):
+            if id(old) not in positions:
+                # An earlier resolution already replaced this claim.
+                append(new)
+                continue
+            resolution = resolved.get(i) or self._local_resolution(old, new)
+            if resolution['resolution'] == 'replace_with_new':
+                replace(old, new)
+            elif resolution['resolution'] == 'merge_both':
+                append(new)
+                old.setdefault('conflicts_with', []).append(new['text'])
+                new.setdefault('conflicts_with', []).append(old['text'])
+            new['reconciliation'] = resolution
+        
+        for old, new in pairing['reinforcements']:
+            if id(old) not in positions:
+                continue
+            if approach == 'regenerate' and new['credibility_score'] > old['credibility_score']:
+                replace(old, new)
+                new.setdefault('reinforced_by', []).append(old['source'])
+            else:
+                old.setdefault('reinforced_by', []).append(new['source'])
+        
+        for claim in pairing['new_information']:
+            match = index.duplicate_of(claim['text'])
+            if match is None:
+                append(claim)
+            elif approach == 'regenerate' and claim['credibility_score'] > match['credibility_score']:
+                replace(match, claim)
+        
+        if approach == 'regenerate':
+            merged.sort(key=lambda x: x['credibility_score'], reverse=True)
+        return merged
+    
+    def _local_resolution(self, old, new):
+        self.stats['local_resolutions'] += 1
+        if CREDIBILITY_PARAMS['update_merge_strategy'] == 'highest_credibility' and new['credibility_score'] > old['credibility_score']:
+            return {'resolution': 'replace_with_new', 'reason': 'New claim has higher credibility'}
+        return {'resolution': 'keep_existing', 'reason': 'Existing claim has equal or higher credibility'}
+    
+    def _resolve_batch(self, batch):
+        # Without budget for the call the batch falls back to local resolutions.
+        if not budget_allows('reconciliation'):
+            return [None] * len(batch)
+        prompt = self._reconciliation_prompt(batch)
+        return self._parse_resolutions(self._invoke(prompt), batch, prompt)
+    
+    async def _aresolve_batch(self, batch):
+        if not budget_allows('reconciliation'):
+            return [None] * len(batch)
+        prompt = self._reconciliation_prompt(batch)
+        return self._parse_resolutions(await self._ainvoke(prompt), batch, prompt)
+    
+    def _invoke(self, prompt):
+        with timed('reconciliation'), call_site('reconciliation'):
+            try:
+                return self.llm.invoke(prompt).content
+            except Exception:
+                return None
+    
+    async def _ainvoke(self, prompt):
+        with timed('reconciliation'), call_site('reconciliation'):
+            try:
+                return (await self.llm.ainvoke(prompt)).content
+            except Exception:
+                return None
+    
+    def _reconciliation_prompt(self, batch):
+        return RECONCILIATION_PROMPT.format(conflicts="\n".join(
+            f"[{n}] EXISTING: {truncate_tokens(old['text'], 'short_claim')} (Score: {old['credibility_score']:.1f}, Source Type: {old['source_type']}) | "
+            f"NEW: {truncate_tokens(new['text'], 'short_claim')} (Score: {new['credibility_score']:.1f}, Source Type: {new['source_type']})"
+            for n, (_, old, new) in enumerate(batch)
+        ))
+    
+    def _parse_resolutions(self, content, batch, prompt):
+        parsed = {}
+        try:
+            for entry in json.loads(content):
+                if isinstance(entry, dict) and isinstance(entry.get('index'), int):
+                    parsed[entry['index']] = entry
+        except Exception:
+            record_fallback('reconciliation', content)
+            invalidate_reply(self.llm, prompt)
+        
+        resolutions = []
+        for n in range(len(batch)):
+            entry = parsed.get(n, {})
+            if entry.get('resolution') in RESOLUTIONS:
+                resolutions.append({'resolution': entry['resolution'], 'reason': entry.get('reason', 'LLM resolution')})
+            else:
+                resolutions.append(None)
+        return resolutions
@@ -0,0 +1,179 @@
+from system_prompts import REPORT_SECTION_PROMPT
+import asyncio
+import hashlib
+import json
+from config import CREDIBILITY_PARAMS, PERFORMANCE_CONFIG
+from instrumentation import call_site, record_fallback, ContextThreadPoolExecutor
+from budget import budget_allows
+
+# Claim fields that show up in a report section; a section is regenerated only
+# when one of these changes for one of its claims.
+SECTION_FIELDS = (
+    'text', 'credibility_score', 'source_type', 'action', 'action_reasoning', 'score_reasoning',
+    'validation', 'validation_reasoning', 'reinforced_by', 'conflicts_with'
+)
+
+def claim_line(claim):
+    line = f"- {claim['text']} (Score: {claim['credibility_score']:.1f}, Reason: {'; '.join(claim.get('score_reasoning', []))}, Decision: {claim.get('action')} because {claim.get('action_reasoning', 'n/a')}"
+    if claim.get('validation'):
+        line += f", Validation: {claim['validation']} - {claim.get('validation_reasoning', 'none')}"
+    if claim.get('reinforced_by'):
+        line += f", Reinforced by: {', '.join(claim['reinforced_by'])}"
+    if claim.get('conflicts_with'):
+        line += f", Conflicts with: {' | '.join(claim['conflicts_with'])}"
+    return line + ")"
+
+def section_fingerprint(claims):
+    payload = [{field: c.get(field) for field in SECTION_FIELDS} for c in claims]
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+# A report is a list of per-source sections, each remembering the fingerprint of
+# the claims it was written from. Rebuilding after an update only calls the LLM
+# for sections whose fingerprint moved; the rest are spliced back in unchanged.
+class ReportBuilder:
+    def __init__(self, llm):
+        self.llm = llm
+    
+    def build(self, topic, claims, sources, previous=None):
+        sections, pending = self._plan(claims, previous or {})
+        with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+            contents = list(executor.map(lambda key: self._write_section(topic, sections[key]['claims']), pending))
+        return self._assemble(topic, sections, pending, contents, sources)
+    
+    async def abuild(self, topic, claims, sources, previous=None):
+        sections, pending = self._plan(claims, previous or {})
+        contents = await asyncio.gather(*[self._awrite_section(topic, sections[key]['claims']) for key in pending])
+        return self._assemble(topic, sections, pending, contents, sources)
+    
+    def _plan(self, claims, previous):
+        medium = CREDIBILITY_PARAMS['thresholds']['medium']
+        grouped = {}
+        for claim in claims:
+            if claim.get('credibility_score', 0) >= medium:
+                grouped.setdefault(claim.get('source', 'unknown'), []).append(claim)
+        
+        sections = {}
+        pending = []
+        for source, group in grouped.items():
+            fingerprint = section_fingerprint(group)
+            cached = previous.get(source)
+            if cached and cached['fingerprint'] == fingerprint:
+                sections[source] = {**cached, 'claims': group}
+            else:
+                sections[source] = {'fingerprint': fingerprint, 'claims': group}
+                pending.append(source)
+        return sections, pending
+    
+    def stream_build(self, topic, claims, sources, previous=None):
+        # Streams the top pending section token by token while the other pending
+        # sections are written concurrently, then emits everything in report order.
+        # The generator returns the same (report, sections, stats) triple as build().
+        sections, pending = self._plan(claims, previous or {})
+        ordered = self._ordered(sections)
+        streamed = next((source for source in ordered if source in pending), None)
+        titles = {s['url']: s.get('title') for s in sources}
+        
+        pieces = []
+        with ContextThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG['max_concurrent_requests']) as executor:
+            futures = {key: executor.submit(self._write_section, topic, sections[key]['claims']) for key in pending if key != streamed}
+            yield from self._collect(pieces, self._title(topic, ordered))
+            for source in ordered:
+                section = sections[source]
+                yield from self._collect(pieces, [self._heading(source, section, titles)])
+                if source == streamed:
+                    tokens = []
+                    yield from self._collect(tokens, self._stream_section(topic, section['claims']))
+                    section['content'] = "".join(tokens)
+                    pieces.extend(tokens)
+                    continue
+                if source in futures:
+                    section['content'] = futures[source].result()
+                yield from self._collect(pieces, [section['content']])
+        return "".join(pieces), self._stored(sections), self._stats(sections, pending)
+    
+    def _assemble(self, topic, sections, pending, contents, sources):
+        for source, content in zip(pending, contents):
+            sections[source]['content'] = content
+        titles = {s['url']: s.get('title') for s in sources}
+        ordered = self._ordered(sections)
+        pieces = list(self._title(topic, ordered))
+        for source in ordered:
+            pieces += [self._heading(source, sections[source], titles), sections[source]['content']]
+        return "".join(pieces), self._stored(sections), self._stats(sections, pending)
+    
+    def _collect(self, sink, pieces):
+        for piece in pieces:
+            sink.append(piece)
+            yield piece
+    
+    def _ordered(self, sections):
+        return sorted(sections, key=lambda source: max(c['credibility_score'] for c in sections[source]['claims']), reverse=True)
+    
+    def _title(self, topic, ordered):
+        title = f"# Research Report: {topic}"
+        return [title] if ordered else [title, "\n\nNo claims met the credibility threshold for this report."]
+    
+    def _heading(self, source, section, titles):
+        source_type = section['claims'][0].get('source_type', 'unknown')
+        if titles.get(source):
+            return f"\n\n## {titles[source]} ({source_type})\n\nSource: {source}\n\n"
+        return f"\n\n## {source} ({source_type})\n\n"
+    
+    def _stored(self, sections):
+        # Fallback sections are stored without a fingerprint so the next build
+        # writes them properly.
+        return {source: {'fingerprint': None if s['content'] == self._fallback_section(s['claims']) else s['fingerprint'],
+                         'content': s['content']} for source, s in sections.items()}
+    
+    def _stats(self, sections, pending):
+        return {'sections': len(sections), 'regenerated': len(pending), 'reused': len(sections) - len(pending)}
+    
+    def _write_section(self, topic, claims):
+        if not budget_allows('report'):
+            return self._fallback_section(claims)
+        with call_site('report_section'):
+            try:
+                return self.llm.invoke(self._section_prompt(topic, claims)).content
+            except Exception:
+                record_fallback('report_section')
+                return self._fallback_section(claims)
+    
+    def _stream_section(self, topic, claims):
+        if not budget_allows('report'):
+            yield self._fallback_section(claims)
+            return
+        with call_site('report_section'):
+            try:
+                for chunk in self.llm.stream(self._section_prompt(topic, claims)):
+                    if chunk.content:
+                        yield chunk.content
+            except Exception:
+                record_fallback('report_section')
+                yield self._fallback_section(claims)
+    
+    async def _awrite_section(self, topic, claims):
+        if not budget_allows('report'):
+            return self._fallback_section(claims)
+        with call_site('report_section'):
+            try:
+                return (await self.llm.ainvoke(self._section_prompt(topic, claims))).content
+            except Exception:
+                record_fallback('report_section')
+                return self._fallback_section(claims)
+    
+    def _section_prompt(self, topic, claims):
+        high = CREDIBILITY_PARAMS['thresholds']['high']
+        return REPORT_SECTION_PROMPT.format(
+            topic=topic,
+            source=claims[0].get('source', 'unknown'),
+            source_type=claims[0].get('source_type', 'unknown'),
+            high_credibility_claims="\n".join(claim_line(c) for c in claims if c['credibility_score'] >= high),
+            medium_credibility_claims="\n".join(claim_line(c) for c in claims if c['credibility_score'] < high)
+        )
+    
+    def _fallback_section(self, claims):
+        high = CREDIBILITY_PARAMS['thresholds']['high']
+        return "\n".join(
+            f"- {c['text']}" + ("" if c['credibility_score'] >= high else " [⚠️ VERIFY]") + f" (Score: {c['credibility_score']:.1f})"
+            for c in claims
+        )
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import json
+from documents import claim_key
+
+# Research progresses through these checkpoints; a run that stops early resumes
+# from the last one that was written.
+STATUS_SEARCHED = 'searched'
+STATUS_SCORED = 'scored'
+STATUS_COMPLETE = 'complete'
+
+def stored_claim_key(claim):
+    # The same sentence on two pages is two claims, each with its own source, so
+    # the stored key covers the source URL as well as the text.
+    return hashlib.sha1(f"{claim.get('source', '')}\n{claim_key(claim)}".encode('utf-8')).hexdigest()
+
+class ResearchStore:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS topics ("
+                "topic TEXT PRIMARY KEY, status TEXT, result TEXT, created REAL, updated REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "topic TEXT, url TEXT, title TEXT, content TEXT, source_type TEXT, position INTEGER, "
+                "PRIMARY KEY (topic, url))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                "topic TEXT, claim_key TEXT, source_url TEXT, text TEXT, credibility_score REAL, action TEXT, "
+                "data TEXT, updated REAL, PRIMARY KEY (topic, claim_key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_url ON sources (url)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_claims_source ON claims (source_url)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_claims_score ON claims (topic, credibility_score)")
+    
+    def topics(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT topic FROM topics ORDER BY updated DESC")]
+    
+    def status(self, topic):
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM topics WHERE topic = ?", (topic,)).fetchone()
+        return row[0] if row else None
+    
+    def save_sources(self, topic, sources):
+        now = time.time()
+        with self._lock, self._conn:
+            self._set_status(topic, STATUS_SEARCHED, now)
+            self._conn.execute("DELETE FROM sources WHERE topic = ?", (topic,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources (topic, url, title, content, source_type, position) VALUES (?, ?, ?, ?, ?, ?)",
+                [(topic, s['url'], s.get('title', ''), s.get('content', ''), s['source_type'], i) for i, s in enumerate(sources)]
+            )
+    
+    def load_sources(self, topic):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, title, content, source_type FROM sources WHERE topic = ? ORDER BY position", (topic,)
+            ).fetchall()
+        return [{'url': url, 'title': title, 'content': content, 'source_type': source_type} for url, title, content, source_type in rows]
+    
+    def save_claims(self, topic, claims):
+        now = time.time()
+        with self._lock, self._conn:
+            self._set_status(topic, STATUS_SCORED, now)
+            self._conn.execute("DELETE FROM claims WHERE topic = ?", (topic,))
+            self._conn.executemany(self._CLAIM_UPSERT, [self._claim_row(topic, c, now) for c in claims])
+    
+    def sync_claims(self, topic, claims):
+        # Only rows whose content changed are written, so an update costs writes
+        # proportional to the delta rather than to the topic's claim count.
+        now = time.time()
+        current = {stored_claim_key(c): c for c in claims}
+        with self._lock, self._conn:
+            stored = dict(self._conn.execute("SELECT claim_key, data FROM claims WHERE topic = ?", (topic,)))
+            removed = [(topic, key) for key in stored.keys() - current.keys()]
+            changed = [self._claim_row(topic, c, now) for key, c in current.items() if stored.get(key) != self._dumps(c)]
+            self._conn.executemany("DELETE FROM claims WHERE topic = ? AND claim_key = ?", removed)
+            self._conn.executemany(self._CLAIM_UPSERT, changed)
+            if not self._conn.execute("SELECT 1 FROM topics WHERE topic = ?", (topic,)).fetchone():
+                self._set_status(topic, STATUS_SCORED, now)
+        return {'written': len(changed), 'deleted': len(removed)}
+    
+    def load_claims(self, topic):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM claims WHERE topic = ? ORDER BY rowid", (topic,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def save_result(self, topic, result):
+        now = time.time()
+        fields = {k: v for k, v in result.items() if k != 'claims'}
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT result FROM topics WHERE topic = ?", (topic,)).fetchone()
+            if row and row[0]:
+                fields = {**json.loads(row[0]), **fields}
+            self._set_status(topic, STATUS_COMPLETE, now)
+            self._conn.execute("UPDATE topics SET result = ? WHERE topic = ?", (json.dumps(fields), topic))
+    
+    def load_result(self, topic):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, updated FROM topics WHERE topic = ? AND status = ?", (topic, STATUS_COMPLETE)
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        result = json.loads(row[0])
+        # Results saved before researched_at was recorded age from their last write.
+        result.setdefault('researched_at', row[1])
+        result['claims'] = self.load_claims(topic)
+        return result
+    
+    _CLAIM_UPSERT = (
+        "INSERT OR REPLACE INTO claims (topic, claim_key, source_url, text, credibility_score, action, data, updated) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    
+    def _claim_row(self, topic, claim, now):
+        return (
+            topic, stored_claim_key(claim), claim.get('source', ''), claim['text'],
+            claim.get('credibility_score', 0), claim.get('action'), self._dumps(claim), now
+        )
+    
+    def _dumps(self, claim):
+        return json.dumps(claim, sort_keys=True)
+    
+    def _set_status(self, topic, status, now):
+        self._conn.execute(
+            "INSERT INTO topics (topic, status, created, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(topic) DO UPDATE SET status = excluded.status, updated = excluded.updated",
+            (topic, status, now, now)
+        )
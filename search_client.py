@@ -0,0 +1,277 @@
+import asyncio
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from cache_store import PersistentCache
+from adaptive_limits import get_limiter
+from config import SEARCH_CONFIG
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+QUERY_NOISE_PATTERN = re.compile(r'[^\w\s%.]+')
+
+class SearchError(Exception):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self):
+        wait = self.try_acquire()
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire()
+    
+    async def aacquire(self):
+        wait = self.try_acquire()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.try_acquire()
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(api_key, settings=None):
+    settings = settings or SEARCH_CONFIG
+    with _limiters_lock:
+        if api_key not in _limiters:
+            _limiters[api_key] = TokenBucket(settings['rate_limit_per_second'], settings['burst'])
+        return _limiters[api_key]
+
+def retry_delay(response, attempt, backoff_factor, max_delay):
+    # Retry-After is honoured up to the request timeout; a server asking for
+    # longer would otherwise hold the caller well past it.
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(int(retry_after), max_delay)
+    return min(backoff_factor * (2 ** attempt), max_delay)
+
+def normalize_query(query):
+    return " ".join(QUERY_NOISE_PATTERN.sub(' ', query.lower()).split())
+
+_cache_stores = {}
+_cache_stores_lock = threading.Lock()
+
+def get_search_cache_store(settings=None):
+    settings = (settings or SEARCH_CONFIG)['cache']
+    with _cache_stores_lock:
+        if settings['path'] not in _cache_stores:
+            _cache_stores[settings['path']] = PersistentCache(settings['path'], 'search', settings['ttl'], settings['max_entries'])
+        return _cache_stores[settings['path']]
+
+class SearchClient:
+    def __init__(self, api_key, base_url=None, settings=None):
+        settings = settings or SEARCH_CONFIG
+        self.api_key = api_key
+        self.cache = get_search_cache_store(settings) if settings['cache']['enabled'] else None
+        self.stats = {'requests': 0, 'deduplicated': 0, 'retries': 0}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.concurrency = get_limiter('serper')
+        self.base_url = (base_url or settings['base_url']).rstrip('/')
+        self.timeout = settings['timeout']
+        self.max_retries = settings['max_retries']
+        self.backoff_factor = settings['backoff_factor']
+        self.limiter = get_rate_limiter(api_key, settings)
+        self.session = requests.Session()
+        self.session.headers.update({'X-API-KEY': api_key, 'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=settings['pool_size'], pool_maxsize=settings['pool_size'])
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def search(self, query, num=10, timeout=None):
+        key = f"{num}:{normalize_query(query)}"
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats['deduplicated'] += 1
+        if not owner:
+            return future.result()
+        
+        try:
+            results = self._recheck_cache(key)
+            if results is None:
+                results = self._request(query, num, timeout)
+                if self.cache:
+                    self.cache.set(key, results)
+            future.set_result(results)
+            return results
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _recheck_cache(self, key):
+        # The owner of a query checks the cache again: a caller that owned the same
+        # query may have cached it between the first check and taking ownership.
+        return self.cache.get(key) if self.cache else None
+    
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['concurrency'] = self.concurrency.snapshot()
+        if self.cache:
+            stats['cache'] = self.cache.get_stats()
+        return stats
+    
+    def _request(self, query, num, timeout):
+        # Retries run here rather than inside the HTTP adapter so that each one
+        # takes a token from the bucket like a first attempt.
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self._inflight_lock:
+                self.stats['requests'] += 1
+            try:
+                with self.concurrency.slot():
+                    response = self.session.post(
+                        f"{self.base_url}/search",
+                        json={"q": query, "num": num},
+                        timeout=timeout or self.timeout
+                    )
+                if response.status_code == 429:
+                    self.concurrency.backoff()
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    self._count_retry()
+                    time.sleep(retry_delay(response, attempt, self.backoff_factor, timeout or self.timeout))
+                    continue
+                response.raise_for_status()
+                return response.json().get('organic', [])
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt < self.max_retries:
+                    self._count_retry()
+                    time.sleep(self.backoff_factor * (2 ** attempt))
+                    continue
+                raise SearchError(f"Serper search failed for '{query[:50]}': {e}") from e
+            except (requests.RequestException, ValueError) as e:
+                raise SearchError(f"Serper search failed for '{query[:50]}': {e}") from e
+    
+    def _count_retry(self):
+        with self._inflight_lock:
+            self.stats['retries'] += 1
+        self.concurrency.record_retry()
+
+class AsyncSearchClient:
+    def __init__(self, api_key, base_url=None, settings=None):
+        settings = settings or SEARCH_CONFIG
+        self.api_key = api_key
+        self.cache = get_search_cache_store(settings) if settings['cache']['enabled'] else None
+        self.stats = {'requests': 0, 'deduplicated': 0, 'retries': 0}
+        self._inflight = {}
+        self.concurrency = get_limiter('serper')
+        self.max_retries = settings['max_retries']
+        self.backoff_factor = settings['backoff_factor']
+        self.timeout = settings['timeout']
+        self.limiter = get_rate_limiter(api_key, settings)
+        self.client = httpx.AsyncClient(
+            base_url=(base_url or settings['base_url']).rstrip('/'),
+            headers={'X-API-KEY': api_key, 'Content-Type': 'application/json'},
+            limits=httpx.Limits(max_connections=settings['pool_size'], max_keepalive_connections=settings['pool_size'])
+        )
+    
+    async def search(self, query, num=10, timeout=None):
+        key = f"{num}:{normalize_query(query)}"
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        if key in self._inflight:
+            self.stats['deduplicated'] += 1
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = self._recheck_cache(key)
+            if results is None:
+                results = await self._request(query, num, timeout)
+                if self.cache:
+                    self.cache.set(key, results)
+            future.set_result(results)
+            return results
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when no other caller was waiting on it.
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    def _recheck_cache(self, key):
+        return self.cache.get(key) if self.cache else None
+    
+    async def _request(self, query, num, timeout):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire()
+            self.stats['requests'] += 1
+            try:
+                async with self.concurrency.aslot():
+                    response = await self.client.post("/search", json={"q": query, "num": num}, timeout=timeout or self.timeout)
+                if response.status_code == 429:
+                    self.concurrency.backoff()
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    self._count_retry()
+                    await asyncio.sleep(retry_delay(response, attempt, self.backoff_factor, timeout or self.timeout))
+                    continue
+                response.raise_for_status()
+                return response.json().get('organic', [])
+            except httpx.TransportError as e:
+                if attempt < self.max_retries:
+                    self._count_retry()
+                    await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                    continue
+                raise SearchError(f"Serper search failed for '{query[:50]}': {e}") from e
+            except (httpx.HTTPError, ValueError) as e:
+                raise SearchError(f"Serper search failed for '{query[:50]}': {e}") from e
+    
+    def _count_retry(self):
+        self.stats['retries'] += 1
+        self.concurrency.record_retry()
+    
+    async def aclose(self):
+        await self.client.aclose()
+
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_search_client(api_key):
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = SearchClient(api_key)
+        return _clients[api_key]
+
+def get_async_search_client(api_key):
+    # httpx.AsyncClient is bound to the loop it was first used on.
+    per_loop = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if api_key not in per_loop:
+        per_loop[api_key] = AsyncSearchClient(api_key)
+    return per_loop[api_key]
@@ -0,0 +1,105 @@
+import json
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+from config import SOURCE_CLASSIFIER_CONFIG
+
+# Suffix rules match the domain itself and every subdomain. A '*' label stands
+# for a country-code top-level domain, so '.ac.*' covers ox.ac.uk and
+# u-tokyo.ac.jp but not x.ac.com, whose 'ac.com' is an ordinary commercial
+# domain. A wildcard rule also needs at least one label before it, so it never
+# matches a public suffix such as ac.uk itself.
+DEFAULT_SUFFIX_RULES = {
+    '.edu': 'academic', '.edu.*': 'academic', '.ac.*': 'academic',
+    '.scholar.google.com': 'academic', '.arxiv.org': 'academic', '.pubmed.ncbi.nlm.nih.gov': 'academic',
+    '.researchgate.net': 'academic',
+    '.gov': 'government', '.gov.*': 'government', '.mil': 'government', '.mil.*': 'government',
+    '.who.int': 'government', '.europa.eu': 'government',
+    '.reuters.com': 'news', '.apnews.com': 'news', '.bbc.com': 'news', '.bbc.co.uk': 'news',
+    '.nytimes.com': 'news', '.wsj.com': 'news', '.economist.com': 'news',
+    '.medium.com': 'blog', '.wordpress.com': 'blog', '.substack.com': 'blog', '.blogspot.com': 'blog',
+    '.twitter.com': 'social', '.x.com': 'social', '.facebook.com': 'social', '.instagram.com': 'social',
+    '.reddit.com': 'social', '.tiktok.com': 'social',
+    '.amazon.com': 'commercial', '.ebay.com': 'commercial', '.etsy.com': 'commercial'
+}
+# Used only when no exact or suffix rule matches: the leftmost label of the host.
+LEADING_LABEL_RULES = {
+    'blog': 'blog', 'blogs': 'blog',
+    'shop': 'commercial', 'store': 'commercial', 'buy': 'commercial'
+}
+DEFAULT_CATEGORY = 'corporate'
+COUNTRY_CODE_LABEL = re.compile(r'[a-z]{2}$')
+
+class DomainTrie:
+    def __init__(self):
+        self.root = {}
+    
+    def insert(self, suffix, category):
+        node = self.root
+        for label in reversed(suffix.strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[None] = (category, '*' in suffix)
+    
+    def lookup(self, domain):
+        return self._lookup(self.root, domain.split('.')[::-1], 0)[1]
+    
+    def _lookup(self, node, labels, depth):
+        best = (-1, None)
+        if None in node:
+            category, wildcard = node[None]
+            if depth < len(labels) or not wildcard:
+                best = (depth, category)
+        if depth < len(labels):
+            wildcard = node.get('*') if depth == 0 and COUNTRY_CODE_LABEL.match(labels[depth]) else None
+            for child in (node.get(labels[depth]), wildcard):
+                if child is not None:
+                    match = self._lookup(child, labels, depth + 1)
+                    if match[1] is not None and match[0] > best[0]:
+                        best = match
+        return best
+
+class SourceClassifier:
+    def __init__(self, domain_list_path=None, memo_size=4096):
+        self.exact = {}
+        self.suffixes = DomainTrie()
+        self.load_rules(DEFAULT_SUFFIX_RULES)
+        if domain_list_path:
+            self.load_file(domain_list_path)
+        self.classify_domain = lru_cache(maxsize=memo_size)(self._classify_domain)
+    
+    def load_rules(self, rules):
+        for pattern, category in rules.items():
+            pattern = pattern.lower()
+            if pattern.startswith('.'):
+                self.suffixes.insert(pattern, category)
+            else:
+                self.exact[pattern] = category
+    
+    def load_file(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            self.load_rules(json.load(f))
+    
+    def classify(self, url):
+        return self.classify_domain(urlparse(url).hostname or '')
+    
+    def _classify_domain(self, domain):
+        domain = domain.lower().rstrip('.')
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        if domain in self.exact:
+            return self.exact[domain]
+        category = self.suffixes.lookup(domain)
+        if category:
+            return category
+        return LEADING_LABEL_RULES.get(domain.split('.', 1)[0], DEFAULT_CATEGORY)
+
+_classifier = None
+
+def get_source_classifier():
+    global _classifier
+    if _classifier is None:
+        _classifier = SourceClassifier(
+            SOURCE_CLASSIFIER_CONFIG['domain_list_path'],
+            SOURCE_CLASSIFIER_CONFIG['memo_size']
+        )
+    return _classifier
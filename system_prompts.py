@@ -89,42 +89,26 @@ Return JSON:
   "explanation": "reasoning in 1-2 sentences"
 }}"""
 
-RECONCILIATION_PROMPT = """You are a research synthesizer. Compare existing and new claims.
+RECONCILIATION_PROMPT = """You are a research synthesizer. Resolve each conflict between an existing claim and a new claim.
 
-Existing Claims:
-{existing_claims}
+Conflicts:
+{conflicts}
 
-New Claims:
-{new_claims}
+For each conflict choose a resolution:
+- keep_existing: the existing claim is more credible; discard the new claim
+- replace_with_new: the new claim is more credible or more recent; it replaces the existing claim
+- merge_both: both are credible (e.g., different scope, population, or time frame); keep both
 
-Identify:
-1. CONFLICTS: New contradicts existing
-2. REINFORCEMENTS: New supports existing
-3. NEW: Novel information
+Prioritize HIGHER credibility scores or more recent sources.
 
-For conflicts, prioritize HIGHER credibility scores or more recent sources.
-For reinforcements, increase confidence of existing claims.
-For new info, integrate if credible (score >4.5).
-
-Return JSON:
-{{
-  "conflicts": [
-    {{
-      "existing_claim": "text",
-      "new_claim": "text",
-      "resolution": "keep_existing/replace_with_new/merge_both",
-      "reason": "explanation in 1-2 sentences"
-    }}
-  ],
-  "reinforcements": [
-    {{
-      "existing_claim": "text",
-      "new_claim": "text",
-      "action": "increase_confidence"
-    }}
-  ],
-  "new_information": ["list of genuinely new claims"]
-}}"""
+Return a JSON array with one entry per conflict, using the conflict's index:
+[
+  {{
+    "index": 0,
+    "resolution": "keep_existing/replace_with_new/merge_both",
+    "reason": "explanation in 1-2 sentences"
+  }}
+]"""
 
 FINAL_ACTION_PROMPT = """You are the final decision maker for claim actions.
 
@@ -151,6 +135,30 @@ Return JSON:
   "confidence": 0-10
 }}"""
 
+BATCH_FINAL_ACTION_PROMPT = """You are the final decision maker for claim actions. Decide an action for EACH claim below.
+
+Claims:
+{claims}
+
+DECIDE ACTION:
+- Score ≥7.5: INCLUDE (high credibility)
+- Score 4.5-7.4: WARN (needs verification)
+- Score <4.5: EXCLUDE (low credibility)
+
+Consider:
+- Critical claims need higher standards
+- Recent validation results
+- Context-specific biases (e.g., CEO self-promotion, funded research)
+
+Return a JSON array with one entry per claim, using the claim's index:
+[
+  {{
+    "index": 0,
+    "action": "INCLUDE/WARN/EXCLUDE",
+    "reasoning": "explain in 1-2 sentences"
+  }}
+]"""
+
 REPORT_GENERATION_PROMPT = """You are a research report writer. Create a comprehensive credible report.
 
 Topic: {topic}
@@ -170,6 +178,25 @@ Guidelines:
 
 Generate report in markdown format."""
 
+REPORT_SECTION_PROMPT = """You are a research report writer. Write the section of a credible research report that covers one source.
+
+Topic: {topic}
+Source: {source} ({source_type})
+
+HIGH CREDIBILITY (Score ≥7.5):
+{high_credibility_claims}
+
+MEDIUM CREDIBILITY (Score 4.5-7.4) - VERIFY:
+{medium_credibility_claims}
+
+Guidelines:
+1. Lead with high-credibility claims, citing their reasoning
+2. Mark medium claims with [⚠️ VERIFY], include reasoning
+3. Note reinforcements and conflicts explicitly
+4. Professional and concise: 1-3 short paragraphs, no heading
+
+Generate the section in markdown format."""
+
 UPDATE_ANALYSIS_PROMPT = """You are an update analyzer. Assess impact of new information.
 
 Original Research Quality: {original_quality}/10
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    # Scripted LLM, mock search results and every store in a scratch directory.
+    monkeypatch.delenv('SERPER_API_KEY', raising=False)
+    monkeypatch.setitem(config.RESEARCH_STORE_CONFIG, 'path', str(tmp_path / 'research.sqlite3'))
+    monkeypatch.setitem(config.DOCUMENT_CONFIG, 'text_cache_dir', str(tmp_path / 'documents'))
+    monkeypatch.setitem(config.PERFORMANCE_CONFIG['llm_cache'], 'enabled', False)
+    monkeypatch.setitem(config.FETCH_CONFIG, 'enabled', False)
+    monkeypatch.setitem(config.LLM_CONFIGS['fake'], 'latency', 0.0)
+    monkeypatch.setitem(config.LLM_CONFIGS['fake'], 'jitter', 0.0)
+    return tmp_path
+
+@pytest.fixture
+def agent(offline):
+    from agent import ResearchAgent
+    return ResearchAgent('fake')
+
+@pytest.fixture
+def update_file(tmp_path):
+    path = tmp_path / 'update.txt'
+    path.write_text(
+        "A 2024 peer-reviewed study of 3,000 patients found a 12% reduction in risk. "
+        "The company claims its product is the best and guaranteed to work for everyone. "
+        "Government data shows unemployment fell to 4% in the last quarter. "
+        "Researchers at the university published results showing 45% faster recovery. ",
+        encoding='utf-8'
+    )
+    return str(path)
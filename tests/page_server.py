@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local HTTP fixture for exercising the fetcher: serves fixed pages with ETag and
+# Last-Modified validators, answers conditional requests with 304, and records
+# per-path request counts and the peak number of concurrent requests.
+class FixturePageServer:
+    def __init__(self, pages=None, latency=0.0):
+        self.pages = dict(pages or {})
+        self.latency = latency
+        self.requests = {}
+        self.not_modified = 0
+        self.active = 0
+        self.max_active = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def add_page(self, path, body, content_type='text/html; charset=utf-8'):
+        self.pages[path] = (body, content_type)
+    
+    def _page(self, path):
+        page = self.pages.get(path)
+        if isinstance(page, str):
+            return page, 'text/html; charset=utf-8'
+        return page
+    
+    def _handler(self):
+        fixture = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests[self.path] = fixture.requests.get(self.path, 0) + 1
+                    fixture.active += 1
+                    fixture.max_active = max(fixture.max_active, fixture.active)
+                try:
+                    if fixture.latency:
+                        time.sleep(fixture.latency)
+                    self._respond()
+                finally:
+                    with fixture._lock:
+                        fixture.active -= 1
+            
+            def _respond(self):
+                page = fixture._page(self.path)
+                if page is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body, content_type = page
+                payload = body.encode('utf-8') if isinstance(body, str) else body
+                etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    with fixture._lock:
+                        fixture.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', fixture.last_modified)
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,59 @@
+import asyncio
+from budget import ResearchBudget
+
+def test_update_has_its_own_budget(agent, update_file):
+    agent.research("budgeted update topic", ResearchBudget(max_calls=50))
+    result = agent.update_research("budgeted update topic", update_file)
+    assert result['budget']['calls'] > 0
+    assert result['budget']['limits'] == {'tokens': None, 'calls': None, 'seconds': None}
+
+def test_update_after_restart_has_its_own_budget(agent, offline, update_file):
+    from agent import ResearchAgent
+    agent.research("stored topic")
+    restarted = ResearchAgent('fake')
+    result = restarted.update_research("stored topic", update_file, ResearchBudget(max_calls=50))
+    assert result['budget']['limits']['calls'] == 50
+
+def test_async_update_has_its_own_budget(agent, update_file):
+    asyncio.run(agent.aresearch("budgeted async update topic", ResearchBudget(max_calls=50)))
+    result = asyncio.run(agent.aupdate_research("budgeted async update topic", update_file))
+    assert result['budget']['calls'] > 0
+    assert result['budget']['limits']['calls'] is None
+
+# Concurrent workers may each have one call in flight when the budget runs out.
+OVERSHOOT = 2
+
+def test_research_stays_within_call_budget(agent):
+    for max_calls in (4, 10, 20):
+        result = agent.research(f"capped topic {max_calls}", ResearchBudget(max_calls=max_calls))
+        assert result['budget']['calls'] <= max_calls + OVERSHOOT
+        assert result['report']
+
+def test_async_research_stays_within_call_budget(agent):
+    result = asyncio.run(agent.aresearch("capped async topic", ResearchBudget(max_calls=2)))
+    assert result['budget']['calls'] <= 2 + OVERSHOOT
+    assert 'extraction' in result['budget']['degraded']
+
+def test_update_stays_within_call_budget(agent, update_file):
+    agent.research("capped update topic")
+    result = agent.update_research("capped update topic", update_file, ResearchBudget(max_calls=2))
+    assert result['budget']['calls'] <= 2 + OVERSHOOT
+    assert result['report']
+
+def test_exhausted_budget_settles_claims_heuristically(agent):
+    result = agent.research("exhausted topic", ResearchBudget(max_calls=1))
+    assert result['budget']['calls'] <= 1 + OVERSHOOT
+    assert all(c['scoring_path'] in ('fast', 'budget') for c in result['claims'])
+
+def test_every_final_action_batch_is_admitted_by_the_budget(monkeypatch):
+    import config
+    from budget import budget_scope
+    from credibility import CredibilityAnalyzer
+    from fake_llm import FakeChatModel
+    monkeypatch.setitem(config.PERFORMANCE_CONFIG, 'final_action_batch_size', 2)
+    llm = FakeChatModel()
+    items = [{'claim': f"Claim {i} rose by {i}%", 'score': 6.0, 'source_type': 'news', 'validation_status': 'none'} for i in range(8)]
+    with budget_scope(ResearchBudget(max_calls=1)):
+        actions = CredibilityAnalyzer(llm).get_final_actions(items)
+    assert llm.stats['calls'] == 1
+    assert sum(a['reasoning'] == 'Fallback decision: research budget exhausted' for a in actions) == 6
@@ -0,0 +1,58 @@
+import zipfile
+import documents
+from documents import iter_docx_text
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+def write_docx(path, body):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+def paragraph(text):
+    return f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+def test_docx_text_is_read_paragraph_by_paragraph(tmp_path):
+    table = f'<w:tbl><w:tr><w:tc>{paragraph("In a cell")}</w:tc></w:tr></w:tbl>'
+    path = write_docx(tmp_path / 'doc.docx', paragraph('First') + table + '<w:p><w:r><w:t>A</w:t><w:tab/><w:t>B</w:t></w:r></w:p>')
+    assert list(iter_docx_text(path)) == ['First\n', 'In a cell\n', 'A\tB\n']
+
+def test_docx_parsing_detaches_finished_elements(tmp_path, monkeypatch):
+    path = write_docx(tmp_path / 'long.docx', ''.join(paragraph(f'Paragraph {i}') for i in range(200)))
+    iterparse = documents.ElementTree.iterparse
+    seen = []
+    
+    def recording_iterparse(source, events):
+        for event, element in iterparse(source, events):
+            seen.append(element)
+            yield event, element
+    
+    monkeypatch.setattr(documents.ElementTree, 'iterparse', recording_iterparse)
+    for text in iter_docx_text(path):
+        root, body = seen[0], seen[1]
+        assert list(root) == [body]
+        # The parser reads ahead, so later paragraphs may already be in the body.
+        assert text.strip() not in [child.findtext(f'.//{{{W}}}t') for child in body]
+
+def test_async_extraction_reads_chunks_off_the_event_loop(offline):
+    import asyncio
+    import threading
+    from budget import ResearchBudget, budget_scope
+    from documents import aextract_claims_stream
+    from llm_factory import LLMFactory
+    readers = []
+    
+    def chunks():
+        for text in ("A 2024 study of 3,000 patients found a 12% reduction in risk. ",
+                     "Government data shows unemployment fell to 4% in the last quarter. "):
+            readers.append(threading.get_ident())
+            yield text
+    
+    async def run():
+        return [claim async for claim in aextract_claims_stream(chunks(), 'doc.txt', LLMFactory.create_llm('fake'))]
+    
+    budget = ResearchBudget(max_calls=1)
+    with budget_scope(budget):
+        asyncio.run(run())
+    assert readers and threading.get_ident() not in readers
+    assert 'extraction' in budget.snapshot()['degraded']
@@ -0,0 +1,19 @@
+import config
+import llm_limits
+from llm_factory import LLMFactory
+from llm_limits import HedgedLLM
+
+def test_hedged_client_has_room_for_the_limiter_ceiling(offline, monkeypatch):
+    monkeypatch.setitem(config.HEDGING_CONFIG, 'enabled', True)
+    llm = LLMFactory.create_llm('fake')
+    assert isinstance(llm, HedgedLLM)
+    assert llm.workers == 2 * LLMFactory.max_concurrency('fake')
+
+def test_hedge_pool_grows_to_the_widest_client(monkeypatch):
+    monkeypatch.setattr(llm_limits, '_hedge_executor', None)
+    monkeypatch.setattr(llm_limits, '_hedge_executor_workers', 0)
+    narrow = llm_limits._get_hedge_executor(10)
+    assert llm_limits._get_hedge_executor(4) is narrow
+    wide = llm_limits._get_hedge_executor(80)
+    assert wide is not narrow and llm_limits._hedge_executor_workers == 80
+    wide.shutdown()
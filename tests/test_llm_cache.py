@@ -0,0 +1,34 @@
+from langchain_core.messages import AIMessage
+from cache_store import PersistentCache
+from credibility import CredibilityAnalyzer
+from llm_cache import CachedLLM
+
+class ScriptedLLM:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+    
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls += 1
+        return AIMessage(content=self.replies.pop(0))
+
+def cached(tmp_path, replies):
+    inner = ScriptedLLM(replies)
+    store = PersistentCache(str(tmp_path / 'llm.sqlite3'), 'llm', 3600, 100)
+    return inner, CachedLLM(inner, 'fake', 'scripted', 0.0, store=store)
+
+def test_valid_reply_is_replayed_from_the_cache(tmp_path):
+    inner, llm = cached(tmp_path, ['{"verdict": "SUPPORTED", "score_adjustment": 1}'])
+    analyzer = CredibilityAnalyzer(llm)
+    first = analyzer.validate_claim("Claim", 5.0, "evidence")
+    assert analyzer.validate_claim("Claim", 5.0, "evidence") == first
+    assert inner.calls == 1
+
+def test_malformed_reply_is_not_replayed(tmp_path):
+    inner, llm = cached(tmp_path, ['not json', '{"verdict": "SUPPORTED", "score_adjustment": 1}'])
+    analyzer = CredibilityAnalyzer(llm)
+    assert analyzer.validate_claim("Claim", 5.0, "evidence")['verdict'] == 'NEUTRAL'
+    retried = analyzer.validate_claim("Claim", 5.0, "evidence")
+    assert retried['verdict'] == 'SUPPORTED'
+    assert retried['validated_score'] == 6.0
+    assert inner.calls == 2
@@ -0,0 +1,31 @@
+import asyncio
+from fake_llm import FakeChatModel
+from llm_pool import Endpoint, LLMPool
+
+def make_pool(latency=0.0):
+    return LLMPool([Endpoint('a', 'fake', 'fake', FakeChatModel(latency=latency)),
+                    Endpoint('b', 'fake', 'fake', FakeChatModel(latency=latency))], routing='least_loaded')
+
+def test_closed_stream_releases_its_endpoint():
+    pool = make_pool()
+    stream = pool.stream("Write a research report")
+    next(stream)
+    stream.close()
+    assert all(e.inflight == 0 for e in pool.endpoints)
+
+def test_finished_stream_releases_its_endpoint():
+    pool = make_pool()
+    assert list(pool.stream("Write a research report"))
+    assert all(e.inflight == 0 for e in pool.endpoints)
+
+def test_cancelled_call_releases_its_endpoint():
+    pool = make_pool(latency=5.0)
+    
+    async def run():
+        call = asyncio.ensure_future(pool.ainvoke("Write a research report"))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+    
+    asyncio.run(run())
+    assert all(e.inflight == 0 for e in pool.endpoints)
@@ -0,0 +1,18 @@
+import asyncio
+
+def test_concurrent_research_keeps_its_own_metrics(agent):
+    async def run():
+        return await asyncio.gather(agent.aresearch("metrics topic a"), agent.aresearch("metrics topic b"))
+    first, second = asyncio.run(run())
+    for result in (first, second):
+        assert result['metrics']['research_time'] == result['time_seconds']
+        assert result['metrics']['fast_path_claims'] + result['metrics']['slow_path_claims'] == len(result['claims'])
+    assert first['metrics'] is not second['metrics']
+
+def test_agent_metrics_keep_cumulative_counters(agent, update_file):
+    agent.research("cumulative topic")
+    result = agent.update_research("cumulative topic", update_file)
+    assert 'store_delta' in result['metrics']
+    metrics = agent.get_metrics()
+    assert 'research_time' not in metrics
+    assert {'shared_extractions', 'score_cache', 'reconciliation'} <= set(metrics)
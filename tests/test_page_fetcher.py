@@ -0,0 +1,85 @@
+import asyncio
+import copy
+import pytest
+from config import FETCH_CONFIG
+from page_fetcher import PageFetcher, AsyncPageFetcher
+from page_server import FixturePageServer
+
+ARTICLE = "<html><body><article>" + "".join(
+    f"<p>Paragraph {i} reports that the measured effect held across every cohort in the study.</p>" for i in range(10)
+) + "</article></body></html>"
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = copy.deepcopy(FETCH_CONFIG)
+    settings['cache']['path'] = str(tmp_path / 'pages.sqlite3')
+    settings['revalidate_after'] = 0
+    settings['connect_timeout'] = 1
+    settings['read_timeout'] = 2
+    return settings
+
+@pytest.fixture
+def server():
+    with FixturePageServer({'/article': ARTICLE, '/mirror': ARTICLE}) as server:
+        yield server
+
+def test_stale_page_is_revalidated_with_its_etag(settings, server):
+    fetcher = PageFetcher(settings)
+    first = fetcher.fetch(server.url + '/article')
+    assert fetcher.fetch(server.url + '/article') == first
+    assert server.requests['/article'] == 2
+    assert server.not_modified == 1
+    assert fetcher.stats['not_modified'] == 1
+
+def test_fresh_page_is_served_from_the_cache(settings, server):
+    settings['revalidate_after'] = 3600
+    fetcher = PageFetcher(settings)
+    first = fetcher.fetch(server.url + '/article')
+    assert fetcher.fetch(server.url + '/article') == first
+    assert server.requests['/article'] == 1
+    assert fetcher.stats['cache_hits'] == 1
+
+def test_failed_revalidation_serves_the_stale_text(settings):
+    server = FixturePageServer({'/article': ARTICLE}).start()
+    url = server.url + '/article'
+    fetcher = PageFetcher(settings)
+    first = fetcher.fetch(url)
+    server.stop()
+    assert fetcher.fetch(url) == first
+    assert fetcher.stats['stale_served'] == 1
+    assert fetcher.stats['failed'] == 0
+
+def test_async_failed_revalidation_serves_the_stale_text(settings):
+    server = FixturePageServer({'/article': ARTICLE}).start()
+    url = server.url + '/article'
+    
+    async def run():
+        fetcher = AsyncPageFetcher(settings)
+        try:
+            first = await fetcher.fetch(url)
+            server.stop()
+            return first, await fetcher.fetch(url), fetcher.stats
+        finally:
+            await fetcher.aclose()
+    
+    first, second, stats = asyncio.run(run())
+    assert second == first
+    assert stats['stale_served'] == 1
+
+def test_body_is_cut_at_max_bytes(settings, server):
+    settings['max_bytes'] = 1024
+    server.add_page('/large', "word " * 10000, 'text/plain; charset=utf-8')
+    fetcher = PageFetcher(settings)
+    text = fetcher.fetch(server.url + '/large')
+    assert len(text) <= 1024
+    assert fetcher.stats['truncated'] == 1
+
+def test_same_text_under_two_urls_is_kept_once(settings, server):
+    fetcher = PageFetcher(settings)
+    sources = [
+        {'url': server.url + '/article', 'content': 'snippet one', 'source_type': 'news'},
+        {'url': server.url + '/mirror', 'content': 'snippet two', 'source_type': 'news'}
+    ]
+    merged = fetcher.fetch_sources(sources)
+    assert [s['url'] for s in merged] == [server.url + '/article']
+    assert fetcher.stats['duplicates'] == 1
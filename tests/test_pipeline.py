@@ -0,0 +1,14 @@
+from adaptive_limits import max_limit
+from config import PIPELINE_CONFIG
+from pipeline import stage_workers
+
+def test_llm_stages_are_sized_from_the_limiter_ceiling(agent):
+    workers = stage_workers(PIPELINE_CONFIG, agent)
+    assert agent.llm_concurrency == max_limit('fake')
+    for stage in ('score', 'validate', 'final_action'):
+        assert workers[stage] == max_limit('fake')
+    assert workers['extract'] == PIPELINE_CONFIG['workers']['extract']
+
+def test_research_runs_with_limiter_sized_stages(agent):
+    result = agent.research("pipeline sizing topic")
+    assert result['claims']
@@ -0,0 +1,31 @@
+import config
+
+def test_update_keeps_every_merged_claim_in_the_store(agent, update_file, monkeypatch):
+    agent.research("crowded topic")
+    monkeypatch.setitem(config.CREDIBILITY_PARAMS, 'max_claims_per_source', 1)
+    result = agent.update_research("crowded topic", update_file)
+    stored = agent.store.load_claims("crowded topic")
+    assert len(result['claims']) == 2
+    assert result['claims_total'] == len(stored) > 2
+    assert result['claims_truncated'] == len(stored) - 2
+
+def test_second_update_starts_from_the_full_claim_set(agent, update_file, monkeypatch):
+    agent.research("twice updated topic")
+    monkeypatch.setitem(config.CREDIBILITY_PARAMS, 'max_claims_per_source', 1)
+    first = agent.update_research("twice updated topic", update_file)
+    second = agent.update_research("twice updated topic", update_file)
+    assert second['claims_total'] >= first['claims_total']
+    assert len(agent.store.load_claims("twice updated topic")) == second['claims_total']
+
+def test_update_keeps_same_text_claims_from_other_sources(agent, update_file):
+    from agent import ResearchAgent
+    from research_store import stored_claim_key
+    agent.research("duplicate text topic")
+    claims = agent.store.load_claims("duplicate text topic")
+    claims.append({**claims[0], 'source': 'https://mirror.example.org/copy'})
+    agent.store.sync_claims("duplicate text topic", claims)
+    
+    restarted = ResearchAgent('fake')
+    restarted.update_research("duplicate text topic", update_file)
+    stored = {stored_claim_key(c) for c in restarted.store.load_claims("duplicate text topic")}
+    assert {stored_claim_key(c) for c in claims} <= stored
@@ -0,0 +1,40 @@
+import asyncio
+import config
+
+INCREMENTAL = {'approach': 'incremental', 'reasoning': 'test', 'estimated_quality_impact': 'low'}
+
+def test_research_report_is_synthesized(agent):
+    result = agent.research("synthesized report topic")
+    assert result['report']
+    assert not result['report'].startswith("# Research Report:")
+    assert result['report_sections']
+    assert result['metrics']['report_sections']['regenerated'] == len(result['report_sections'])
+
+def test_update_report_is_built_from_sections(agent, update_file):
+    agent.research("sectioned report topic")
+    result = agent.update_research("sectioned report topic", update_file)
+    assert result['report_sections']
+    assert result['report'].startswith("# Research Report: sectioned report topic")
+
+def test_first_update_reuses_research_sections(agent, update_file, monkeypatch):
+    monkeypatch.setattr(agent, '_llm_update_strategy', lambda *args: INCREMENTAL)
+    agent.research("reused sections topic")
+    result = agent.update_research("reused sections topic", update_file)
+    assert result['metrics']['report_sections']['reused'] > 0
+
+def test_first_async_update_reuses_research_sections(agent, update_file, monkeypatch):
+    async def incremental(*args):
+        return INCREMENTAL
+    monkeypatch.setattr(agent, '_allm_update_strategy', incremental)
+    asyncio.run(agent.aresearch("async reused sections topic"))
+    result = asyncio.run(agent.aupdate_research("async reused sections topic", update_file))
+    assert result['metrics']['report_sections']['reused'] > 0
+
+def test_streamed_research_report_is_synthesized(agent):
+    events = list(agent.research_stream("streamed report topic"))
+    assert any(e['type'] == 'report_token' for e in events)
+    assert events[-1]['result']['report_sections']
+
+def test_research_without_incremental_report_stores_no_sections(agent, monkeypatch):
+    monkeypatch.setitem(config.PERFORMANCE_CONFIG, 'incremental_report', False)
+    assert agent.research("plain report topic")['report_sections'] == {}
@@ -0,0 +1,38 @@
+import asyncio
+import time
+import pytest
+import config
+
+def test_fresh_result_is_served_from_the_store(agent):
+    first = agent.research("ttl topic")
+    assert agent.research("ttl topic") is first
+
+def test_expired_result_is_researched_again(agent, monkeypatch):
+    first = agent.research("expiring topic")
+    first['researched_at'] = time.time() - 10
+    monkeypatch.setitem(config.RESEARCH_STORE_CONFIG, 'result_ttl', 5)
+    second = agent.research("expiring topic")
+    assert second is not first
+    assert second['researched_at'] > first['researched_at']
+
+def test_refresh_researches_again(agent):
+    first = agent.research("refresh topic")
+    assert agent.research("refresh topic", refresh=True) is not first
+
+def test_async_refresh_researches_again(agent):
+    first = asyncio.run(agent.aresearch("async refresh topic"))
+    assert asyncio.run(agent.aresearch("async refresh topic")) is first
+    assert asyncio.run(agent.aresearch("async refresh topic", refresh=True)) is not first
+
+def test_update_of_unresearched_topic_is_refused(agent, update_file):
+    with pytest.raises(ValueError):
+        agent.update_research("brand new topic", update_file)
+    result = agent.research("brand new topic")
+    assert result['researched_at'] and result['sources_count']
+    assert agent.store.status("brand new topic") == 'complete'
+
+def test_stored_result_without_timestamp_is_researched_again(agent, monkeypatch):
+    first = agent.research("untimed topic")
+    del first['researched_at']
+    monkeypatch.setitem(config.RESEARCH_STORE_CONFIG, 'result_ttl', 5)
+    assert agent.research("untimed topic") is not first
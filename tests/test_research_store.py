@@ -0,0 +1,19 @@
+from research_store import ResearchStore
+
+def claim(text, source, score=7.0):
+    return {'text': text, 'source': source, 'source_type': 'news', 'credibility_score': score, 'action': 'INCLUDE'}
+
+def test_same_text_from_two_sources_is_stored_twice(tmp_path):
+    store = ResearchStore(str(tmp_path / 'store.sqlite3'))
+    claims = [claim("Unemployment fell to 4%", 'https://a.example'), claim("Unemployment fell to 4%", 'https://b.example', 5.0)]
+    store.save_claims("topic", claims)
+    assert store.load_claims("topic") == claims
+
+def test_sync_keeps_claims_that_share_text(tmp_path):
+    store = ResearchStore(str(tmp_path / 'store.sqlite3'))
+    first = claim("Unemployment fell to 4%", 'https://a.example')
+    store.save_claims("topic", [first])
+    second = claim("Unemployment fell to 4%", 'https://b.example', 5.0)
+    delta = store.sync_claims("topic", [first, second])
+    assert delta == {'written': 1, 'deleted': 0}
+    assert store.load_claims("topic") == [first, second]
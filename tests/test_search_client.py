@@ -0,0 +1,95 @@
+import asyncio
+import copy
+import pytest
+from config import SEARCH_CONFIG
+from search_client import SearchClient, AsyncSearchClient, retry_delay
+from benchmark import StubSerperServer
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = copy.deepcopy(SEARCH_CONFIG)
+    settings['cache']['path'] = str(tmp_path / 'search.sqlite3')
+    settings['backoff_factor'] = 0.01
+    settings['timeout'] = 2
+    return settings
+
+@pytest.fixture
+def stub():
+    with StubSerperServer() as stub:
+        yield stub
+
+def finish_elsewhere(client, key, results):
+    # The first cache check misses and another owner caches the query right after.
+    get = client.cache.get
+    
+    def racing_get(k):
+        value = get(k)
+        client.cache.get = get
+        client.cache.set(key, results)
+        return value
+    
+    client.cache.get = racing_get
+
+def test_owner_rechecks_the_cache(settings, stub):
+    client = SearchClient('key', stub.url, settings)
+    cached = [{'title': 'cached', 'link': 'https://cached.example', 'snippet': 'cached'}]
+    finish_elsewhere(client, "10:solar power", cached)
+    assert client.search("Solar power") == cached
+    assert stub.requests == 0
+
+def test_async_owner_rechecks_the_cache(settings, stub):
+    cached = [{'title': 'cached', 'link': 'https://cached.example', 'snippet': 'cached'}]
+    
+    async def run():
+        client = AsyncSearchClient('key', stub.url, settings)
+        finish_elsewhere(client, "10:solar power", cached)
+        try:
+            return await client.search("Solar power")
+        finally:
+            await client.aclose()
+    
+    assert asyncio.run(run()) == cached
+    assert stub.requests == 0
+
+class CountingBucket:
+    def __init__(self):
+        self.acquired = 0
+    
+    def acquire(self):
+        self.acquired += 1
+    
+    async def aacquire(self):
+        self.acquired += 1
+
+def test_retries_take_rate_limit_tokens(settings):
+    with StubSerperServer(fail_first=2, fail_status=503) as stub:
+        client = SearchClient('key', stub.url, settings)
+        client.limiter = CountingBucket()
+        assert len(client.search("retried query")) == 5
+    assert stub.requests == 3
+    assert client.limiter.acquired == 3
+    assert client.stats['retries'] == 2
+
+def test_async_retries_take_rate_limit_tokens(settings):
+    async def run(stub):
+        client = AsyncSearchClient('key', stub.url, settings)
+        client.limiter = CountingBucket()
+        try:
+            await client.search("retried query")
+        finally:
+            await client.aclose()
+        return client
+    
+    with StubSerperServer(fail_first=2, fail_status=503) as stub:
+        client = asyncio.run(run(stub))
+    assert client.limiter.acquired == 3
+    assert client.stats['retries'] == 2
+
+class RetryAfterResponse:
+    def __init__(self, retry_after):
+        self.headers = {'Retry-After': retry_after}
+
+def test_retry_after_is_capped_at_the_request_timeout():
+    assert retry_delay(RetryAfterResponse('3600'), 0, 0.5, 5) == 5
+    assert retry_delay(RetryAfterResponse('2'), 0, 0.5, 5) == 2
+    assert retry_delay(RetryAfterResponse(''), 1, 0.5, 5) == 1.0
@@ -0,0 +1,27 @@
+import pytest
+from source_classifier import SourceClassifier
+
+@pytest.fixture
+def classifier():
+    return SourceClassifier()
+
+@pytest.mark.parametrize('url, category', [
+    ('https://www.ox.ac.uk/research', 'academic'),
+    ('https://u-tokyo.ac.jp/', 'academic'),
+    ('https://www.mit.edu/', 'academic'),
+    ('https://unsw.edu.au/', 'academic'),
+    ('https://data.gov.uk/', 'government'),
+    ('https://reuters.com/world', 'news'),
+    ('https://www.reuters.com/world', 'news'),
+    ('https://ac.com/', 'corporate'),
+    ('https://edu.com/', 'corporate'),
+    ('https://www.gov.com/', 'corporate'),
+    ('https://mil.com/', 'corporate'),
+    ('https://x.gov.com/', 'corporate'),
+    ('https://x.ac.com/', 'corporate'),
+    ('https://www.x.edu.com/', 'corporate'),
+    ('https://ac.uk/', 'corporate'),
+    ('https://defence.mil.nz/', 'government'),
+])
+def test_classify(classifier, url, category):
+    assert classifier.classify(url) == category
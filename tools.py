@@ -1,9 +1,13 @@
 import os
-import requests
 import json
-from urllib.parse import urlparse
+from source_classifier import get_source_classifier
+from search_client import get_search_client, get_async_search_client, SearchError
+from page_fetcher import get_page_fetcher, get_async_page_fetcher
 from system_prompts import CLAIM_EXTRACTION_PROMPT
-from concurrent.futures import ThreadPoolExecutor
+from instrumentation import call_site, timed, record_fallback
+from llm_cache import invalidate_reply
+from budget import truncate_tokens
+from config import FETCH_CONFIG, BUDGET_CONFIG
 
 def search_web(query, num_results=10):
     api_key = os.getenv('SERPER_API_KEY')
@@ -11,85 +15,127 @@ def search_web(query, num_results=10):
         return _mock_search(query)
     
     try:
-        response = requests.post(
-            "https://google.serper.dev/search",
-            headers={'X-API-KEY': api_key, 'Content-Type': 'application/json'},
-            json={"q": query, "num": num_results},
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        results = []
-        for item in data.get('organic', []):
-            results.append({
-                'title': item.get('title', ''),
-                'url': item.get('link', ''),
-                'content': item.get('snippet', ''),
-                'source_type': classify_source(item.get('link', ''))
-            })
-        return results
-    except:
+        organic = get_search_client(api_key).search(query, num=num_results)
+    except SearchError as e:
+        print(f"⚠️ {e} - using mock data")
         return _mock_search(query)
+    return fetch_pages(_format_search_results(organic))
+
+async def asearch_web(query, num_results=10):
+    api_key = os.getenv('SERPER_API_KEY')
+    if not api_key:
+        return _mock_search(query)
+    
+    try:
+        organic = await get_async_search_client(api_key).search(query, num=num_results)
+    except SearchError as e:
+        print(f"⚠️ {e} - using mock data")
+        return _mock_search(query)
+    return await afetch_pages(_format_search_results(organic))
+
+# Serper only returns a one-line snippet per result; fetching the pages gives
+# claim extraction the article text. Results whose page cannot be fetched keep
+# their snippet.
+def fetch_pages(sources):
+    if not FETCH_CONFIG['enabled']:
+        return sources
+    print("🌐 Fetching pages...")
+    with timed('fetch'):
+        return get_page_fetcher().fetch_sources(sources)
+
+async def afetch_pages(sources):
+    if not FETCH_CONFIG['enabled']:
+        return sources
+    print("🌐 Fetching pages...")
+    with timed('fetch'):
+        return await get_async_page_fetcher().fetch_sources(sources)
+
+def _format_search_results(organic):
+    results = []
+    for item in organic:
+        results.append({
+            'title': item.get('title', ''),
+            'url': item.get('link', ''),
+            'content': item.get('snippet', ''),
+            'source_type': classify_source(item.get('link', ''))
+        })
+    return results
 
 def classify_source(url):
-    domain = urlparse(url).netloc.lower()
-    if any(x in domain for x in ['.edu', '.ac.', 'scholar', 'arxiv', 'pubmed', 'researchgate']):
-        return 'academic'
-    if any(x in domain for x in ['.gov', '.mil', 'who.int', 'europa.eu']):
-        return 'government'
-    if any(x in domain for x in ['reuters', 'apnews', 'bbc', 'nytimes', 'wsj', 'economist']):
-        return 'news'
-    if any(x in domain for x in ['blog', 'medium.com', 'wordpress', 'substack']):
-        return 'blog'
-    if any(x in domain for x in ['twitter', 'facebook', 'instagram', 'reddit', 'tiktok']):
-        return 'social'
-    if any(x in domain for x in ['shop', 'buy', 'store', 'product', 'amazon']):
-        return 'commercial'
-    return 'corporate'
+    return get_source_classifier().classify(url)
 
 def extract_claims(content, source, llm):
-    try:
-        prompt = CLAIM_EXTRACTION_PROMPT.format(content=content[:3000])
-        result = llm.invoke(prompt)
-        claims_data = json.loads(result.content)
-        for claim in claims_data:
-            claim['source'] = source
-            claim['source_type'] = classify_source(source) if source.startswith('http') else 'document'
-            claim['source_context'] = content[:200]
-        return claims_data[:12]
-    except:
-        sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 30]
-        return [{
-            'text': sent,
-            'context': content[:200],
-            'potential_bias': 'unknown',
-            'verifiable': True,
-            'importance': 'medium',
-            'source': source,
-            'source_type': classify_source(source) if source.startswith('http') else 'document',
-            'source_context': content[:200]
-        } for sent in sentences[:12]]
+    prompt = CLAIM_EXTRACTION_PROMPT.format(content=truncate_tokens(content, 'source_content'))
+    raw = None
+    with timed('extraction'), call_site('claim_extraction'):
+        try:
+            raw = llm.invoke(prompt).content
+            return _parse_claims(raw, content, source)
+        except Exception:
+            record_fallback('claim_extraction', raw)
+            invalidate_reply(llm, prompt)
+            return _fallback_claims(content, source)
+
+async def aextract_claims(content, source, llm):
+    prompt = CLAIM_EXTRACTION_PROMPT.format(content=truncate_tokens(content, 'source_content'))
+    raw = None
+    with timed('extraction'), call_site('claim_extraction'):
+        try:
+            raw = (await llm.ainvoke(prompt)).content
+            return _parse_claims(raw, content, source)
+        except Exception:
+            record_fallback('claim_extraction', raw)
+            invalidate_reply(llm, prompt)
+            return _fallback_claims(content, source)
+
+def _parse_claims(raw, content, source):
+    claims_data = json.loads(raw)
+    for claim in claims_data:
+        claim['source'] = source
+        claim['source_type'] = classify_source(source) if source.startswith('http') else 'document'
+        claim['source_context'] = content[:200]
+    return claims_data[:12]
+
+def budget_claims(content, source):
+    # Extraction without the LLM once the research budget is spent; capped so the
+    # claims it adds stay cheap to score.
+    return _fallback_claims(content, source)[:BUDGET_CONFIG['degraded_claims_per_source']]
+
+def _fallback_claims(content, source):
+    sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 30]
+    return [{
+        'text': sent,
+        'context': content[:200],
+        'potential_bias': 'unknown',
+        'verifiable': True,
+        'importance': 'medium',
+        'source': source,
+        'source_type': classify_source(source) if source.startswith('http') else 'document',
+        'source_context': content[:200]
+    } for sent in sentences[:12]]
 
 def validate_with_search(claim, serper_key=None):
     if not serper_key:
         return "No evidence available"
     try:
-        response = requests.post(
-            "https://google.serper.dev/search",
-            headers={'X-API-KEY': serper_key, 'Content-Type': 'application/json'},
-            json={"q": claim[:100], "num": 5},
-            timeout=5
-        )
-        results = response.json().get('organic', [])
-        return "\n".join([f"- {r.get('snippet', '')} ({classify_source(r.get('link', ''))})" for r in results[:5]])
-    except:
+        results = get_search_client(serper_key).search(claim[:100], num=5, timeout=5)
+    except SearchError as e:
+        print(f"⚠️ {e}")
         return "Validation failed"
+    return _format_evidence(results)
 
-def batch_validate_claims(claims, serper_key):
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        results = list(executor.map(lambda c: validate_with_search(c, serper_key), claims))
-    return results
+async def avalidate_with_search(claim, serper_key=None):
+    if not serper_key:
+        return "No evidence available"
+    try:
+        results = await get_async_search_client(serper_key).search(claim[:100], num=5, timeout=5)
+    except SearchError as e:
+        print(f"⚠️ {e}")
+        return "Validation failed"
+    return _format_evidence(results)
+
+def _format_evidence(results):
+    return "\n".join([f"- {r.get('snippet', '')} ({classify_source(r.get('link', ''))})" for r in results[:5]])
 
 def _mock_search(query):
     return [